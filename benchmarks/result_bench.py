@@ -0,0 +1,88 @@
+"""Micro-benchmark of building stage results.
+
+Compares the validated pydantic ``ExecutionResult`` with
+``FastExecutionResult``, interned and with a description, over a mix of
+success, business and system error codes. Each variant builds the result and
+reads the fields the trackers use.
+
+Usage:
+    python -m benchmarks.result_bench --count 100000 --output reports/result_bench.json
+"""
+import argparse
+import json
+import platform as platform_info
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pydantic
+
+from rpa_tracker.domain.execution_result import ExecutionResult, FastExecutionResult
+
+# Codes cycled through: success, business error, system error
+CODES = (0, 0, 0, 7, -1)
+
+VARIANTS: Dict[str, Callable[[int], object]] = {
+    "ExecutionResult": lambda code: ExecutionResult(error_code=code),
+    "ExecutionResult+description": lambda code: ExecutionResult(error_code=code, description="done"),
+    "FastExecutionResult.of": lambda code: FastExecutionResult.of(code),
+    "FastExecutionResult.of+description": lambda code: FastExecutionResult.of(code, "done"),
+}
+
+
+def measure(build: Callable[[int], object], count: int) -> float:
+    """Seconds taken to build ``count`` results and read their derived fields."""
+    codes = [CODES[i % len(CODES)] for i in range(count)]
+    started = time.perf_counter()
+    for code in codes:
+        result = build(code)
+        result.state, result.error_type, result.description
+    return time.perf_counter() - started
+
+
+def run(count: int = 100_000, variants: Optional[Sequence[str]] = None) -> Dict[str, object]:
+    """Time every variant and return the report."""
+    results: List[Dict[str, object]] = []
+    for name in variants or VARIANTS:
+        elapsed = measure(VARIANTS[name], count)
+        results.append({
+            "variant": name,
+            "count": count,
+            "ops_per_sec": round(count / elapsed, 2) if elapsed else 0.0,
+            "ns_per_op": round(elapsed / count * 1e9, 1),
+        })
+
+    baseline = results[0]["ns_per_op"]
+    for result in results:
+        result["speedup"] = round(baseline / result["ns_per_op"], 2) if result["ns_per_op"] else 0.0
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform_info.python_version(),
+            "pydantic": pydantic.VERSION,
+            "count": count,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000, help="results built per variant")
+    parser.add_argument("--output", type=Path, default=Path("reports/result_bench.json"))
+    args = parser.parse_args(argv)
+
+    report = run(args.count)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+
+    for result in report["results"]:
+        print(f"{result['variant']:<36} {result['ops_per_sec']:>14.1f} ops/s "
+              f"{result['ns_per_op']:>9.1f} ns/op x{result['speedup']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
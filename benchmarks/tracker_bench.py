@@ -0,0 +1,221 @@
+"""Micro-benchmarks of the SQL tracker and the report repository.
+
+Seeds N transactions with the platform/stage catalog of the complex
+integration scenario (A: validar, B: procesar + confirmar, C: default) into a
+file-backed SQLite database, then times each operation and reports ops/sec
+and p50/p99 latency.
+
+Usage:
+    python -m benchmarks.tracker_bench --sizes 1000 10000 100000 --output reports/benchmarks.json
+
+Results are written as JSON (one entry per size and operation) so two runs
+can be diffed between releases.
+"""
+import argparse
+import json
+import platform as platform_info
+import sqlite3
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import sqlalchemy
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.schema import create_schema
+from rpa_tracker.reporting.transaction_report_repository import TransactionReportRepository
+from rpa_tracker.retry.policy import RetryPolicy
+from rpa_tracker.retry.registry import RetryPolicyRegistry
+from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+PROCESS_CODE = "BENCH_PROC"
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+SEED_CHUNK = 10_000
+
+CATALOG = (
+    PlatformDefinition(code="A", stages=("validar",), retry_policy=RetryPolicy(max_attempts=1), order=1),
+    PlatformDefinition(code="B", stages=("procesar", "confirmar"), retry_policy=RetryPolicy(max_attempts=2), order=2),
+    PlatformDefinition(code="C", retry_policy=RetryPolicy(), order=3),
+)
+
+
+@dataclass
+class BenchResult:
+    """Timing of one operation at one backlog size."""
+    size: int
+    operation: str
+    calls: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+
+
+class KeyDeduplication:
+    """Deduplication on a dict, so timings only measure the tracker."""
+
+    def __init__(self):
+        self.uuids: Dict[str, str] = {}
+
+    def calculate_fingerprint(self, payload: str) -> str:
+        """Payloads are their own fingerprint."""
+        return payload
+
+    def find_existing_uuid(self, fingerprint: str) -> Optional[str]:
+        """Look the fingerprint up."""
+        return self.uuids.get(fingerprint)
+
+    def persist_data(self, uuid: str, payload: str) -> None:
+        """Remember the fingerprint."""
+        self.uuids[payload] = uuid
+
+
+def register_catalog() -> None:
+    """Register the benchmark catalog and an empty deduplication index."""
+    PlatformRegistry.clear()
+    RetryPolicyRegistry.clear()
+    DeduplicationRegistry.clear()
+    for definition in CATALOG:
+        PlatformRegistry.register(definition)
+        RetryPolicyRegistry.register(definition.code, definition.retry_policy)
+    DeduplicationRegistry.register(PROCESS_CODE, KeyDeduplication())
+
+
+def seed(session: Session, size: int) -> List[str]:
+    """Insert ``size`` PENDING transactions with their full stage plan."""
+    tracker = SqlTransactionTracker(session, materialize_on_start=True)
+    payloads = (f"seed-{i}" for i in range(size))
+    results = tracker.start_or_resume_many(PROCESS_CODE, payloads, chunk_size=SEED_CHUNK)
+    return [uuid for uuid, _ in results]
+
+
+def measure(size: int, operation: str, calls: Iterable[Callable[[], object]]) -> BenchResult:
+    """Time each call and summarize the latencies."""
+    latencies = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    total = sum(latencies)
+    return BenchResult(
+        size=size,
+        operation=operation,
+        calls=len(latencies),
+        ops_per_sec=round(len(latencies) / total, 2) if total else 0.0,
+        p50_ms=round(statistics.median(latencies) * 1000, 4),
+        p99_ms=round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 4),
+    )
+
+
+def bench_size(session_factory: Callable[[], Session], size: int, ops: int, scans: int) -> List[BenchResult]:
+    """Benchmark every operation against a backlog of ``size`` transactions.
+
+    Args:
+        session_factory: Creates sessions on an empty database.
+        size: Number of transactions to seed.
+        ops: Calls per write operation.
+        scans: Calls per read over the whole backlog (pending stages, reports).
+    """
+    session = session_factory()
+    tracker = SqlTransactionTracker(session)
+    reports = TransactionReportRepository(session)
+    uuids = seed(session, size)
+    sample = uuids[:min(ops, size)]
+    ok = ExecutionResult(error_code=0)
+    results = []
+
+    payloads = [f"payload-{size}-{i}" for i in range(ops)]
+    results.append(measure(size, "start_or_resume", (
+        lambda p=p: tracker.start_or_resume(PROCESS_CODE, p) for p in payloads
+    )))
+    new_uuids = [DeduplicationRegistry.get(PROCESS_CODE).find_existing_uuid(p) for p in payloads]
+    results.append(measure(size, "start_stage", (
+        lambda u=u: tracker.start_stage(u, "A", "validar") for u in new_uuids
+    )))
+    results.append(measure(size, "log_event", (
+        lambda u=u: tracker.log_event(u, "A", 0, None, "validar") for u in sample
+    )))
+    results.append(measure(size, "finish_stage", (
+        lambda u=u: tracker.finish_stage(u, "A", TransactionState.COMPLETED, stage="validar") for u in sample
+    )))
+    results.append(measure(size, "complete_stage", (
+        lambda u=u: tracker.complete_stage(u, "B", ok, stage="procesar") for u in sample
+    )))
+    results.append(measure(size, "get_pending_stages", (
+        lambda: tracker.get_pending_stages("B", "confirmar") for _ in range(scans)
+    )))
+
+    end = datetime.now() + timedelta(minutes=1)
+    start = end - timedelta(days=1)
+    for method in ("transactions_between", "summary_by_state", "stage_summary_by_system",
+                   "stage_summary_by_system_and_stage"):
+        report = getattr(reports, method)
+        results.append(measure(size, method, (lambda: report(start, end) for _ in range(scans))))
+        session.expunge_all()
+
+    session.close()
+    return results
+
+
+def run(sizes: Sequence[int] = DEFAULT_SIZES,
+        ops: int = 1000,
+        scans: int = 5,
+        workdir: Optional[Path] = None) -> Dict[str, object]:
+    """Run the suite for every size on a fresh SQLite file and return the report."""
+    results: List[BenchResult] = []
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for size in sizes:
+            register_catalog()
+            engine = create_engine(f"sqlite:///{Path(tmp) / f'bench_{size}.db'}")
+            create_schema(engine)
+            try:
+                results.extend(bench_size(sessionmaker(bind=engine), size, ops, scans))
+            finally:
+                engine.dispose()
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform_info.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "sqlite": sqlite3.sqlite_version,
+            "ops": ops,
+            "scans": scans,
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="backlog sizes to seed, e.g. 1000 10000 100000 1000000")
+    parser.add_argument("--ops", type=int, default=1000, help="calls per write operation")
+    parser.add_argument("--scans", type=int, default=5, help="calls per full-backlog read")
+    parser.add_argument("--output", type=Path, default=Path("reports/benchmarks.json"))
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.ops, args.scans)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+
+    for result in report["results"]:
+        print(f"{result['size']:>9} {result['operation']:<36} {result['ops_per_sec']:>12.1f} ops/s "
+              f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Transaction tracking, deduplication, retry handling and audit trail for RPA.
+
+The public API is importable from the package root::
+
+    from rpa_tracker import ExecutionResult, PlatformDefinition, PlatformRegistry, SqlTransactionTracker
+
+Names are loaded on first access: ``import rpa_tracker`` alone imports
+neither SQLAlchemy nor pydantic. A short-lived job process only pays for the
+modules it uses.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Dict, List
+
+__version__ = "0.0.0"
+
+# Public name -> module defining it
+_EXPORTS: Dict[str, str] = {
+    "DEFAULT_STAGE": "rpa_tracker.constants",
+    "CircuitState": "rpa_tracker.enums",
+    "ErrorType": "rpa_tracker.enums",
+    "TransactionState": "rpa_tracker.enums",
+    "AnyExecutionResult": "rpa_tracker.domain.execution_result",
+    "ExecutionResult": "rpa_tracker.domain.execution_result",
+    "FastExecutionResult": "rpa_tracker.domain.execution_result",
+    "PlatformDefinition": "rpa_tracker.catalog.platform",
+    "PlatformRegistry": "rpa_tracker.catalog.registry",
+    "CircuitBreakerPolicy": "rpa_tracker.retry.circuit_breaker",
+    "RetryPolicy": "rpa_tracker.retry.policy",
+    "RetryPolicyRegistry": "rpa_tracker.retry.registry",
+    "DeduplicationStrategy": "rpa_tracker.tracking.deduplication.base",
+    "DeduplicationRegistry": "rpa_tracker.tracking.deduplication.registry",
+    "CachedDeduplication": "rpa_tracker.tracking.deduplication.cache",
+    "HashedFingerprintDeduplication": "rpa_tracker.tracking.deduplication.hashed",
+    "TransactionTracker": "rpa_tracker.tracking.transaction_tracker",
+    "SqlTransactionTracker": "rpa_tracker.tracking.sql_tracker",
+    "AsyncSqlTransactionTracker": "rpa_tracker.tracking.async_sql_tracker",
+    "InMemoryTransactionTracker": "rpa_tracker.tracking.memory_tracker",
+    "MemoryStore": "rpa_tracker.tracking.memory_tracker",
+    "SqliteWriter": "rpa_tracker.tracking.sqlite_writer",
+    "create_sqlite_engine": "rpa_tracker.tracking.sqlite_writer",
+    "TransactionReportRepository": "rpa_tracker.reporting.transaction_report_repository",
+    "InMemoryTransactionReportRepository": "rpa_tracker.reporting.memory_report_repository",
+    "create_schema": "rpa_tracker.models.schema",
+    "ensure_columns": "rpa_tracker.models.schema",
+    "ensure_indexes": "rpa_tracker.models.schema",
+    "Instrumentation": "rpa_tracker.instrumentation",
+    "PlatformRunner": "rpa_tracker.runner.platform_runner",
+    "PoolConfig": "rpa_tracker.runner.platform_runner",
+    "WorkerSessionFactory": "rpa_tracker.runner.platform_runner",
+}
+
+__all__ = [
+    "__version__",
+    "DEFAULT_STAGE",
+    "CircuitState",
+    "ErrorType",
+    "TransactionState",
+    "AnyExecutionResult",
+    "ExecutionResult",
+    "FastExecutionResult",
+    "PlatformDefinition",
+    "PlatformRegistry",
+    "CircuitBreakerPolicy",
+    "RetryPolicy",
+    "RetryPolicyRegistry",
+    "DeduplicationStrategy",
+    "DeduplicationRegistry",
+    "CachedDeduplication",
+    "HashedFingerprintDeduplication",
+    "TransactionTracker",
+    "SqlTransactionTracker",
+    "AsyncSqlTransactionTracker",
+    "InMemoryTransactionTracker",
+    "MemoryStore",
+    "SqliteWriter",
+    "create_sqlite_engine",
+    "TransactionReportRepository",
+    "InMemoryTransactionReportRepository",
+    "create_schema",
+    "ensure_columns",
+    "ensure_indexes",
+    "Instrumentation",
+    "PlatformRunner",
+    "PoolConfig",
+    "WorkerSessionFactory",
+]
+
+if TYPE_CHECKING:
+    from rpa_tracker.catalog.platform import PlatformDefinition
+    from rpa_tracker.catalog.registry import PlatformRegistry
+    from rpa_tracker.constants import DEFAULT_STAGE
+    from rpa_tracker.domain.execution_result import AnyExecutionResult, ExecutionResult, FastExecutionResult
+    from rpa_tracker.enums import CircuitState, ErrorType, TransactionState
+    from rpa_tracker.instrumentation import Instrumentation
+    from rpa_tracker.models.schema import create_schema, ensure_columns, ensure_indexes
+    from rpa_tracker.reporting.memory_report_repository import InMemoryTransactionReportRepository
+    from rpa_tracker.reporting.transaction_report_repository import TransactionReportRepository
+    from rpa_tracker.retry.circuit_breaker import CircuitBreakerPolicy
+    from rpa_tracker.retry.policy import RetryPolicy
+    from rpa_tracker.retry.registry import RetryPolicyRegistry
+    from rpa_tracker.runner.platform_runner import PlatformRunner, PoolConfig, WorkerSessionFactory
+    from rpa_tracker.tracking.async_sql_tracker import AsyncSqlTransactionTracker
+    from rpa_tracker.tracking.deduplication.base import DeduplicationStrategy
+    from rpa_tracker.tracking.deduplication.cache import CachedDeduplication
+    from rpa_tracker.tracking.deduplication.hashed import HashedFingerprintDeduplication
+    from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+    from rpa_tracker.tracking.memory_tracker import InMemoryTransactionTracker, MemoryStore
+    from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+    from rpa_tracker.tracking.sqlite_writer import SqliteWriter, create_sqlite_engine
+    from rpa_tracker.tracking.transaction_tracker import TransactionTracker
+
+
+def __getattr__(name: str) -> Any:
+    """Import the module defining ``name`` on first access."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    """Module attributes including the lazily loaded ones."""
+    return sorted({*globals(), *_EXPORTS})
@@ -1,14 +1,43 @@
 """Defines platform configurations for transaction flows in RPA Tracker."""
 from dataclasses import dataclass, field
-from typing import Sequence
+from typing import Optional, Sequence
 from rpa_tracker.constants import DEFAULT_STAGE
+from rpa_tracker.retry.circuit_breaker import CircuitBreakerPolicy
 from rpa_tracker.retry.policy import RetryPolicy
 
 
 @dataclass(frozen=True)
 class PlatformDefinition:
-    """Defines a platform in a transaction flow."""
+    """Defines a platform in a transaction flow.
+
+    By default a platform waits for every platform with a lower ``order``.
+    ``depends_on`` replaces that with explicit edges, so platforms that do not
+    depend on each other become eligible in parallel.
+
+    With a ``circuit_breaker`` the tracker stops dispatching stages of the
+    platform while it keeps failing with system errors.
+
+    ``max_concurrency`` caps the stages of the platform leased at the same
+    time and ``max_rate_per_minute`` the stages dispatched per minute, across
+    every worker sharing the database.
+    """
     code: str
     stages: Sequence[str] = (DEFAULT_STAGE,)
     retry_policy: RetryPolicy = field(default_factory=RetryPolicy)
     order: int = 0
+    depends_on: Optional[Sequence[str]] = None
+    circuit_breaker: Optional[CircuitBreakerPolicy] = None
+    max_concurrency: Optional[int] = None
+    max_rate_per_minute: Optional[float] = None
+
+    def __post_init__(self):
+        """Validate the dispatch limits."""
+        if self.max_concurrency is not None and self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if self.max_rate_per_minute is not None and self.max_rate_per_minute <= 0:
+            raise ValueError("max_rate_per_minute must be positive")
+
+    @property
+    def limits_dispatch(self) -> bool:
+        """Whether the platform has a concurrency cap or a rate limit."""
+        return self.max_concurrency is not None or self.max_rate_per_minute is not None
@@ -1,15 +1,18 @@
 """Registry for platform definitions in RPA Tracker."""
-from typing import Dict
+from typing import Dict, List, Optional
 from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.snapshot import CatalogSnapshot
 
 
 class PlatformRegistry:
     _platforms: Dict[str, PlatformDefinition] = {}
+    _snapshot: Optional[CatalogSnapshot] = None
 
     @classmethod
     def register(cls, platform: PlatformDefinition) -> None:
         """Registers a platform definition."""
         cls._platforms[platform.code] = platform
+        cls._snapshot = None
 
     @classmethod
     def get(cls, code: str) -> PlatformDefinition:
@@ -17,14 +20,19 @@ class PlatformRegistry:
         return cls._platforms[code]
 
     @classmethod
-    def all(cls):
-        """Retrieves all platform definitions."""
-        return sorted(
-            cls._platforms.values(),
-            key=lambda p: p.order
-        )
+    def all(cls) -> List[PlatformDefinition]:
+        """Retrieves all platform definitions, in flow order."""
+        return list(cls.snapshot().platforms)
+
+    @classmethod
+    def snapshot(cls) -> CatalogSnapshot:
+        """Compiled catalog, rebuilt only after the registry changes."""
+        if cls._snapshot is None:
+            cls._snapshot = CatalogSnapshot.compile(cls._platforms.values())
+        return cls._snapshot
 
     @classmethod
     def clear(cls):
         """Clear all registered platforms (for testing)."""
         cls._platforms.clear()
+        cls._snapshot = None
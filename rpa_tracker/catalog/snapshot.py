@@ -0,0 +1,106 @@
+"""Compiled, immutable view of the platform catalog."""
+import heapq
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Platform catalog compiled once per registry change.
+
+    Attributes:
+        platforms: Platforms in a topological order of the dependency graph;
+            ties (and every catalog without ``depends_on``) follow ``order``
+            and then registration order.
+        predecessors: Platforms that must be completed before each platform,
+            transitively, in ``platforms`` order.
+        expected_stages: Number of stages declared by each platform.
+        plan: Every (platform code, stage) pair of the catalog.
+        by_code: Platforms by code.
+    """
+    platforms: Tuple[PlatformDefinition, ...]
+    predecessors: Mapping[str, Tuple[PlatformDefinition, ...]]
+    expected_stages: Mapping[str, int]
+    plan: Tuple[Tuple[str, str], ...]
+    by_code: Mapping[str, PlatformDefinition]
+
+    @classmethod
+    def compile(cls, platforms: Iterable[PlatformDefinition]) -> "CatalogSnapshot":
+        """Build the snapshot of ``platforms`` (in registration order).
+
+        Platforms without ``depends_on`` depend on every platform with a lower
+        ``order``, except platforms with ``order == 1``, which start the flow.
+
+        Raises:
+            ValueError: If a platform depends on an unknown platform or the
+                dependencies contain a cycle.
+        """
+        platforms = list(platforms)
+        by_code = {platform.code: platform for platform in platforms}
+        direct = {platform.code: _direct_dependencies(platform, platforms) for platform in platforms}
+
+        for code, dependencies in direct.items():
+            unknown = [dep for dep in dependencies if dep not in by_code]
+            if unknown:
+                raise ValueError(f"Platform {code} depends on unknown platforms: {', '.join(unknown)}")
+
+        ordered = _topological_order(platforms, direct)
+        position = {platform.code: index for index, platform in enumerate(ordered)}
+
+        predecessors: Dict[str, Tuple[PlatformDefinition, ...]] = {}
+        for platform in ordered:
+            closure = set(direct[platform.code])
+            for dependency in direct[platform.code]:
+                closure.update(p.code for p in predecessors[dependency])
+            predecessors[platform.code] = tuple(
+                by_code[code] for code in sorted(closure, key=position.__getitem__)
+            )
+
+        return cls(
+            platforms=tuple(ordered),
+            predecessors=MappingProxyType(predecessors),
+            expected_stages=MappingProxyType({p.code: len(p.stages) for p in ordered}),
+            plan=tuple((p.code, stage) for p in ordered for stage in p.stages),
+            by_code=MappingProxyType(by_code),
+        )
+
+
+def _direct_dependencies(platform: PlatformDefinition, platforms: List[PlatformDefinition]) -> Tuple[str, ...]:
+    """Codes the platform directly depends on."""
+    if platform.depends_on is not None:
+        return tuple(platform.depends_on)
+    if platform.order == 1:
+        # First platform, no previous platforms to check
+        return ()
+    return tuple(p.code for p in platforms if p.order < platform.order)
+
+
+def _topological_order(platforms: List[PlatformDefinition],
+                       direct: Mapping[str, Tuple[str, ...]]) -> List[PlatformDefinition]:
+    """Kahn's algorithm, releasing ready platforms by (order, registration)."""
+    index = {platform.code: i for i, platform in enumerate(platforms)}
+    waiting = {code: len(set(deps)) for code, deps in direct.items()}
+    dependents: Dict[str, List[str]] = {code: [] for code in direct}
+    for code, dependencies in direct.items():
+        for dependency in set(dependencies):
+            dependents[dependency].append(code)
+
+    ready = [(p.order, index[p.code]) for p in platforms if waiting[p.code] == 0]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        _, i = heapq.heappop(ready)
+        platform = platforms[i]
+        ordered.append(platform)
+        for code in dependents[platform.code]:
+            waiting[code] -= 1
+            if waiting[code] == 0:
+                heapq.heappush(ready, (platforms[index[code]].order, index[code]))
+
+    if len(ordered) < len(platforms):
+        cycle = sorted(code for code, count in waiting.items() if count > 0)
+        raise ValueError(f"Platform dependencies contain a cycle: {', '.join(cycle)}")
+    return ordered
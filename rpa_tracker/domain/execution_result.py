@@ -1,9 +1,29 @@
 """Domain model for execution results in RPA tracker."""
+from functools import lru_cache
 from pydantic import BaseModel, model_validator
-from typing import Optional
+from typing import NamedTuple, Optional, Tuple, Union
 
 from rpa_tracker.enums import TransactionState, ErrorType
 
+DerivedFields = Tuple[TransactionState, Optional[ErrorType], bool]
+
+_COMPLETED: DerivedFields = (TransactionState.COMPLETED, None, True)
+_REJECTED: DerivedFields = (TransactionState.REJECTED, ErrorType.BUSINESS, False)
+_TERMINATED: DerivedFields = (TransactionState.TERMINATED, ErrorType.SYSTEM, True)
+
+
+def derived_fields(error_code: int) -> DerivedFields:
+    """Return (state, error_type, retryable) for an error code.
+
+    They only depend on its sign: 0 completes the stage, a business error
+    (> 0) rejects it and a system error (< 0) terminates it for a retry.
+    """
+    if error_code == 0:
+        return _COMPLETED
+    if error_code > 0:
+        return _REJECTED
+    return _TERMINATED
+
 
 class ExecutionResult(BaseModel):
     error_code: int
@@ -16,19 +36,48 @@ class ExecutionResult(BaseModel):
     @model_validator(mode="after")
     def compute_derived_fields(self):
         """Compute derived fields based on error_code."""
-        if self.error_code == 0:
-            self.state = TransactionState.COMPLETED
-            self.error_type = None
-            self.retryable = True
+        self.state, self.error_type, self.retryable = derived_fields(self.error_code)
+        return self
 
-        elif self.error_code > 0:
-            self.state = TransactionState.REJECTED
-            self.error_type = ErrorType.BUSINESS
-            self.retryable = False
 
-        else:
-            self.state = TransactionState.TERMINATED
-            self.error_type = ErrorType.SYSTEM
-            self.retryable = True
+class FastExecutionResult(NamedTuple):
+    """Immutable, validation-free ``ExecutionResult`` for hot loops.
 
-        return self
+    Has the same attributes as ``ExecutionResult``, and every tracker method
+    that takes an ``ExecutionResult`` accepts it. Build it with ``of``, which
+    returns the same instance each time for a code without a description.
+    Keep ``ExecutionResult`` where input has to be validated, e.g. values
+    coming from handlers or other processes, and convert it with
+    ``from_result``.
+
+    Example:
+        ok = FastExecutionResult.of(0)
+        for uuid in uuids:
+            tracker.complete_stage(uuid, "A", ok)
+    """
+    error_code: int
+    description: Optional[str]
+    state: TransactionState
+    error_type: Optional[ErrorType]
+    retryable: bool
+
+    @classmethod
+    def of(cls, error_code: int, description: Optional[str] = None) -> "FastExecutionResult":
+        """Result of ``error_code``; interned when there is no description."""
+        if description is None:
+            return _interned(error_code)
+        return cls(error_code, description, *derived_fields(error_code))
+
+    @classmethod
+    def from_result(cls, result: ExecutionResult) -> "FastExecutionResult":
+        """Fast copy of a validated ``ExecutionResult``."""
+        return cls.of(result.error_code, result.description)
+
+
+@lru_cache(maxsize=1024)
+def _interned(error_code: int) -> FastExecutionResult:
+    return FastExecutionResult(error_code, None, *derived_fields(error_code))
+
+
+# What the trackers accept as the result of a stage
+AnyExecutionResult = Union[ExecutionResult, FastExecutionResult]
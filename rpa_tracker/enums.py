@@ -14,3 +14,36 @@ class TransactionState(str, Enum):
 class ErrorType(str, Enum):
     SYSTEM = "SYSTEM"
     BUSINESS = "BUSINESS"
+
+
+class CircuitState(str, Enum):
+    CLOSED = "CLOSED"        # stages are dispatched
+    OPEN = "OPEN"            # platform failing, nothing is dispatched
+    HALF_OPEN = "HALF_OPEN"  # one probe stage decides whether to close
+
+
+# Stage states that can still be finished (first attempt or retry)
+FINISHABLE_STAGE_STATES = (
+    TransactionState.PENDING.value,
+    TransactionState.TERMINATED.value,
+)
+
+# Stage states that keep a transaction from being completed
+OPEN_STAGE_STATES = (
+    TransactionState.PENDING.value,
+    TransactionState.IN_PROGRESS.value,
+)
+
+# Stage states closed without completing, counted in TxProcess.failed_stages
+FAILED_STAGE_STATES = (
+    TransactionState.REJECTED.value,
+    TransactionState.TERMINATED.value,
+    TransactionState.CANCELLED.value,
+)
+
+# Process states whose stages may still be executed
+ELIGIBLE_PROCESS_STATES = (
+    TransactionState.PENDING.value,
+    TransactionState.IN_PROGRESS.value,
+    TransactionState.TERMINATED.value,
+)
@@ -0,0 +1,243 @@
+"""Opt-in instrumentation of tracker and report calls.
+
+An ``Instrumentation`` passed to ``SqlTransactionTracker`` or
+``TransactionReportRepository`` wraps their public methods on that instance
+and listens to the cursor events of the session's engine. Per method it
+records call counts, a wall-time histogram, and the SQL statements, rows and
+SQL time issued while the method runs. Nested calls are inclusive:
+``complete_stage`` also counts the statements of the ``log_event`` and
+``finish_stage`` calls it makes.
+
+Without an instrumentation nothing is wrapped and no listener is installed,
+so disabled instrumentation costs nothing.
+
+Example:
+    instrumentation = Instrumentation(log_batches=True)
+    tracker = SqlTransactionTracker(session, instrumentation=instrumentation)
+    ...
+    print(instrumentation.snapshot().to_dict())
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the wall-time histogram buckets; the last bucket is open
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_active: ContextVar[Tuple["_MethodStats", ...]] = ContextVar("rpa_tracker_instrumented_calls", default=())
+
+# Execution context attribute holding the start time of its cursor execution
+_STARTED_ATTRIBUTE = "_rpa_tracker_cursor_started"
+
+
+@dataclass(frozen=True)
+class MethodSnapshot:
+    """Recorded activity of one method.
+
+    Attributes:
+        calls: Number of calls.
+        errors: Calls that raised.
+        total_ms: Wall time of all calls.
+        max_ms: Slowest call.
+        histogram: Call counts per bucket of ``Instrumentation.buckets_ms``,
+            plus one last bucket for slower calls.
+        statements: SQL statements executed during the calls.
+        rows: Rows reported by the driver for those statements (rows written
+            by INSERT/UPDATE/DELETE; SELECTs do not report a row count).
+        sql_ms: Time spent in the cursor executing those statements.
+    """
+    calls: int
+    errors: int
+    total_ms: float
+    max_ms: float
+    histogram: Tuple[int, ...]
+    statements: int
+    rows: int
+    sql_ms: float
+
+    @property
+    def mean_ms(self) -> float:
+        """Average wall time per call."""
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+@dataclass(frozen=True)
+class InstrumentationSnapshot:
+    """Immutable copy of the recorded activity, by ``Class.method``."""
+    buckets_ms: Tuple[float, ...]
+    methods: Dict[str, MethodSnapshot]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form, suitable for JSON."""
+        return {
+            "buckets_ms": list(self.buckets_ms),
+            "methods": {
+                name: {**asdict(stats), "histogram": list(stats.histogram)}
+                for name, stats in self.methods.items()
+            },
+        }
+
+
+class _MethodStats:
+    """Mutable counters of one method; guarded by the instrumentation lock."""
+
+    def __init__(self, buckets: int):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (buckets + 1)
+        self.statements = 0
+        self.rows = 0
+        self.sql_ms = 0.0
+
+    def freeze(self) -> MethodSnapshot:
+        return MethodSnapshot(
+            calls=self.calls,
+            errors=self.errors,
+            total_ms=round(self.total_ms, 3),
+            max_ms=round(self.max_ms, 3),
+            histogram=tuple(self.histogram),
+            statements=self.statements,
+            rows=self.rows,
+            sql_ms=round(self.sql_ms, 3),
+        )
+
+
+class Instrumentation:
+
+    def __init__(self,
+                 buckets_ms: Iterable[float] = DEFAULT_BUCKETS_MS,
+                 log_batches: bool = False,
+                 logger: Optional[logging.Logger] = None):
+        """Create an empty instrumentation.
+
+        Args:
+            buckets_ms: Upper bounds of the wall-time histogram buckets.
+            log_batches: If True, ``SqlTransactionTracker.batch`` logs one
+                structured line per batch with the activity of that batch.
+            logger: Logger of that line; this module's logger by default.
+        """
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self.log_batches = log_batches
+        self.logger = logger or log
+        self._methods: Dict[str, _MethodStats] = {}
+        self._engines: Set[Engine] = set()
+        self._lock = threading.Lock()
+
+    def instrument(self, target: Any, methods: Iterable[str], bind: Optional[Engine] = None) -> None:
+        """Wrap ``methods`` of the ``target`` instance and listen to ``bind``."""
+        prefix = type(target).__name__
+        for name in methods:
+            setattr(target, name, self._wrap(f"{prefix}.{name}", getattr(target, name)))
+        if bind is not None:
+            self.attach(bind)
+
+    def attach(self, engine: Engine) -> None:
+        """Listen to the cursor events of ``engine`` (once per engine)."""
+        with self._lock:
+            if engine in self._engines:
+                return
+            self._engines.add(engine)
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def close(self) -> None:
+        """Remove the engine listeners; wrapped methods keep counting calls."""
+        with self._lock:
+            engines, self._engines = self._engines, set()
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def snapshot(self) -> InstrumentationSnapshot:
+        """Copy of the activity recorded so far."""
+        with self._lock:
+            methods = {name: stats.freeze() for name, stats in sorted(self._methods.items())}
+        return InstrumentationSnapshot(buckets_ms=self.buckets_ms, methods=methods)
+
+    def reset(self) -> None:
+        """Forget the recorded activity."""
+        with self._lock:
+            self._methods.clear()
+
+    def log_snapshot(self, label: str = "batch", reset: bool = True) -> InstrumentationSnapshot:
+        """Log the activity as one JSON line and return it.
+
+        The dict form is also attached to the record as ``instrumentation``
+        for structured log handlers.
+
+        Args:
+            label: Name of the measured unit, included in the line.
+            reset: Start counting from zero afterwards, so each line covers
+                one unit.
+        """
+        snapshot = self.snapshot()
+        if reset:
+            self.reset()
+        payload = {"label": label, **snapshot.to_dict()}
+        self.logger.info("rpa_tracker instrumentation %s", json.dumps(payload), extra={"instrumentation": payload})
+        return snapshot
+
+    def _stats(self, name: str) -> _MethodStats:
+        stats = self._methods.get(name)
+        if stats is None:
+            stats = self._methods[name] = _MethodStats(len(self.buckets_ms))
+        return stats
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with self._lock:
+                stats = self._stats(name)
+            token = _active.set(_active.get() + (stats,))
+            started = time.perf_counter()
+            failed = False
+            try:
+                return method(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                _active.reset(token)
+                with self._lock:
+                    stats.calls += 1
+                    stats.errors += failed
+                    stats.total_ms += elapsed_ms
+                    stats.max_ms = max(stats.max_ms, elapsed_ms)
+                    stats.histogram[bisect_left(self.buckets_ms, elapsed_ms)] += 1
+
+        return wrapper
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # The start time lives on the statement's execution context, not on the
+        # connection: a statement that raises never reaches after_cursor_execute,
+        # and its start time is dropped together with the context.
+        if _active.get() and context is not None:
+            setattr(context, _STARTED_ATTRIBUTE, time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        active = _active.get()
+        if not active:
+            return
+
+        started = getattr(context, _STARTED_ATTRIBUTE, None)
+        sql_ms = 0.0 if started is None else (time.perf_counter() - started) * 1000
+        rows = max(cursor.rowcount, 0)
+        with self._lock:
+            for stats in set(active):
+                stats.statements += 1
+                stats.rows += rows
+                stats.sql_ms += sql_ms
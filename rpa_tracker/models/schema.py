@@ -0,0 +1,138 @@
+"""DDL helpers for the tracker tables."""
+from typing import List, Union
+
+from sqlalchemy import Update, func, inspect, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn
+
+from rpa_tracker.enums import FAILED_STAGE_STATES, TransactionState
+from rpa_tracker.models.tx_circuit import Base as CircuitBase
+from rpa_tracker.models.tx_event import Base as EventBase
+from rpa_tracker.models.tx_fingerprint import Base as FingerprintBase
+from rpa_tracker.models.tx_limiter import Base as LimiterBase
+from rpa_tracker.models.tx_process import Base as ProcessBase, TxProcess
+from rpa_tracker.models.tx_stage import Base as StageBase, TxStage
+
+Bind = Union[Engine, Connection]
+
+METADATAS = (
+    ProcessBase.metadata,
+    StageBase.metadata,
+    EventBase.metadata,
+    FingerprintBase.metadata,
+    CircuitBase.metadata,
+    LimiterBase.metadata,
+)
+
+# Counter columns of RPA_TX_PROCESS rebuilt from RPA_TX_STAGE when they are added
+STAGE_COUNTER_COLUMNS = ("total_stages", "completed_stages", "failed_stages")
+
+
+def create_schema(bind: Bind) -> None:
+    """Create the tracker tables and their indexes when missing."""
+    for metadata in METADATAS:
+        metadata.create_all(bind)
+
+
+def missing_indexes(bind: Bind) -> List[str]:
+    """Names of the declared indexes not present in the database.
+
+    Tables that do not exist yet are ignored; ``create_schema`` creates them
+    with their indexes.
+    """
+    inspector = inspect(bind)
+    missing = []
+    for metadata in METADATAS:
+        for table in metadata.tables.values():
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            missing.extend(index.name for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def ensure_indexes(bind: Bind) -> List[str]:
+    """Create the declared indexes missing on an existing database.
+
+    Returns:
+        Names of the indexes created.
+    """
+    missing = set(missing_indexes(bind))
+    for metadata in METADATAS:
+        for table in metadata.tables.values():
+            for index in table.indexes:
+                if index.name in missing:
+                    index.create(bind)
+    return sorted(missing)
+
+
+def ensure_columns(bind: Bind) -> List[str]:
+    """Add the declared columns missing on an existing database.
+
+    Only columns that are nullable or have a server default can be added this
+    way, which holds for every column added after the first release.
+
+    When the stage counters of ``RPA_TX_PROCESS`` are added, they are filled
+    from ``RPA_TX_STAGE`` in the same call. Left at their default of 0, they
+    would read as "every stage closed", and the first finished stage of an
+    existing transaction would complete it.
+
+    Returns:
+        Names of the columns added, as ``TABLE.column``.
+    """
+    inspector = inspect(bind)
+    added = []
+    for metadata in METADATAS:
+        for table in metadata.tables.values():
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=bind.dialect)
+                _execute_ddl(bind, f"ALTER TABLE {bind.dialect.identifier_preparer.format_table(table)} ADD {ddl}")
+                added.append(f"{table.name}.{column.name}")
+
+    if any(f"{TxProcess.__tablename__}.{name}" in added for name in STAGE_COUNTER_COLUMNS):
+        _execute(bind, stage_counters_update())
+    return added
+
+
+def stage_counters_update() -> Update:
+    """UPDATE setting the stage counters of every process from its stages.
+
+    Restrict it with ``.where(TxProcess.uuid.in_(...))``.
+    """
+    def count(*conditions):
+        return (
+            select(func.count())
+            .select_from(TxStage)
+            .where(TxStage.uuid == TxProcess.uuid, *conditions)
+            .scalar_subquery()
+        )
+
+    return update(TxProcess).values(
+        total_stages=count(),
+        completed_stages=count(TxStage.state == TransactionState.COMPLETED.value),
+        failed_stages=count(TxStage.state.in_(FAILED_STAGE_STATES)),
+        version=TxProcess.version + 1,
+    )
+
+
+def _execute_ddl(bind: Bind, statement: str) -> None:
+    """Run a DDL statement on an engine (in its own transaction) or a connection."""
+    if isinstance(bind, Engine):
+        with bind.begin() as connection:
+            connection.exec_driver_sql(statement)
+    else:
+        bind.exec_driver_sql(statement)
+
+
+def _execute(bind: Bind, statement: Update) -> None:
+    """Run a statement on an engine (in its own transaction) or a connection."""
+    if isinstance(bind, Engine):
+        with bind.begin() as connection:
+            connection.execute(statement)
+    else:
+        bind.execute(statement)
@@ -0,0 +1,28 @@
+"""SQLAlchemy model for platform circuit breakers."""
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.orm import declarative_base
+from datetime import datetime
+
+Base = declarative_base()
+
+
+class TxCircuit(Base):
+    __tablename__ = "RPA_TX_CIRCUIT"
+
+    # One row per platform whose circuit has ever tripped; no row = CLOSED
+    system = Column(String(50), primary_key=True)
+
+    state = Column(String(20), nullable=False)
+    opened_at = Column(DateTime, nullable=True)
+    # Lease of the half-open probe stage
+    probe_until = Column(DateTime, nullable=True)
+
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        """String representation of the TxCircuit."""
+        return (
+            f"<TxCircuit(system={self.system}, "
+            f"state={self.state}, "
+            f"opened_at={self.opened_at})>"
+        )
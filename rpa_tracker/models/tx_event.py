@@ -1,5 +1,5 @@
 """SQLAlchemy model for transaction events."""
-from sqlalchemy import Column, String, DateTime, Integer
+from sqlalchemy import Column, String, DateTime, Index, Integer
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 
@@ -8,6 +8,12 @@ Base = declarative_base()
 
 class TxEvent(Base):
     __tablename__ = "RPA_TX_EVENT"
+    __table_args__ = (
+        # Audit trail of a stage, in attempt order
+        Index("IX_RPA_TX_EVENT_STAGE", "uuid", "system", "stage", "attempt"),
+        # Most recent attempts of a platform, for its circuit breaker
+        Index("IX_RPA_TX_EVENT_SYSTEM", "system", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
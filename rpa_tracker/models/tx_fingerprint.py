@@ -0,0 +1,34 @@
+"""SQLAlchemy model for hashed deduplication fingerprints."""
+from sqlalchemy import Column, String, DateTime, Index, Integer, LargeBinary
+from sqlalchemy.orm import declarative_base
+from datetime import datetime
+
+Base = declarative_base()
+
+
+class TxFingerprint(Base):
+    __tablename__ = "RPA_TX_FINGERPRINT"
+    __table_args__ = (
+        # One transaction per fingerprint: lookups are a single fixed-width
+        # index probe and a concurrent duplicate insert raises IntegrityError
+        Index("UX_RPA_TX_FINGERPRINT", "process_code", "version", "digest", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    process_code = Column(String(50), nullable=False)
+    version = Column(Integer, nullable=False)
+    # sha256 of the fingerprint
+    digest = Column(LargeBinary(32), nullable=False)
+
+    uuid = Column(String(36), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        """String representation of the TxFingerprint."""
+        return (
+            f"<TxFingerprint(process_code={self.process_code}, "
+            f"version={self.version}, "
+            f"digest={self.digest.hex() if self.digest else None}, "
+            f"uuid={self.uuid})>"
+        )
@@ -0,0 +1,26 @@
+"""SQLAlchemy model for per-platform dispatch limits."""
+from sqlalchemy import Column, String, DateTime, Float, Integer
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class TxLimiter(Base):
+    __tablename__ = "RPA_TX_LIMITER"
+
+    system = Column(String(50), primary_key=True)
+
+    # Token bucket of max_rate_per_minute
+    tokens = Column(Float, nullable=False)
+    refilled_at = Column(DateTime, nullable=False)
+
+    # Compare-and-set token; every admission bumps it
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        """String representation of the TxLimiter."""
+        return (
+            f"<TxLimiter(system={self.system}, "
+            f"tokens={self.tokens}, "
+            f"version={self.version})>"
+        )
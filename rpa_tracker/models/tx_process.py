@@ -1,5 +1,5 @@
 """SQLAlchemy model for transaction processes."""
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index, Integer
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 
@@ -8,6 +8,11 @@ Base = declarative_base()
 
 class TxProcess(Base):
     __tablename__ = "RPA_TX_PROCESS"
+    __table_args__ = (
+        Index("IX_RPA_TX_PROCESS_STATE", "state"),
+        # Reports filter on a created_at window and group by state
+        Index("IX_RPA_TX_PROCESS_CREATED", "created_at", "state"),
+    )
 
     uuid = Column(String(36), primary_key=True)
 
@@ -17,9 +22,19 @@ class TxProcess(Base):
     error_type = Column(String(20), nullable=True)
     error_description = Column(String(255), nullable=True)
 
+    # Stage counters maintained by the tracker; completion is a compare on
+    # them instead of a COUNT over RPA_TX_STAGE. failed_stages counts stages
+    # closed without completing (REJECTED, TERMINATED, CANCELLED).
+    total_stages = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_stages = Column(Integer, nullable=False, default=0, server_default="0")
+    failed_stages = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime, nullable=False, default=datetime.now)
     updated_at = Column(DateTime, nullable=False, default=datetime.now)
 
+    # Bumped by every tracker write; optimistic updates are conditioned on it
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
     def __repr__(self):
         """String representation of the TxProcess."""
         return (
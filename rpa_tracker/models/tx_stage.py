@@ -1,5 +1,5 @@
 """SQLAlchemy model for transaction stages."""
-from sqlalchemy import Column, String, DateTime, Integer
+from sqlalchemy import Column, String, DateTime, Index, Integer
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -7,6 +7,15 @@ Base = declarative_base()
 
 class TxStage(Base):
     __tablename__ = "RPA_TX_STAGE"
+    __table_args__ = (
+        # get_pending_stages / claim_pending_stages: equality on system and stage,
+        # IN on state, range on attempt; uuid makes the index covering for the join
+        Index("IX_RPA_TX_STAGE_PENDING", "system", "stage", "state", "attempt", "uuid"),
+        # Previous-platform check of the eligibility query, per transaction
+        Index("IX_RPA_TX_STAGE_PROGRESS", "uuid", "system", "state"),
+        # next_due_at: earliest retry of a system's waiting stages
+        Index("IX_RPA_TX_STAGE_DUE", "system", "stage", "state", "next_attempt_at"),
+    )
 
     uuid = Column(String(36), primary_key=True)
     system = Column(String(50), primary_key=True)
@@ -21,6 +30,13 @@ class TxStage(Base):
     error_type = Column(String(20), nullable=True)
     error_description = Column(String(255), nullable=True)
 
+    # Backoff of a TERMINATED stage; not eligible again before this time
+    next_attempt_at = Column(DateTime, nullable=True)
+
+    # Lease taken by claim_pending_stages; expired leases can be claimed again
+    claimed_by = Column(String(100), nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+
     def __repr__(self):
         """String representation of the TxStage."""
         return (
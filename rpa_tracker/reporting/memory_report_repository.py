@@ -0,0 +1,46 @@
+"""Report repository over the in-memory tracker backend."""
+from collections import Counter
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.tracking.memory_tracker import MemoryStore
+
+
+class InMemoryTransactionReportRepository:
+    """Same reports as ``TransactionReportRepository``, from a ``MemoryStore``."""
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def transactions_between(self, start: datetime, end: datetime) -> List[TxProcess]:
+        """Returns all transactions created in a time window."""
+        return [p for p in self.store.processes.values() if start <= p.created_at <= end]
+
+    def summary_by_state(self, start: datetime, end: datetime) -> List[Tuple[str, int]]:
+        """Returns count of transactions grouped by state."""
+        return list(Counter(p.state for p in self.transactions_between(start, end)).items())
+
+    def stage_summary_by_system(self, start: datetime, end: datetime) -> List[Tuple[str, str, int]]:
+        """Returns count of stages per system and state."""
+        counts = Counter((s.system, s.state) for s in self._stages_between(start, end))
+        return [(system, state, count) for (system, state), count in counts.items()]
+
+    def stage_summary_by_system_and_stage(
+        self,
+        start: datetime,
+        end: datetime,
+    ) -> List[Tuple[str, str, str, int]]:
+        """Return summary of stages by system, stage name, and state.
+
+        Returns:
+            List of tuples: (system, stage, state, count)
+        """
+        counts = Counter((s.system, s.stage, s.state) for s in self._stages_between(start, end))
+        return [(*key, count) for key, count in sorted(counts.items())]
+
+    def _stages_between(self, start: datetime, end: datetime) -> Iterator[TxStage]:
+        """Stages of the transactions created in the window."""
+        for process in self.transactions_between(start, end):
+            yield from self.store.stages.get(process.uuid, {}).values()
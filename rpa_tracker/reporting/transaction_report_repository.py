@@ -1,14 +1,26 @@
 """Repository for transaction reports."""
 from datetime import datetime
+from typing import Optional
 from sqlalchemy import func
 from sqlalchemy.orm import Session
+from rpa_tracker.instrumentation import Instrumentation
 from rpa_tracker.models.tx_process import TxProcess
 from rpa_tracker.models.tx_stage import TxStage
 
 
 class TransactionReportRepository:
-    def __init__(self, session: Session):
+    # Methods measured when an Instrumentation is given
+    INSTRUMENTED_METHODS = (
+        "transactions_between",
+        "summary_by_state",
+        "stage_summary_by_system",
+        "stage_summary_by_system_and_stage",
+    )
+
+    def __init__(self, session: Session, instrumentation: Optional[Instrumentation] = None):
         self.session = session
+        if instrumentation is not None:
+            instrumentation.instrument(self, self.INSTRUMENTED_METHODS, session.get_bind())
 
     def transactions_between(self, start: datetime, end: datetime) -> list[TxProcess]:
         """Returns all transactions created in a time window."""
@@ -0,0 +1,111 @@
+"""Circuit breaker rules for failing platforms.
+
+A platform's circuit is CLOSED while it works. When the share of system
+errors among its most recent attempts reaches ``failure_ratio`` it trips
+OPEN and no stage of the platform is dispatched. After ``open_seconds`` one
+worker gets a single probe stage (HALF_OPEN): a probe that does not fail
+with a system error closes the circuit, a failed probe opens it again.
+
+The functions here are pure; the trackers store the circuit and apply them.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from rpa_tracker.enums import CircuitState
+
+
+@dataclass(frozen=True)
+class CircuitBreakerPolicy:
+    """When a platform's circuit trips and how it recovers."""
+    window: int = 20  # most recent attempts of the platform considered
+    failure_ratio: float = 0.5
+    min_attempts: int = 10  # no trip before this many attempts in the window
+    open_seconds: float = 60.0
+    probe_seconds: float = 300.0  # a probe not finished by then is handed out again
+
+    def __post_init__(self):
+        """Validate the thresholds."""
+        if self.window < 1 or not 1 <= self.min_attempts <= self.window:
+            raise ValueError("min_attempts must be between 1 and window")
+        if not 0 < self.failure_ratio <= 1:
+            raise ValueError("failure_ratio must be in (0, 1]")
+
+    def trips(self, failures: Sequence[bool]) -> bool:
+        """Whether the recent attempts (True = system error) open the circuit."""
+        failures = failures[:self.window]
+        if len(failures) < self.min_attempts:
+            return False
+        return sum(failures) / len(failures) >= self.failure_ratio
+
+
+def after_attempt(state: str,
+                  failed: bool,
+                  trips: Callable[[], bool],
+                  now: datetime) -> Optional[Dict[str, Any]]:
+    """Return the circuit attributes to change after a stage finished, or None.
+
+    Args:
+        state: Current circuit state.
+        failed: Whether the stage finished with a system error.
+        trips: Called only for a failure on a CLOSED circuit; True when the
+            recent attempts reach the failure ratio.
+        now: Time of the attempt.
+    """
+    if state == CircuitState.HALF_OPEN.value:
+        return _opened(now) if failed else _closed(now)
+    if state == CircuitState.CLOSED.value and failed and trips():
+        return _opened(now)
+    return None
+
+
+def admission(state: str,
+              opened_at: Optional[datetime],
+              probe_until: Optional[datetime],
+              policy: CircuitBreakerPolicy,
+              now: datetime) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    """Decide how many stages of the platform may be dispatched now.
+
+    Returns:
+        ``(limit, changes)``: ``limit`` is None when the circuit does not
+        restrict dispatching, 0 when nothing may be dispatched and 1 for a
+        probe. ``changes`` are the circuit attributes to set to hand out that
+        probe; the caller must apply them atomically (only one worker wins).
+    """
+    if state == CircuitState.OPEN.value:
+        if opened_at + timedelta(seconds=policy.open_seconds) <= now:
+            return 1, _probing(policy, now)
+        return 0, None
+    if state == CircuitState.HALF_OPEN.value:
+        if probe_until is None or probe_until <= now:
+            return 1, _probing(policy, now)
+        return 0, None
+    return None, None
+
+
+def blocked_until(state: str,
+                  opened_at: Optional[datetime],
+                  probe_until: Optional[datetime],
+                  policy: CircuitBreakerPolicy) -> Optional[datetime]:
+    """Earliest time the circuit may hand out a stage again; None if not blocked."""
+    if state == CircuitState.OPEN.value:
+        return opened_at + timedelta(seconds=policy.open_seconds)
+    if state == CircuitState.HALF_OPEN.value:
+        return probe_until
+    return None
+
+
+def _opened(now: datetime) -> Dict[str, Any]:
+    return {"state": CircuitState.OPEN.value, "opened_at": now, "probe_until": None, "updated_at": now}
+
+
+def _closed(now: datetime) -> Dict[str, Any]:
+    return {"state": CircuitState.CLOSED.value, "opened_at": None, "probe_until": None, "updated_at": now}
+
+
+def _probing(policy: CircuitBreakerPolicy, now: datetime) -> Dict[str, Any]:
+    return {
+        "state": CircuitState.HALF_OPEN.value,
+        "probe_until": now + timedelta(seconds=policy.probe_seconds),
+        "updated_at": now,
+    }
@@ -1,9 +1,60 @@
 """Defines retry policies for different platforms."""
+import random
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Optional
 
 
 @dataclass(frozen=True)
 class RetryPolicy:
-    """Defines retry behavior for a platform."""
+    """Defines retry behavior for a platform.
+
+    A TERMINATED stage is retried after ``base_delay_seconds *
+    multiplier ** (attempt - 1)`` seconds, capped at ``max_delay_seconds``.
+    ``jitter`` spreads each delay randomly by up to that fraction either
+    way, so robots failing together do not retry together. With the default
+    ``base_delay_seconds=0`` a failed stage is due again on the next poll.
+    """
     max_attempts: Optional[int] = None  # None = unlimited
+    base_delay_seconds: float = 0.0
+    multiplier: float = 2.0
+    max_delay_seconds: Optional[float] = None  # None = no cap
+    jitter: float = 0.0
+
+    def __post_init__(self):
+        """Validate the backoff settings."""
+        if self.base_delay_seconds < 0:
+            raise ValueError("base_delay_seconds must not be negative")
+        if self.multiplier < 1:
+            raise ValueError("multiplier must be at least 1")
+        if self.max_delay_seconds is not None and self.max_delay_seconds < 0:
+            raise ValueError("max_delay_seconds must not be negative")
+        if not 0 <= self.jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+
+    @property
+    def backs_off(self) -> bool:
+        """Whether failed stages wait before being retried."""
+        return self.base_delay_seconds > 0
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after the ``attempt``-th failed attempt (1-based)."""
+        if not self.backs_off:
+            return 0.0
+        delay = self.base_delay_seconds * self.multiplier ** max(attempt - 1, 0)
+        if self.max_delay_seconds is not None:
+            delay = min(delay, self.max_delay_seconds)
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            if self.max_delay_seconds is not None:
+                delay = min(delay, self.max_delay_seconds)
+        return delay
+
+    def next_attempt_at(self, attempt: int, now: Optional[datetime] = None) -> Optional[datetime]:
+        """When a stage that just failed its ``attempt``-th attempt is due again.
+
+        None when the policy does not back off.
+        """
+        if not self.backs_off:
+            return None
+        return (now or datetime.now()) + timedelta(seconds=self.delay(attempt))
@@ -0,0 +1,45 @@
+"""Token bucket rules for per-platform rate limits and concurrency caps.
+
+A platform with ``max_rate_per_minute`` owns a bucket holding up to that many
+tokens (one minute of burst), refilled continuously at the same rate. Each
+dispatched stage takes one token. ``max_concurrency`` caps the stages of the
+platform leased at the same time.
+
+The functions here are pure; the trackers store the bucket and apply them.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+def capacity(rate_per_minute: float) -> float:
+    """Size of the bucket: one minute of dispatches, at least one token."""
+    return max(1.0, float(rate_per_minute))
+
+
+def refill(tokens: float, refilled_at: datetime, rate_per_minute: float, now: datetime) -> float:
+    """Tokens in the bucket at ``now``."""
+    elapsed = max(0.0, (now - refilled_at).total_seconds())
+    return min(capacity(rate_per_minute), tokens + elapsed * rate_per_minute / 60)
+
+
+def allowance(tokens: Optional[float], max_concurrency: Optional[int], in_flight: int) -> Optional[int]:
+    """Stages that may be dispatched now; None when nothing limits them.
+
+    Args:
+        tokens: Tokens in the bucket, or None without a rate limit.
+        max_concurrency: Concurrency cap, or None.
+        in_flight: Stages of the platform currently leased.
+    """
+    limits = []
+    if tokens is not None:
+        limits.append(math.floor(tokens))
+    if max_concurrency is not None:
+        limits.append(max_concurrency - in_flight)
+    return max(0, min(limits)) if limits else None
+
+
+def next_token_at(tokens: float, rate_per_minute: float, now: datetime) -> datetime:
+    """When the bucket holds a whole token again."""
+    missing = max(0.0, 1 - tokens)
+    return now + timedelta(seconds=missing * 60 / rate_per_minute)
@@ -0,0 +1,256 @@
+"""Parallel runner that executes registered stage handlers per platform."""
+import pickle
+import uuid as uuid_lib
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.constants import DEFAULT_STAGE
+from rpa_tracker.domain.execution_result import AnyExecutionResult, ExecutionResult, FastExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+
+@dataclass(frozen=True)
+class StageJob:
+    """A stage handed to a handler."""
+    uuid: str
+    system: str
+    stage: str
+    attempt: int
+
+
+# handler(job, session) -> ExecutionResult; session is the worker's own session
+StageHandler = Callable[[StageJob, Session], ExecutionResult]
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Worker pool of a platform."""
+    max_workers: int = 4
+    kind: str = "thread"  # "thread" or "process"
+
+
+@dataclass
+class RunSummary:
+    """Outcome of ``PlatformRunner.run``."""
+    processed: int = 0
+    by_state: Dict[str, int] = field(default_factory=Counter)
+    skipped: int = 0  # already processed by another worker
+
+
+class WorkerSessionFactory:
+    """Picklable session factory for process pools.
+
+    A ``sessionmaker`` bound to an engine cannot be pickled, so it cannot be
+    sent to a worker process. This factory only holds the database URL and
+    engine options; each process creates its own engine on first use.
+
+    Example:
+        runner = PlatformRunner(Session, default_pool=PoolConfig(kind="process"),
+                                worker_session_factory=WorkerSessionFactory("sqlite:///tracker.db"))
+    """
+
+    def __init__(self, url: str, **engine_options: Any):
+        """Create a factory for ``create_engine(url, **engine_options)``."""
+        self.url = url
+        self.engine_options = engine_options
+        self._sessionmaker: Optional[sessionmaker] = None
+
+    def __call__(self) -> Session:
+        """New session on this process' engine."""
+        if self._sessionmaker is None:
+            self._sessionmaker = sessionmaker(bind=create_engine(self.url, **self.engine_options))
+        return self._sessionmaker()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the URL and options only, never the engine."""
+        return {"url": self.url, "engine_options": self.engine_options, "_sessionmaker": None}
+
+
+def _execute(handler: StageHandler,
+             job: StageJob,
+             session_factory: Callable[[], Session]) -> ExecutionResult:
+    """Run one handler in a worker, with its own session."""
+    session = session_factory()
+    try:
+        return handler(job, session)
+    finally:
+        session.close()
+
+
+class PlatformRunner:
+    """Executes eligible stages through a worker pool per platform.
+
+    Handlers are registered per (system, stage). On ``run`` the coordinator
+    claims eligible stages with ``claim_pending_stages`` as long as the
+    platform's pool has free workers, and writes the results back with
+    ``complete_stages`` as soon as workers finish. Downstream platforms are
+    therefore dispatched as soon as their upstream stages complete, without
+    waiting for a whole platform pass.
+
+    Each ``run`` is one pass: stages that end TERMINATED are not retried in
+    the same pass. Handler exceptions are recorded as system errors.
+
+    Example:
+        runner = PlatformRunner(Session, pools={"A": PoolConfig(max_workers=8)})
+
+        @runner.handler("A", "validar")
+        def validar(job, session):
+            return ExecutionResult(error_code=0)
+
+        summary = runner.run()
+    """
+
+    def __init__(self,
+                 session_factory: Callable[[], Session],
+                 pools: Optional[Dict[str, PoolConfig]] = None,
+                 default_pool: PoolConfig = PoolConfig(),
+                 worker_session_factory: Optional[Callable[[], Session]] = None,
+                 worker_id: Optional[str] = None,
+                 lease_seconds: int = 300):
+        """Create a runner.
+
+        Args:
+            session_factory: Creates the coordinator session.
+            pools: Pool configuration per platform code.
+            default_pool: Pool of platforms not listed in ``pools``.
+            worker_session_factory: Creates the session passed to each handler
+                call; defaults to ``session_factory``. Must be picklable when
+                a pool is a process pool, e.g. ``WorkerSessionFactory``.
+            worker_id: Lease owner name; defaults to a random id.
+            lease_seconds: Lease of claimed stages, must exceed handler runtime.
+
+        Raises:
+            ValueError: If a pool is a process pool and the worker session
+                factory cannot be pickled.
+        """
+        self.session_factory = session_factory
+        self.pools = dict(pools or {})
+        self.default_pool = default_pool
+        self.worker_session_factory = worker_session_factory or session_factory
+        if any(pool.kind == "process" for pool in (default_pool, *self.pools.values())):
+            try:
+                pickle.dumps(self.worker_session_factory)
+            except Exception as exc:
+                raise ValueError(
+                    "worker_session_factory must be picklable for process pools, "
+                    "e.g. WorkerSessionFactory(url)"
+                ) from exc
+        self.worker_id = worker_id or f"runner-{uuid_lib.uuid4()}"
+        self.lease_seconds = lease_seconds
+        self._handlers: Dict[Tuple[str, str], StageHandler] = {}
+
+    def register(self, system: str, stage: str, handler: StageHandler) -> None:
+        """Register the handler of a (system, stage)."""
+        self._handlers[(system, stage)] = handler
+
+    def handler(self, system: str, stage: str = DEFAULT_STAGE):
+        """Decorator version of ``register``."""
+        def decorator(handler: StageHandler) -> StageHandler:
+            self.register(system, stage, handler)
+            return handler
+        return decorator
+
+    def run(self) -> RunSummary:
+        """Run until no registered stage is eligible and no worker is busy."""
+        session = self.session_factory()
+        tracker = SqlTransactionTracker(session)
+        executors = {system: self._executor(system) for system, _ in self._handlers}
+
+        in_flight: Dict[Future, StageJob] = {}
+        busy: Counter = Counter()
+        failed: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        summary = RunSummary()
+
+        try:
+            while True:
+                self._dispatch(tracker, executors, in_flight, busy, failed)
+                if not in_flight:
+                    break
+
+                done = list(wait(list(in_flight), return_when=FIRST_COMPLETED).done)
+                jobs = [in_flight.pop(future) for future in done]
+                results = [self._result_of(future) for future in done]
+                for job in jobs:
+                    busy[job.system] -= 1
+
+                outcomes = tracker.complete_stages(
+                    (job.uuid, job.system, job.stage, result)
+                    for job, result in zip(jobs, results)
+                )
+
+                for job, outcome in zip(jobs, outcomes):
+                    summary.processed += 1
+                    if outcome is None:
+                        summary.skipped += 1
+                        continue
+                    summary.by_state[outcome[0]] += 1
+                    if outcome[0] == TransactionState.TERMINATED.value:
+                        failed[(job.system, job.stage)].add(job.uuid)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+            session.close()
+
+        return summary
+
+    def _dispatch(self, tracker, executors, in_flight, busy, failed) -> None:
+        """Claim and submit eligible stages while pools have free workers."""
+        for system, stage in self._ordered_handlers():
+            capacity = self._pool(system).max_workers - busy[system]
+            if capacity <= 0:
+                continue
+
+            claimed = tracker.claim_pending_stages(
+                system,
+                stage,
+                self.worker_id,
+                limit=capacity,
+                lease_seconds=self.lease_seconds,
+                exclude_uuids=failed[(system, stage)],
+            )
+            for stage_obj in claimed:
+                job = StageJob(stage_obj.uuid, system, stage, stage_obj.attempt)
+                future = executors[system].submit(
+                    _execute,
+                    self._handlers[(system, stage)],
+                    job,
+                    self.worker_session_factory,
+                )
+                in_flight[future] = job
+                busy[system] += 1
+
+    def _ordered_handlers(self) -> List[Tuple[str, str]]:
+        """Registered (system, stage) pairs in flow order."""
+        position = {platform.code: i for i, platform in enumerate(PlatformRegistry.snapshot().platforms)}
+        return sorted(self._handlers, key=lambda key: position.get(key[0], -1))
+
+    def _pool(self, system: str) -> PoolConfig:
+        """Pool configuration of ``system``."""
+        return self.pools.get(system, self.default_pool)
+
+    def _executor(self, system: str) -> Executor:
+        """Create the executor of ``system``."""
+        pool = self._pool(system)
+        if pool.kind == "process":
+            return ProcessPoolExecutor(max_workers=pool.max_workers)
+        if pool.kind == "thread":
+            return ThreadPoolExecutor(max_workers=pool.max_workers, thread_name_prefix=f"rpa-{system}")
+        raise ValueError(f"Unknown pool kind: {pool.kind}")
+
+    @staticmethod
+    def _result_of(future: Future) -> AnyExecutionResult:
+        """Handler result; exceptions become system errors."""
+        try:
+            return future.result()
+        except Exception as exc:
+            description = f"{type(exc).__name__}: {exc}"[:255]
+            return FastExecutionResult.of(-1, description)
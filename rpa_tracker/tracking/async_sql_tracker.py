@@ -0,0 +1,291 @@
+"""Asyncio implementation of the SQL tracker on SQLAlchemy ``AsyncSession``.
+
+Every database operation runs the synchronous ``SqlTransactionTracker`` code
+through ``AsyncSession.run_sync``, so both trackers share the same queries and
+state-transition rules. Intake with a synchronous deduplication strategy is
+delegated as well; only the calls of async strategies are driven from here.
+
+Requires the SQLAlchemy asyncio extra (``greenlet``) and an async driver such
+as ``aiosqlite`` or ``asyncpg``. Create the session with
+``expire_on_commit=False`` so returned stages can be read after a commit
+without lazy loads.
+"""
+import inspect
+import sys
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Collection, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from rpa_tracker.constants import DEFAULT_STAGE
+from rpa_tracker.domain.execution_result import AnyExecutionResult
+from rpa_tracker.enums import ErrorType, TransactionState
+from rpa_tracker.instrumentation import Instrumentation
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.tracking.deduplication.base import (
+    AsyncDeduplicationStrategy,
+    DeduplicationStrategy,
+    invalidate_fingerprints,
+)
+from rpa_tracker.tracking.intake import IntakeBatch
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+from rpa_tracker.tracking.unit_of_work import UnitOfWork
+
+StageResult = Optional[Tuple[str, Optional[str], Optional[str]]]
+AnyDeduplicationStrategy = Union[DeduplicationStrategy, AsyncDeduplicationStrategy]
+
+_EXHAUSTED = object()
+
+
+async def _maybe_await(value):
+    """Await ``value`` if the strategy returned a coroutine."""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def _is_async(dedup) -> bool:
+    """Whether the strategy looks fingerprints up with a coroutine."""
+    return inspect.iscoroutinefunction(dedup.find_existing_uuid)
+
+
+class AsyncSqlTransactionTracker:
+    """Asyncio counterpart of ``SqlTransactionTracker``.
+
+    Exposes the same public methods as coroutines (and ``batch`` as an async
+    context manager). Each call delegates to a wrapped ``SqlTransactionTracker``
+    bound to ``session.sync_session``, so commit modes, locking and counters
+    behave exactly as in the sync tracker.
+    """
+
+    def __init__(self,
+                 session: AsyncSession,
+                 materialize_on_start: bool = False,
+                 autocommit: bool = True,
+                 instrumentation: Optional[Instrumentation] = None,
+                 optimistic_locking: bool = False,
+                 deduplication: Optional[Mapping[str, AnyDeduplicationStrategy]] = None):
+        """Create a tracker bound to ``session``.
+
+        Args:
+            session: SQLAlchemy ``AsyncSession`` used for every statement.
+            materialize_on_start: See ``SqlTransactionTracker``.
+            autocommit: See ``SqlTransactionTracker``.
+            instrumentation: See ``SqlTransactionTracker``; records the
+                methods of the wrapped sync tracker.
+            optimistic_locking: See ``SqlTransactionTracker``.
+            deduplication: See ``SqlTransactionTracker``; strategies may be
+                synchronous or async.
+        """
+        self.session = session
+        self.sync_tracker = SqlTransactionTracker(
+            session.sync_session,
+            materialize_on_start=materialize_on_start,
+            autocommit=autocommit,
+            instrumentation=instrumentation,
+            optimistic_locking=optimistic_locking,
+            deduplication=deduplication,
+        )
+
+    async def _run(self, method: str, *args, **kwargs):
+        """Run a method of the sync tracker without blocking the event loop."""
+        bound = getattr(self.sync_tracker, method)
+        return await self.session.run_sync(lambda _: bound(*args, **kwargs))
+
+    @asynccontextmanager
+    async def batch(self,
+                    commit_every: Optional[int] = 500,
+                    commit_interval: Optional[float] = None) -> AsyncIterator[UnitOfWork]:
+        """Async version of ``SqlTransactionTracker.batch``."""
+        context = self.sync_tracker.batch(commit_every, commit_interval)
+        unit_of_work = context.__enter__()
+        try:
+            yield unit_of_work
+        except BaseException:
+            exc_info = sys.exc_info()
+            await self.session.run_sync(lambda _: context.__exit__(*exc_info))
+            raise
+        else:
+            await self.session.run_sync(lambda _: context.__exit__(None, None, None))
+
+    @asynccontextmanager
+    async def _atomic(self) -> AsyncIterator[None]:
+        """Async version of ``SqlTransactionTracker._atomic``."""
+        if self.sync_tracker._defers_commit:
+            async with self.session.begin_nested():
+                yield
+        else:
+            yield
+
+    async def start_or_resume(self,
+                              process_code: str,
+                              payload: Any) -> Tuple[str, bool]:
+        """Returns (uuid, is_new_transaction).
+
+        Synchronous strategies go through ``SqlTransactionTracker.start_or_resume``,
+        including its ``reserve_fingerprint`` path.
+        """
+        dedup = self.sync_tracker._deduplication(process_code)
+        if not _is_async(dedup):
+            return await self._run("start_or_resume", process_code, payload)
+        fingerprint = dedup.calculate_fingerprint(payload)
+
+        existing = await _maybe_await(dedup.find_existing_uuid(fingerprint))
+        if existing:
+            return existing, False
+
+        uuid_tx = str(uuid.uuid4())
+
+        try:
+            async with self._atomic():
+                await self._run("_add_process", process_code, uuid_tx)
+                await _maybe_await(dedup.persist_data(uuid_tx, payload))
+                await self.session.flush()
+            await self._run("_commit")
+            return uuid_tx, True
+        except IntegrityError:
+            await self._run("_recover")
+            invalidate_fingerprints(dedup, [fingerprint])
+            return await _maybe_await(dedup.find_existing_uuid(fingerprint)), False
+
+    async def start_or_resume_many(self,
+                                   process_code: str,
+                                   payloads: Iterable[Any],
+                                   chunk_size: int = 1000) -> List[Tuple[str, bool]]:
+        """Async version of ``SqlTransactionTracker.start_or_resume_many``."""
+        dedup = self.sync_tracker._deduplication(process_code)
+        if not _is_async(dedup):
+            return await self._run("start_or_resume_many", process_code, list(payloads), chunk_size)
+        payloads = list(payloads)
+        batch = IntakeBatch(payloads, [dedup.calculate_fingerprint(p) for p in payloads])
+
+        for indexes in batch.chunks(chunk_size):
+            lookup = batch.lookup(indexes)
+            existing = await self._resolve_existing_uuids(dedup, lookup) if lookup else {}
+            new_items = batch.assign(indexes, existing, lambda: str(uuid.uuid4()))
+
+            if new_items:
+                try:
+                    async with self._atomic():
+                        await self._run("_add_processes", process_code, [uuid_tx for uuid_tx, _ in new_items])
+                        await self._persist_all(dedup, new_items)
+                        await self.session.flush()
+                    await self._run("_commit")
+                except IntegrityError:
+                    await self._run("_recover")
+                    invalidate_fingerprints(dedup, [batch.fingerprints[i] for i in indexes])
+                    batch.discard(indexes)
+                    for i in indexes:
+                        batch.replayed(i, *await self.start_or_resume(process_code, payloads[i]))
+                    continue
+
+            batch.accept()
+
+        return batch.results
+
+    @staticmethod
+    async def _resolve_existing_uuids(dedup, fingerprints: Sequence[str]) -> Dict[str, str]:
+        hook = getattr(dedup, "find_existing_uuids", None)
+        if hook is not None:
+            return await _maybe_await(hook(fingerprints))
+
+        found = {}
+        for fingerprint in fingerprints:
+            existing = await _maybe_await(dedup.find_existing_uuid(fingerprint))
+            if existing:
+                found[fingerprint] = existing
+        return found
+
+    @staticmethod
+    async def _persist_all(dedup, items: Sequence[Tuple[str, Any]]) -> None:
+        hook = getattr(dedup, "persist_many", None)
+        if hook is not None:
+            await _maybe_await(hook(items))
+            return
+
+        for uuid_tx, payload in items:
+            await _maybe_await(dedup.persist_data(uuid_tx, payload))
+
+    async def start_stage(self, uuid: str, system: str, stage: str = DEFAULT_STAGE) -> None:
+        """Registers the start of a stage for a transaction."""
+        await self._run("start_stage", uuid, system, stage)
+
+    async def materialize_plan(self, uuids: Union[str, Iterable[str]]) -> None:
+        """Create every stage of the catalog for one or many transactions."""
+        await self._run("materialize_plan", uuids)
+
+    async def repair_stage_counters(self, uuids: Optional[Iterable[str]] = None) -> int:
+        """Recompute the stage counters of ``TxProcess`` from ``RPA_TX_STAGE``."""
+        return await self._run("repair_stage_counters", None if uuids is None else list(uuids))
+
+    async def log_event(self,
+                        uuid: str,
+                        system: str,
+                        error_code: int,
+                        description: Optional[str],
+                        stage: str = DEFAULT_STAGE) -> None:
+        """Logs an event for a transaction stage."""
+        await self._run("log_event", uuid, system, error_code, description, stage)
+
+    async def finish_stage(self,
+                           uuid: str,
+                           system: str,
+                           state: TransactionState,
+                           error_type: Optional[ErrorType] = None,
+                           description: Optional[str] = None,
+                           stage: str = DEFAULT_STAGE) -> StageResult:
+        """Finish a stage and update process state accordingly."""
+        return await self._run("finish_stage", uuid, system, state, error_type, description, stage)
+
+    async def complete_stage(self,
+                             uuid: str,
+                             system: str,
+                             result: AnyExecutionResult,
+                             stage: str = DEFAULT_STAGE,
+                             auto_commit: bool = False) -> StageResult:
+        """Complete a stage by logging event and finishing it."""
+        return await self._run("complete_stage", uuid, system, result, stage, auto_commit)
+
+    async def complete_stages(self,
+                              items: Iterable[Tuple[str, str, str, AnyExecutionResult]]) -> List[StageResult]:
+        """Complete many stages in one database transaction."""
+        return await self._run("complete_stages", list(items))
+
+    async def get_executable_stages(self, uuid: str) -> List[TxStage]:
+        """Returns stages that can be executed (PENDING or REJECTED)."""
+        return await self._run("get_executable_stages", uuid)
+
+    async def get_pending_stages(self, system: str, stage: str = DEFAULT_STAGE) -> List[TxStage]:
+        """Returns stages that are eligible for execution for a given system."""
+        return await self._run("get_pending_stages", system, stage)
+
+    async def next_due_at(self, system: str, stage: str = DEFAULT_STAGE) -> Optional[datetime]:
+        """When the next stage of ``system`` becomes eligible."""
+        return await self._run("next_due_at", system, stage)
+
+    async def iter_pending_stages(self,
+                                  system: str,
+                                  stage: str = DEFAULT_STAGE,
+                                  page_size: int = 1000) -> AsyncIterator[TxStage]:
+        """Stream the eligible stages page by page, see ``SqlTransactionTracker``."""
+        stages = self.sync_tracker.iter_pending_stages(system, stage, page_size)
+        while True:
+            stage_obj = await self.session.run_sync(lambda _: next(stages, _EXHAUSTED))
+            if stage_obj is _EXHAUSTED:
+                return
+            yield stage_obj
+
+    async def claim_pending_stages(self,
+                                   system: str,
+                                   stage: str,
+                                   worker_id: str,
+                                   limit: int = 100,
+                                   lease_seconds: int = 300,
+                                   exclude_uuids: Collection[str] = ()) -> List[TxStage]:
+        """Atomically lease up to ``limit`` eligible stages for ``worker_id``."""
+        return await self._run(
+            "claim_pending_stages", system, stage, worker_id, limit, lease_seconds, exclude_uuids
+        )
@@ -0,0 +1,79 @@
+"""Circuit breaker state shared by every worker through RPA_TX_CIRCUIT."""
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from rpa_tracker.enums import CircuitState
+from rpa_tracker.models.tx_circuit import TxCircuit
+from rpa_tracker.models.tx_event import TxEvent
+from rpa_tracker.retry.circuit_breaker import CircuitBreakerPolicy, admission, after_attempt, blocked_until
+from rpa_tracker.tracking.sql_dialect import insert_ignore
+
+
+class SqlCircuitBreaker:
+    """Reads and updates the circuit of each platform in the tracker's session.
+
+    The failure ratio is computed from the most recent ``TxEvent`` rows of
+    the platform (error code < 0 is a system error), so every worker sees
+    the same window. Handing out the half-open probe is a compare-and-set
+    on ``updated_at``: only one worker wins it.
+
+    The caller commits.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def admit(self, system: str, policy: CircuitBreakerPolicy, now: datetime) -> Optional[int]:
+        """How many stages of ``system`` may be dispatched now (None = no limit)."""
+        circuit = self._read(system)
+        if circuit is None:
+            return None
+
+        limit, changes = admission(circuit.state, circuit.opened_at, circuit.probe_until, policy, now)
+        if changes:
+            won = (
+                self.session.query(TxCircuit)
+                .filter(TxCircuit.system == system, TxCircuit.updated_at == circuit.updated_at)
+                .update(changes, synchronize_session=False)
+            )
+            return limit if won else 0
+        return limit
+
+    def record(self, system: str, policy: CircuitBreakerPolicy, failed: bool, now: datetime) -> None:
+        """Apply the outcome of a finished stage of ``system`` to its circuit."""
+        circuit = self._read(system)
+        state = circuit.state if circuit is not None else CircuitState.CLOSED.value
+
+        changes = after_attempt(state, failed, lambda: policy.trips(self._recent_failures(system, policy.window)), now)
+        if changes is None:
+            return
+
+        if circuit is None:
+            insert_ignore(self.session, TxCircuit, [{"system": system, **changes}])
+        self.session.query(TxCircuit).filter(TxCircuit.system == system).update(changes, synchronize_session=False)
+
+    def blocked_until(self, system: str, policy: CircuitBreakerPolicy) -> Optional[datetime]:
+        """Earliest time the circuit of ``system`` hands out a stage again."""
+        circuit = self._read(system)
+        if circuit is None:
+            return None
+        return blocked_until(circuit.state, circuit.opened_at, circuit.probe_until, policy)
+
+    def _read(self, system: str):
+        return self.session.execute(
+            select(TxCircuit.state, TxCircuit.opened_at, TxCircuit.probe_until, TxCircuit.updated_at)
+            .where(TxCircuit.system == system)
+        ).first()
+
+    def _recent_failures(self, system: str, window: int) -> List[bool]:
+        """System-error flags of the last ``window`` attempts of ``system``, newest first."""
+        codes = self.session.execute(
+            select(TxEvent.error_code)
+            .where(TxEvent.system == system)
+            .order_by(TxEvent.id.desc())
+            .limit(window)
+        ).scalars()
+        return [code < 0 for code in codes]
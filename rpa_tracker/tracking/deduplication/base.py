@@ -1,11 +1,16 @@
 """Base class for deduplication strategies."""
 from abc import abstractmethod
-from typing import Any, Optional, Protocol
+from typing import Any, Dict, Iterable, Optional, Protocol, Sequence, Tuple
 
 
 class DeduplicationStrategy(Protocol):
     version: int
 
+    # True when storing a fingerprint twice fails, e.g. under a unique index.
+    # Lets a cache answer "new" without asking the strategy; see
+    # ``CachedDeduplication``.
+    enforces_uniqueness: bool = False
+
     @abstractmethod
     def calculate_fingerprint(self, payload: Any) -> str:
         """Calculate a unique fingerprint for the given data."""
@@ -20,3 +25,92 @@ class DeduplicationStrategy(Protocol):
     def persist_data(self, uuid: str, payload: Any) -> None:
         """Persist deduplication data."""
         ...
+
+    def find_existing_uuids(self, fingerprints: Sequence[str]) -> Dict[str, str]:
+        """Find the existing UUIDs for many fingerprints at once.
+
+        Optional batch hook. Returns a mapping fingerprint -> uuid that only
+        contains the fingerprints already known. The default implementation
+        falls back to ``find_existing_uuid`` once per fingerprint.
+        """
+        return _find_each(self, fingerprints)
+
+    def persist_many(self, items: Sequence[Tuple[str, Any]]) -> None:
+        """Persist deduplication data for many (uuid, payload) pairs.
+
+        Optional batch hook. The default implementation falls back to
+        ``persist_data`` once per item.
+        """
+        _persist_each(self, items)
+
+
+class AsyncDeduplicationStrategy(Protocol):
+    """Deduplication strategy for ``AsyncSqlTransactionTracker``.
+
+    Same contract as ``DeduplicationStrategy`` with awaitable lookups and
+    writes. The fingerprint is computed in memory and stays synchronous.
+    The async tracker also accepts plain ``DeduplicationStrategy`` objects.
+    """
+    version: int
+
+    @abstractmethod
+    def calculate_fingerprint(self, payload: Any) -> str:
+        """Calculate a unique fingerprint for the given data."""
+        ...
+
+    @abstractmethod
+    async def find_existing_uuid(self, fingerprint: str) -> Optional[str]:
+        """Find an existing UUID for the given fingerprint."""
+        ...
+
+    @abstractmethod
+    async def persist_data(self, uuid: str, payload: Any) -> None:
+        """Persist deduplication data."""
+        ...
+
+
+def resolve_existing_uuids(strategy: DeduplicationStrategy,
+                           fingerprints: Sequence[str]) -> Dict[str, str]:
+    """Resolve many fingerprints, using the batch hook when the strategy has one."""
+    hook = getattr(strategy, "find_existing_uuids", None)
+    if hook is not None:
+        return hook(fingerprints)
+    return _find_each(strategy, fingerprints)
+
+
+def persist_all(strategy: DeduplicationStrategy, items: Sequence[Tuple[str, Any]]) -> None:
+    """Persist many items, using the batch hook when the strategy has one."""
+    hook = getattr(strategy, "persist_many", None)
+    if hook is not None:
+        hook(items)
+    else:
+        _persist_each(strategy, items)
+
+
+def enforces_uniqueness(strategy: DeduplicationStrategy) -> bool:
+    """Whether ``strategy`` declares that a fingerprint cannot be stored twice."""
+    return bool(getattr(strategy, "enforces_uniqueness", False))
+
+
+def invalidate_fingerprints(strategy: DeduplicationStrategy, fingerprints: Sequence[str]) -> None:
+    """Tell a caching strategy that an insert of ``fingerprints`` lost a race.
+
+    Strategies without the optional ``invalidate`` hook are left untouched.
+    """
+    hook = getattr(strategy, "invalidate", None)
+    if hook is not None:
+        hook(fingerprints)
+
+
+def _find_each(strategy: DeduplicationStrategy, fingerprints: Iterable[str]) -> Dict[str, str]:
+    found = {}
+    for fingerprint in fingerprints:
+        existing = strategy.find_existing_uuid(fingerprint)
+        if existing:
+            found[fingerprint] = existing
+    return found
+
+
+def _persist_each(strategy: DeduplicationStrategy, items: Iterable[Tuple[str, Any]]) -> None:
+    for uuid, payload in items:
+        strategy.persist_data(uuid, payload)
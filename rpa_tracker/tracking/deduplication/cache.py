@@ -0,0 +1,296 @@
+"""Lookup cache in front of a deduplication strategy.
+
+``CachedDeduplication`` wraps any ``DeduplicationStrategy`` and answers
+``find_existing_uuid`` from memory when it can:
+
+- an LRU of fingerprint -> uuid for fingerprints already confirmed by the
+  strategy (positives);
+- once warmed, a Bloom filter of every known fingerprint: a fingerprint that
+  is not in the filter is treated as new, so the strategy is not queried
+  (negatives).
+
+Only lookups confirmed by the strategy enter the LRU. ``persist_data`` only
+adds the fingerprint to the filter, because the write may still be rolled
+back; the next lookup of that fingerprint goes to the strategy once.
+
+The filter is filled once per process and then only learns the fingerprints
+written through this process, so with several workers it goes stale.
+Negative answers are therefore only given when the strategy declares
+``enforces_uniqueness`` (its fingerprints sit under a unique constraint, like
+``HashedFingerprintDeduplication``): when another worker stored the same
+fingerprint, the insert fails with ``IntegrityError`` and the tracker calls
+``invalidate``, or ``reserve_fingerprint`` returns the other worker's uuid.
+For any other strategy every lookup the LRU cannot answer goes to the
+strategy, since a wrong "new" would create a duplicate transaction.
+
+The strategy's ``reserve_fingerprint`` hook is passed through when it has one.
+
+Example:
+    cached = DeduplicationRegistry.enable_cache("MY_PROCESS", max_entries=50_000)
+    cached.warm()  # needs the strategy's ``iter_fingerprints`` hook
+    ...
+    print(cached.stats())
+"""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from rpa_tracker.tracking.deduplication.base import (
+    DeduplicationStrategy,
+    enforces_uniqueness,
+    persist_all,
+    resolve_existing_uuids,
+)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings (no false negatives)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """Size the filter for ``capacity`` items at ``error_rate`` false positives.
+
+        Raises:
+            ValueError: If ``capacity`` is not positive or ``error_rate`` is not in (0, 1).
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item: str) -> None:
+        """Add ``item`` to the filter."""
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        """False if ``item`` was certainly never added."""
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def clear(self) -> None:
+        """Remove every item."""
+        self._bits = bytearray(len(self._bits))
+
+    def _positions(self, item: str):
+        # Double hashing: h1 + i * h2 over one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+
+@dataclass(frozen=True)
+class DeduplicationCacheStats:
+    """Counters of a ``CachedDeduplication``.
+
+    Attributes:
+        hits: Lookups answered by the LRU.
+        negative_hits: Lookups answered "new" by the Bloom filter; always 0
+            unless the strategy enforces uniqueness.
+        misses: Lookups sent to the wrapped strategy.
+        invalidations: Fingerprints invalidated after a lost insert race.
+        evictions: Entries dropped from the LRU to respect ``max_entries``.
+        size: Current number of LRU entries.
+    """
+    hits: int
+    negative_hits: int
+    misses: int
+    invalidations: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups answered without the strategy."""
+        lookups = self.hits + self.negative_hits + self.misses
+        return (self.hits + self.negative_hits) / lookups if lookups else 0.0
+
+
+class CachedDeduplication:
+
+    def __init__(self,
+                 strategy: DeduplicationStrategy,
+                 max_entries: int = 10_000,
+                 expected_fingerprints: int = 1_000_000,
+                 error_rate: float = 0.01):
+        """Wrap ``strategy`` with a positive LRU and a negative Bloom filter.
+
+        Args:
+            strategy: Deduplication strategy doing the real lookups and writes.
+            max_entries: Maximum fingerprints kept in the LRU.
+            expected_fingerprints: Fingerprints the Bloom filter is sized for;
+                beyond that its false-positive rate (lookups that still reach
+                the strategy) grows.
+            error_rate: Target false-positive rate of the Bloom filter.
+        """
+        self.strategy = strategy
+        self.max_entries = max_entries
+        self.bloom = BloomFilter(expected_fingerprints, error_rate)
+        self.warmed = False
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._negative_hits = self._misses = self._invalidations = self._evictions = 0
+        if hasattr(strategy, "reserve_fingerprint"):
+            # Optional hook: only expose it when the strategy has it, so the
+            # tracker keeps choosing the same intake path as without the cache
+            self.reserve_fingerprint = self._reserve_fingerprint
+
+    @property
+    def version(self) -> int:
+        """Version of the wrapped strategy."""
+        return self.strategy.version
+
+    @property
+    def enforces_uniqueness(self) -> bool:
+        """Whether the wrapped strategy enforces uniqueness."""
+        return enforces_uniqueness(self.strategy)
+
+    def calculate_fingerprint(self, payload: Any) -> str:
+        """Delegate to the wrapped strategy."""
+        return self.strategy.calculate_fingerprint(payload)
+
+    def find_existing_uuid(self, fingerprint: str) -> Optional[str]:
+        """Answer from the LRU or the Bloom filter, else ask the strategy."""
+        with self._lock:
+            cached = self._cached(fingerprint)
+            if cached is not None or self._known_new(fingerprint):
+                return cached
+            self._misses += 1
+
+        existing = self.strategy.find_existing_uuid(fingerprint)
+        if existing:
+            self._remember({fingerprint: existing})
+        return existing
+
+    def find_existing_uuids(self, fingerprints: Sequence[str]) -> Dict[str, str]:
+        """Batch version of ``find_existing_uuid``; one strategy call for the misses."""
+        found: Dict[str, str] = {}
+        lookup = []
+        with self._lock:
+            for fingerprint in fingerprints:
+                cached = self._cached(fingerprint)
+                if cached is not None:
+                    found[fingerprint] = cached
+                elif not self._known_new(fingerprint):
+                    lookup.append(fingerprint)
+            self._misses += len(lookup)
+
+        if lookup:
+            existing = resolve_existing_uuids(self.strategy, lookup)
+            self._remember(existing)
+            found.update(existing)
+        return found
+
+    def persist_data(self, uuid: str, payload: Any) -> None:
+        """Persist through the strategy and mark the fingerprint as known."""
+        self.strategy.persist_data(uuid, payload)
+        self._mark_known([self.calculate_fingerprint(payload)])
+
+    def persist_many(self, items: Sequence[Tuple[str, Any]]) -> None:
+        """Batch version of ``persist_data``."""
+        persist_all(self.strategy, items)
+        self._mark_known(self.calculate_fingerprint(payload) for _, payload in items)
+
+    def _reserve_fingerprint(self, fingerprint: str, uuid: str, payload: Any) -> str:
+        """Reserve through the strategy; another worker's uuid is remembered."""
+        winner = self.strategy.reserve_fingerprint(fingerprint, uuid, payload)
+        if winner == uuid:
+            # Our row may still be rolled back
+            self._mark_known([fingerprint])
+        else:
+            self._remember({fingerprint: winner})
+        return winner
+
+    def invalidate(self, fingerprints: Iterable[str]) -> None:
+        """Forget cached answers for ``fingerprints`` after a lost insert race.
+
+        Their next lookup goes to the strategy.
+        """
+        with self._lock:
+            for fingerprint in fingerprints:
+                self._entries.pop(fingerprint, None)
+                self.bloom.add(fingerprint)
+                self._invalidations += 1
+
+    def warm(self, fingerprints: Optional[Iterable[str]] = None) -> int:
+        """Load every known fingerprint into the Bloom filter and enable negatives.
+
+        Negatives are only used when the strategy enforces uniqueness.
+
+        Args:
+            fingerprints: Every fingerprint already stored. Defaults to the
+                strategy's optional ``iter_fingerprints()`` hook.
+
+        Returns:
+            Number of fingerprints loaded.
+
+        Raises:
+            TypeError: If no fingerprints are given and the strategy has no
+                ``iter_fingerprints`` hook.
+        """
+        if fingerprints is None:
+            hook = getattr(self.strategy, "iter_fingerprints", None)
+            if hook is None:
+                raise TypeError(f"{type(self.strategy).__name__} has no iter_fingerprints(); pass the fingerprints")
+            fingerprints = hook()
+
+        loaded = 0
+        with self._lock:
+            for fingerprint in fingerprints:
+                self.bloom.add(fingerprint)
+                loaded += 1
+            self.warmed = True
+        return loaded
+
+    def clear(self) -> None:
+        """Drop the LRU and the Bloom filter; negatives stay off until ``warm``."""
+        with self._lock:
+            self._entries.clear()
+            self.bloom.clear()
+            self.warmed = False
+
+    def stats(self) -> DeduplicationCacheStats:
+        """Current hit/miss counters."""
+        with self._lock:
+            return DeduplicationCacheStats(
+                hits=self._hits,
+                negative_hits=self._negative_hits,
+                misses=self._misses,
+                invalidations=self._invalidations,
+                evictions=self._evictions,
+                size=len(self._entries),
+            )
+
+    def _cached(self, fingerprint: str) -> Optional[str]:
+        cached = self._entries.get(fingerprint)
+        if cached is not None:
+            self._entries.move_to_end(fingerprint)
+            self._hits += 1
+        return cached
+
+    def _known_new(self, fingerprint: str) -> bool:
+        if self.warmed and self.enforces_uniqueness and fingerprint not in self.bloom:
+            self._negative_hits += 1
+            return True
+        return False
+
+    def _remember(self, found: Dict[str, str]) -> None:
+        with self._lock:
+            for fingerprint, uuid in found.items():
+                self._entries[fingerprint] = uuid
+                self._entries.move_to_end(fingerprint)
+                self.bloom.add(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _mark_known(self, fingerprints: Iterable[str]) -> None:
+        with self._lock:
+            for fingerprint in fingerprints:
+                self.bloom.add(fingerprint)
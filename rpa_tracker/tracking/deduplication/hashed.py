@@ -0,0 +1,148 @@
+"""Built-in deduplication strategy on the RPA_TX_FINGERPRINT table."""
+import hashlib
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from rpa_tracker.models.tx_fingerprint import TxFingerprint
+from rpa_tracker.tracking.sql_dialect import insert_or_get
+
+
+class HashedFingerprintDeduplication:
+    """Deduplicates on the sha256 of a fingerprint stored in ``RPA_TX_FINGERPRINT``.
+
+    The fingerprint is built from ``fields`` of the payload (attributes, or
+    keys of a mapping) or by a ``key`` callable. Only its digest is stored,
+    with the process code and the strategy version, under a unique index: a
+    lookup is a single index probe whatever the payload looks like.
+    ``start_or_resume`` stores new fingerprints with ``reserve_fingerprint``,
+    an upsert that returns the winning uuid when another worker inserted
+    the same fingerprint first. Bulk intake relies on the unique index
+    raising ``IntegrityError``.
+
+    Bumping ``version`` starts a new fingerprint space, e.g. when the fields
+    change.
+
+    Example:
+        DeduplicationRegistry.register(
+            "CANC_PROC",
+            HashedFingerprintDeduplication(session, "CANC_PROC", fields=["requerimiento"]),
+        )
+    """
+    SEPARATOR = "|"
+
+    # UX_RPA_TX_FINGERPRINT rejects a second row for the same fingerprint
+    enforces_uniqueness = True
+
+    def __init__(self,
+                 session: Session,
+                 process_code: str,
+                 fields: Optional[Sequence[str]] = None,
+                 key: Optional[Callable[[Any], str]] = None,
+                 version: int = 1):
+        """Create the strategy for ``process_code``.
+
+        Args:
+            session: Session of the tracker; rows are added to it and
+                committed by the tracker.
+            process_code: Process the fingerprints belong to.
+            fields: Payload fields making up the fingerprint.
+            key: Callable building the fingerprint string from a payload,
+                instead of ``fields``.
+            version: Fingerprint version stored with each digest.
+
+        Raises:
+            ValueError: Unless exactly one of ``fields`` and ``key`` is given.
+        """
+        if (fields is None) == (key is None):
+            raise ValueError("Pass exactly one of 'fields' or 'key'")
+        self.session = session
+        self.process_code = process_code
+        self.fields = tuple(fields) if fields is not None else None
+        self.key = key
+        self.version = version
+
+    def calculate_fingerprint(self, payload: Any) -> str:
+        """Return the hex sha256 of the payload's fingerprint string."""
+        if self.key is not None:
+            raw = self.key(payload)
+        else:
+            raw = self.SEPARATOR.join(str(self._field(payload, name)) for name in self.fields)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def find_existing_uuid(self, fingerprint: str) -> Optional[str]:
+        """Find the uuid stored for ``fingerprint``."""
+        return (
+            self.session.query(TxFingerprint.uuid)
+            .filter(
+                TxFingerprint.process_code == self.process_code,
+                TxFingerprint.version == self.version,
+                TxFingerprint.digest == bytes.fromhex(fingerprint),
+            )
+            .scalar()
+        )
+
+    def find_existing_uuids(self, fingerprints: Sequence[str]) -> Dict[str, str]:
+        """Resolve many fingerprints with a single IN query."""
+        rows = (
+            self.session.query(TxFingerprint.digest, TxFingerprint.uuid)
+            .filter(
+                TxFingerprint.process_code == self.process_code,
+                TxFingerprint.version == self.version,
+                TxFingerprint.digest.in_([bytes.fromhex(f) for f in fingerprints]),
+            )
+            .all()
+        )
+        return {digest.hex(): uuid for digest, uuid in rows}
+
+    def persist_data(self, uuid: str, payload: Any) -> None:
+        """Add the fingerprint row; the tracker flushes and commits it."""
+        self.session.add(TxFingerprint(**self._row(uuid, self.calculate_fingerprint(payload))))
+
+    def persist_many(self, items: Sequence[Tuple[str, Any]]) -> None:
+        """Insert the fingerprint rows of many transactions in one statement."""
+        self.session.execute(
+            insert(TxFingerprint),
+            [self._row(uuid, self.calculate_fingerprint(payload)) for uuid, payload in items],
+        )
+
+    def reserve_fingerprint(self, fingerprint: str, uuid: str, payload: Any) -> str:
+        """Store ``fingerprint`` for ``uuid`` unless stored already; return the uuid that owns it.
+
+        One upsert round trip on SQLite/PostgreSQL, a savepoint elsewhere.
+        Replaces ``persist_data`` in ``start_or_resume``: a lost race costs
+        neither an ``IntegrityError`` nor a session rollback.
+        """
+        return insert_or_get(
+            self.session,
+            TxFingerprint,
+            {**self._row(uuid, fingerprint), "created_at": datetime.now()},
+            ("process_code", "version", "digest"),
+            "uuid",
+        )
+
+    def iter_fingerprints(self) -> Iterator[str]:
+        """Every stored fingerprint of this process and version, for ``CachedDeduplication.warm``."""
+        query = (
+            self.session.query(TxFingerprint.digest)
+            .filter(TxFingerprint.process_code == self.process_code, TxFingerprint.version == self.version)
+            .yield_per(10_000)
+        )
+        return (digest.hex() for digest, in query)
+
+    def _row(self, uuid: str, fingerprint: str) -> Dict[str, Any]:
+        return {
+            "process_code": self.process_code,
+            "version": self.version,
+            "digest": bytes.fromhex(fingerprint),
+            "uuid": uuid,
+        }
+
+    @staticmethod
+    def _field(payload: Any, name: str) -> Any:
+        if isinstance(payload, Mapping):
+            return payload[name]
+        return getattr(payload, name)
@@ -1,6 +1,7 @@
 """Registry for deduplication strategies."""
 from typing import Dict
 from rpa_tracker.tracking.deduplication.base import DeduplicationStrategy
+from rpa_tracker.tracking.deduplication.cache import CachedDeduplication
 
 
 from typing import Optional
@@ -19,6 +20,21 @@ class DeduplicationRegistry:
         """Retrieve the deduplication strategy for a given process code."""
         return cls._registry[process_code]
 
+    @classmethod
+    def enable_cache(cls, process_code: str, **options) -> CachedDeduplication:
+        """Wrap the strategy of ``process_code`` in a ``CachedDeduplication``.
+
+        Calling it again returns the existing cache unchanged.
+
+        Args:
+            process_code: Process whose strategy is wrapped.
+            **options: Passed to ``CachedDeduplication``.
+        """
+        strategy = cls._registry[process_code]
+        if not isinstance(strategy, CachedDeduplication):
+            strategy = cls._registry[process_code] = CachedDeduplication(strategy, **options)
+        return strategy
+
     @classmethod
     def clear(cls) -> None:
         """Clear all registered strategies (for testing)."""
@@ -0,0 +1,67 @@
+"""Bookkeeping of the bulk intake, independent of how the I/O is done.
+
+``IntakeBatch`` keeps track of which payloads are new, which ones resolve to
+an existing transaction and which ones repeat inside the batch. The sync and
+async trackers drive it with their own database and deduplication calls.
+"""
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+
+class IntakeBatch:
+    def __init__(self, payloads: Sequence[Any], fingerprints: Sequence[str]):
+        self.payloads = payloads
+        self.fingerprints = fingerprints
+        self.resolved: Dict[str, str] = {}  # fingerprint -> uuid
+        self.results: List[Tuple[str, bool]] = []
+        self._chunk_results: List[Tuple[str, bool]] = []
+
+    def chunks(self, chunk_size: int) -> Iterator[range]:
+        """Yield the payload indexes of each chunk."""
+        for start in range(0, len(self.payloads), chunk_size):
+            yield range(start, min(start + chunk_size, len(self.payloads)))
+
+    def lookup(self, indexes: range) -> List[str]:
+        """Return the distinct fingerprints of the chunk not resolved yet."""
+        return list(dict.fromkeys(
+            self.fingerprints[i] for i in indexes if self.fingerprints[i] not in self.resolved
+        ))
+
+    def assign(self, indexes: range, existing: Dict[str, str], new_uuid) -> List[Tuple[str, Any]]:
+        """Resolve the chunk and return the (uuid, payload) pairs to create.
+
+        Args:
+            indexes: Payload indexes of the chunk.
+            existing: Fingerprints already known by the deduplication strategy.
+            new_uuid: Callable returning a fresh uuid.
+        """
+        self.resolved.update(existing)
+        self._chunk_results = []
+        new_items = []
+
+        for i in indexes:
+            fingerprint = self.fingerprints[i]
+            if fingerprint in self.resolved:
+                self._chunk_results.append((self.resolved[fingerprint], False))
+                continue
+
+            uuid_tx = new_uuid()
+            self.resolved[fingerprint] = uuid_tx
+            new_items.append((uuid_tx, self.payloads[i]))
+            self._chunk_results.append((uuid_tx, True))
+
+        return new_items
+
+    def accept(self) -> None:
+        """Keep the results of the current chunk."""
+        self.results.extend(self._chunk_results)
+
+    def discard(self, indexes: range) -> None:
+        """Forget the current chunk so it can be replayed item by item."""
+        self._chunk_results = []
+        for i in indexes:
+            self.resolved.pop(self.fingerprints[i], None)
+
+    def replayed(self, index: int, uuid_tx: str, is_new: bool) -> None:
+        """Record the result of replaying one payload of a discarded chunk."""
+        self.resolved[self.fingerprints[index]] = uuid_tx
+        self.results.append((uuid_tx, is_new))
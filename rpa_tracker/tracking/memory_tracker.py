@@ -0,0 +1,516 @@
+"""In-memory implementation of the TransactionTracker.
+
+Meant for tests, simulations and dry runs: no database and no ORM session,
+but the same state-transition rules as ``SqlTransactionTracker`` (both use
+``state_machine``). Records are transient instances of the ORM models, so
+callers read the same attributes from either backend.
+
+Nothing is persisted and there are no commits. Deduplication still goes
+through the strategy registered in ``DeduplicationRegistry``.
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from sqlalchemy.exc import NoResultFound
+
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.constants import DEFAULT_STAGE
+from rpa_tracker.domain.execution_result import AnyExecutionResult
+from rpa_tracker.enums import (
+    ELIGIBLE_PROCESS_STATES,
+    FINISHABLE_STAGE_STATES,
+    CircuitState,
+    ErrorType,
+    TransactionState,
+)
+from rpa_tracker.models.tx_circuit import TxCircuit
+from rpa_tracker.models.tx_event import TxEvent
+from rpa_tracker.models.tx_limiter import TxLimiter
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.retry.circuit_breaker import CircuitBreakerPolicy, admission, after_attempt, blocked_until
+from rpa_tracker.retry.rate_limit import allowance, capacity, next_token_at, refill
+from rpa_tracker.retry.registry import RetryPolicyRegistry
+from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.state_machine import (
+    CANCELLED_DESCRIPTION,
+    all_stages_closed,
+    cancels_pending_stages,
+    counter_deltas,
+    process_transition,
+)
+from rpa_tracker.tracking.transaction_tracker import TransactionTracker
+
+StageResult = Optional[Tuple[str, Optional[str], Optional[str]]]
+
+
+class MemoryStore:
+    """Rows of the in-memory backend and their indexes.
+
+    Shared by ``InMemoryTransactionTracker`` and the in-memory report
+    repository, like a session is shared by their SQL counterparts.
+
+    Attributes:
+        processes: ``TxProcess`` by uuid.
+        stages: ``TxStage`` by uuid, then by (system, stage).
+        by_state: uuids by (system, stage, state).
+        events: Every ``TxEvent``, in insertion order.
+        circuits: ``TxCircuit`` by platform, for platforms whose circuit
+            breaker has tripped at least once.
+        limiters: ``TxLimiter`` by platform, for rate-limited platforms
+            that dispatched at least once.
+    """
+
+    def __init__(self):
+        self.processes: Dict[str, TxProcess] = {}
+        self.stages: Dict[str, Dict[Tuple[str, str], TxStage]] = {}
+        self.by_state: Dict[Tuple[str, str, str], Set[str]] = defaultdict(set)
+        self.events: List[TxEvent] = []
+        self.circuits: Dict[str, TxCircuit] = {}
+        self.limiters: Dict[str, TxLimiter] = {}
+
+    def add_stage(self, stage: TxStage) -> None:
+        """Add a new stage and index it."""
+        self.stages.setdefault(stage.uuid, {})[(stage.system, stage.stage)] = stage
+        self.by_state[(stage.system, stage.stage, stage.state)].add(stage.uuid)
+
+    def set_stage_state(self, stage: TxStage, state: str) -> None:
+        """Change the state of a stage, keeping ``by_state`` in sync."""
+        self.by_state[(stage.system, stage.stage, stage.state)].discard(stage.uuid)
+        stage.state = state
+        self.by_state[(stage.system, stage.stage, state)].add(stage.uuid)
+
+
+class InMemoryTransactionTracker(TransactionTracker):
+
+    def __init__(self,
+                 store: Optional[MemoryStore] = None,
+                 materialize_on_start: bool = False):
+        """Create a tracker over ``store``.
+
+        Args:
+            store: Rows to work on; a new empty store by default.
+            materialize_on_start: See ``SqlTransactionTracker``.
+        """
+        self.store = store or MemoryStore()
+        self.materialize_on_start = materialize_on_start
+
+    def start_or_resume(self,
+                        process_code: str,
+                        payload: Any) -> Tuple[str, bool]:
+        """Returns (uuid, is_new_transaction)."""
+        dedup = DeduplicationRegistry.get(process_code)
+        fingerprint = dedup.calculate_fingerprint(payload)
+
+        existing = dedup.find_existing_uuid(fingerprint)
+        if existing:
+            return existing, False
+
+        uuid_tx = str(uuid.uuid4())
+        self._add_process(process_code, uuid_tx)
+        dedup.persist_data(uuid_tx, payload)
+        return uuid_tx, True
+
+    def start_or_resume_many(self,
+                             process_code: str,
+                             payloads: Iterable[Any],
+                             chunk_size: int = 1000) -> List[Tuple[str, bool]]:
+        """Batch version of ``start_or_resume``; ``chunk_size`` is ignored."""
+        return [self.start_or_resume(process_code, payload) for payload in payloads]
+
+    def _add_process(self, process_code: str, uuid_tx: str) -> None:
+        """Add a new PENDING ``TxProcess`` (and its plan when configured)."""
+        now = datetime.now()
+        self.store.processes[uuid_tx] = TxProcess(
+            uuid=uuid_tx,
+            process_code=process_code,
+            state=TransactionState.PENDING.value,
+            error_type=None,
+            error_description=None,
+            total_stages=0,
+            completed_stages=0,
+            failed_stages=0,
+            created_at=now,
+            updated_at=now,
+        )
+        if self.materialize_on_start:
+            self.materialize_plan(uuid_tx)
+
+    def start_stage(self,
+                    uuid: str,
+                    system: str,
+                    stage: str = DEFAULT_STAGE) -> None:
+        """Registers the start of a stage for a transaction."""
+        if (system, stage) in self.store.stages.get(uuid, {}):
+            return
+
+        self.store.add_stage(
+            TxStage(
+                uuid=uuid,
+                system=system,
+                stage=stage,
+                state=TransactionState.PENDING.value,
+                attempt=0,
+                last_attempt_at=None,
+                next_attempt_at=None,
+                error_type=None,
+                error_description=None,
+                claimed_by=None,
+                claimed_until=None,
+            )
+        )
+        process = self.store.processes.get(uuid)
+        if process is not None:
+            process.total_stages += 1
+
+    def materialize_plan(self, uuids: Union[str, Iterable[str]]) -> None:
+        """Create every stage of the catalog for one or many transactions."""
+        if isinstance(uuids, str):
+            uuids = [uuids]
+
+        plan = PlatformRegistry.snapshot().plan
+        for uuid_tx in uuids:
+            for system, stage_name in plan:
+                self.start_stage(uuid_tx, system, stage_name)
+
+    def log_event(
+        self,
+        uuid: str,
+        system: str,
+        error_code: int,
+        description: Optional[str],
+        stage: str = DEFAULT_STAGE
+    ) -> None:
+        """Logs an event for a transaction stage."""
+        stage_row = self._stage(uuid, system, stage)
+        now = datetime.now()
+
+        self.store.events.append(
+            TxEvent(
+                id=len(self.store.events) + 1,
+                uuid=uuid,
+                system=system,
+                stage=stage,
+                attempt=stage_row.attempt + 1,
+                error_code=error_code,
+                description=description,
+                event_at=now,
+                processed_at=now,
+            )
+        )
+
+    def finish_stage(
+        self,
+        uuid: str,
+        system: str,
+        state: TransactionState,
+        error_type: Optional[ErrorType] = None,
+        description: Optional[str] = None,
+        stage: str = DEFAULT_STAGE
+    ) -> StageResult:
+        """Finish a stage and update process state accordingly.
+
+        Same rules as ``SqlTransactionTracker.finish_stage``.
+        """
+        stage_row = self.store.stages.get(uuid, {}).get((system, stage))
+        if stage_row is None or stage_row.state not in FINISHABLE_STAGE_STATES:
+            # Already processed
+            return None
+
+        process = self.store.processes.get(uuid)
+        if process is None:
+            raise NoResultFound(f"No process found for transaction {uuid}")
+
+        error_value = error_type.value if error_type else None
+        previous_state = stage_row.state
+        self.store.set_stage_state(stage_row, state.value)
+        stage_row.error_type = error_value
+        stage_row.error_description = description
+        stage_row.last_attempt_at = datetime.now()
+        stage_row.attempt += 1
+        stage_row.next_attempt_at = (
+            RetryPolicyRegistry.get(system).next_attempt_at(stage_row.attempt, stage_row.last_attempt_at)
+            if state == TransactionState.TERMINATED else None
+        )
+        stage_row.claimed_by = None
+        stage_row.claimed_until = None
+
+        for attribute, delta in counter_deltas(previous_state, state.value).items():
+            setattr(process, attribute, getattr(process, attribute) + delta)
+
+        changes = process_transition(
+            process.state,
+            state,
+            error_type,
+            description,
+            lambda: all_stages_closed(process.total_stages, process.completed_stages, process.failed_stages),
+        )
+        for attribute, value in changes.items():
+            setattr(process, attribute, value)
+
+        if cancels_pending_stages(state):
+            process.failed_stages += self._cancel_pending_stages(uuid)
+
+        self._record_attempt(system, state == TransactionState.TERMINATED, stage_row.last_attempt_at)
+        return (state.value, error_value, description)
+
+    def _circuit_policy(self, system: str) -> Optional[CircuitBreakerPolicy]:
+        platform = PlatformRegistry.snapshot().by_code.get(system)
+        return platform.circuit_breaker if platform is not None else None
+
+    def _record_attempt(self, system: str, failed: bool, now: datetime) -> None:
+        """Feed a finished stage to the platform's circuit breaker, if any."""
+        policy = self._circuit_policy(system)
+        if policy is None:
+            return
+
+        circuit = self.store.circuits.get(system)
+        state = circuit.state if circuit is not None else CircuitState.CLOSED.value
+        changes = after_attempt(state, failed, lambda: policy.trips(self._recent_failures(system, policy.window)), now)
+        if changes is None:
+            return
+        if circuit is None:
+            circuit = self.store.circuits[system] = TxCircuit(system=system)
+        for attribute, value in changes.items():
+            setattr(circuit, attribute, value)
+
+    def _recent_failures(self, system: str, window: int) -> List[bool]:
+        """System-error flags of the last ``window`` events of ``system``, newest first."""
+        recent = (event for event in reversed(self.store.events) if event.system == system)
+        return [event.error_code < 0 for event in islice(recent, window)]
+
+    def _admit(self, system: str, now: datetime) -> Optional[int]:
+        """How many stages of ``system`` the circuit breaker lets through (None = all)."""
+        policy = self._circuit_policy(system)
+        circuit = self.store.circuits.get(system)
+        if policy is None or circuit is None:
+            return None
+
+        limit, changes = admission(circuit.state, circuit.opened_at, circuit.probe_until, policy, now)
+        for attribute, value in (changes or {}).items():
+            setattr(circuit, attribute, value)
+        return limit
+
+    def _tokens(self, system: str, now: datetime) -> Optional[float]:
+        """Tokens in the bucket of ``system``; None without a rate limit."""
+        platform = PlatformRegistry.snapshot().by_code.get(system)
+        rate = platform.max_rate_per_minute if platform is not None else None
+        if rate is None:
+            return None
+        bucket = self.store.limiters.get(system)
+        if bucket is None:
+            return capacity(rate)
+        return refill(bucket.tokens, bucket.refilled_at, rate, now)
+
+    def _in_flight(self, system: str, now: datetime) -> int:
+        """Stages of ``system`` under an unexpired lease."""
+        return sum(
+            1
+            for stages in self.store.stages.values()
+            for (code, _), stage_row in stages.items()
+            if code == system
+            and stage_row.state in FINISHABLE_STAGE_STATES
+            and stage_row.claimed_until is not None
+            and stage_row.claimed_until > now
+        )
+
+    def _take(self, system: str, stages: List[TxStage], now: datetime) -> List[TxStage]:
+        """Keep the stages the platform's dispatch limits grant and take their tokens."""
+        platform = PlatformRegistry.snapshot().by_code.get(system)
+        if platform is None or not platform.limits_dispatch:
+            return stages
+
+        tokens = self._tokens(system, now)
+        in_flight = self._in_flight(system, now) if platform.max_concurrency is not None else 0
+        stages = stages[:allowance(tokens, platform.max_concurrency, in_flight)]
+        if tokens is not None:
+            self.store.limiters[system] = TxLimiter(
+                system=system, tokens=tokens - len(stages), refilled_at=now, version=0,
+            )
+        return stages
+
+    def _cancel_pending_stages(self, uuid: str) -> int:
+        """Cancel all PENDING stages for a transaction."""
+        cancelled = 0
+        for stage_row in self.store.stages.get(uuid, {}).values():
+            if stage_row.state == TransactionState.PENDING.value:
+                self.store.set_stage_state(stage_row, TransactionState.CANCELLED.value)
+                stage_row.error_description = CANCELLED_DESCRIPTION
+                cancelled += 1
+        return cancelled
+
+    def complete_stage(
+        self,
+        uuid: str,
+        system: str,
+        result: AnyExecutionResult,
+        stage: str = DEFAULT_STAGE,
+        auto_commit: bool = False
+    ) -> StageResult:
+        """Complete a stage by logging event and finishing it.
+
+        ``auto_commit`` is accepted for compatibility and ignored.
+        """
+        self.log_event(uuid, system, result.error_code, result.description, stage)
+        return self.finish_stage(uuid, system, result.state, result.error_type, result.description, stage)
+
+    def complete_stages(
+        self,
+        items: Iterable[Tuple[str, str, str, AnyExecutionResult]],
+    ) -> List[StageResult]:
+        """Complete many stages; see ``SqlTransactionTracker.complete_stages``.
+
+        Raises:
+            NoResultFound: If a stage or its process does not exist. Nothing
+                is written in that case.
+        """
+        items = list(items)
+        for uuid_tx, system, stage, _ in items:
+            if uuid_tx not in self.store.processes or (system, stage) not in self.store.stages.get(uuid_tx, {}):
+                raise NoResultFound(f"No stage {system}/{stage} found for transaction {uuid_tx}")
+
+        return [
+            self.complete_stage(uuid_tx, system, result, stage)
+            for uuid_tx, system, stage, result in items
+        ]
+
+    def get_executable_stages(self, uuid: str) -> List[TxStage]:
+        """Returns stages that can be executed (PENDING or REJECTED).
+
+        Unless the transaction is already REJECTED.
+        """
+        process = self.store.processes.get(uuid)
+        if process is None:
+            raise NoResultFound(f"No process found for transaction {uuid}")
+
+        if process.state == TransactionState.REJECTED:
+            return []
+
+        executable = (TransactionState.PENDING.value, TransactionState.REJECTED.value)
+        return [s for s in self.store.stages.get(uuid, {}).values() if s.state in executable]
+
+    def get_pending_stages(self,
+                           system: str,
+                           stage: str = DEFAULT_STAGE) -> List[TxStage]:
+        """Returns stages that are eligible for execution for a given system.
+
+        Same eligibility as ``SqlTransactionTracker.get_pending_stages``,
+        resolved from the (system, stage, state) index; ordered by uuid.
+        """
+        now = datetime.now()
+        limit = self._admit(system, now)
+        if limit == 0:
+            return []
+        due = [s for s in self._waiting_stages(system, stage, now) if self._is_due(s, now)][:limit]
+        return self._take(system, due, now)
+
+    def next_due_at(self,
+                    system: str,
+                    stage: str = DEFAULT_STAGE) -> Optional[datetime]:
+        """See ``SqlTransactionTracker.next_due_at``."""
+        now = datetime.now()
+        due = [s.next_attempt_at or now for s in self._waiting_stages(system, stage, now)]
+        if not due:
+            return None
+
+        policy = self._circuit_policy(system)
+        circuit = self.store.circuits.get(system)
+        blocked = None
+        if policy is not None and circuit is not None:
+            blocked = blocked_until(circuit.state, circuit.opened_at, circuit.probe_until, policy)
+        tokens = self._tokens(system, now)
+        token = None
+        if tokens is not None:
+            token = next_token_at(tokens, PlatformRegistry.snapshot().by_code[system].max_rate_per_minute, now)
+        return max(min(due), blocked or now, token or now, now)
+
+    @staticmethod
+    def _is_due(stage_row: TxStage, now: datetime) -> bool:
+        return stage_row.next_attempt_at is None or stage_row.next_attempt_at <= now
+
+    def _waiting_stages(self, system: str, stage: str, now: datetime) -> List[TxStage]:
+        """Stages eligible for execution, ignoring the retry backoff."""
+        policy = RetryPolicyRegistry.get(system)
+        catalog = PlatformRegistry.snapshot()
+        previous = [(p.code, catalog.expected_stages[p.code]) for p in catalog.predecessors[system]]
+
+        candidates = sorted(
+            self.store.by_state[(system, stage, TransactionState.PENDING.value)]
+            | self.store.by_state[(system, stage, TransactionState.TERMINATED.value)]
+        )
+
+        eligible = []
+        for uuid_tx in candidates:
+            process = self.store.processes.get(uuid_tx)
+            if process is None or process.state not in ELIGIBLE_PROCESS_STATES:
+                continue
+
+            stages = self.store.stages[uuid_tx]
+            stage_row = stages[(system, stage)]
+            if stage_row.claimed_until is not None and stage_row.claimed_until > now:
+                continue
+            if policy.max_attempts is not None and stage_row.attempt >= policy.max_attempts:
+                continue
+            if all(self._completed_count(stages, code) >= expected for code, expected in previous):
+                eligible.append(stage_row)
+
+        return eligible
+
+    def iter_pending_stages(self,
+                            system: str,
+                            stage: str = DEFAULT_STAGE,
+                            page_size: int = 1000) -> Iterator[TxStage]:
+        """Iterate ``get_pending_stages``; ``page_size`` is ignored."""
+        return iter(self.get_pending_stages(system, stage))
+
+    def claim_pending_stages(self,
+                             system: str,
+                             stage: str,
+                             worker_id: str,
+                             limit: int = 100,
+                             lease_seconds: int = 300,
+                             exclude_uuids: Collection[str] = ()) -> List[TxStage]:
+        """Lease up to ``limit`` eligible stages for ``worker_id``.
+
+        Same rules as ``SqlTransactionTracker.claim_pending_stages``. Trackers
+        sharing a ``MemoryStore`` see each other's leases, and the leases
+        count against the platform's ``max_concurrency``.
+        """
+        now = datetime.now()
+        until = (now + timedelta(seconds=lease_seconds)).replace(microsecond=0)
+
+        admitted = self._admit(system, now)
+        if admitted == 0:
+            return []
+        if admitted is not None:
+            limit = min(limit, admitted)
+
+        excluded = set(exclude_uuids)
+        candidates = [
+            s for s in self._waiting_stages(system, stage, now)
+            if self._is_due(s, now) and s.uuid not in excluded
+        ][:limit]
+
+        claimed = self._take(system, candidates, now)
+        for stage_row in claimed:
+            stage_row.claimed_by = worker_id
+            stage_row.claimed_until = until
+        return claimed
+
+    def _stage(self, uuid: str, system: str, stage: str) -> TxStage:
+        """Return a stage or raise ``NoResultFound`` like ``Query.one``."""
+        try:
+            return self.store.stages[uuid][(system, stage)]
+        except KeyError:
+            raise NoResultFound(f"No stage {system}/{stage} found for transaction {uuid}") from None
+
+    @staticmethod
+    def _completed_count(stages: Dict[Tuple[str, str], TxStage], system: str) -> int:
+        """Number of COMPLETED stages of ``system`` among a transaction's stages."""
+        return sum(
+            1 for (code, _), s in stages.items()
+            if code == system and s.state == TransactionState.COMPLETED.value
+        )
@@ -0,0 +1,127 @@
+"""Per-platform dispatch limits shared by every worker through RPA_TX_LIMITER."""
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.enums import FINISHABLE_STAGE_STATES
+from rpa_tracker.models.tx_limiter import TxLimiter
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.retry.rate_limit import allowance, capacity, next_token_at, refill
+from rpa_tracker.tracking.sql_dialect import insert_ignore
+
+
+class SqlRateLimiter:
+    """Token bucket and concurrency cap of each platform, in the tracker's session.
+
+    Every admission is a compare-and-set on ``TxLimiter.version`` that takes
+    the granted tokens out of the bucket. Two workers admitting the same
+    platform at once cannot both win: the loser re-reads the bucket and
+    recounts the leased stages. Claims commit their leases before taking
+    the tokens, so of two concurrent claims at least one counts the other's
+    leases and the concurrency cap is never exceeded.
+
+    The caller commits.
+    """
+
+    # Compare-and-set rounds lost to other workers before admitting nothing
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def available(self, platform: PlatformDefinition, now: datetime) -> Optional[int]:
+        """How many stages of ``platform`` may be dispatched now, without taking them."""
+        return allowance(self._tokens(self._read(platform.code), platform, now),
+                         platform.max_concurrency,
+                         self._in_flight(platform, now))
+
+    def acquire(self,
+                platform: PlatformDefinition,
+                wanted: int,
+                now: datetime,
+                lease: Optional[Tuple[str, datetime]] = None) -> int:
+        """Take up to ``wanted`` dispatches of ``platform``; return how many were granted.
+
+        Args:
+            platform: Platform whose limits apply.
+            wanted: Dispatches asked for.
+            now: Time of the admission.
+            lease: ``(claimed_by, claimed_until)`` of the stages asked for,
+                when the caller leased them already. They are not counted
+                as in flight.
+        """
+        for _ in range(self.MAX_ATTEMPTS):
+            bucket = self._read(platform.code)
+            if bucket is None:
+                self._create(platform, now)
+                continue
+
+            tokens = self._tokens(bucket, platform, now)
+            allowed = allowance(tokens, platform.max_concurrency, self._in_flight(platform, now, lease))
+            granted = wanted if allowed is None else min(wanted, allowed)
+            if granted == 0:
+                return 0
+
+            changes = {"version": bucket.version + 1, "refilled_at": now}
+            if tokens is not None:
+                changes["tokens"] = tokens - granted
+            won = (
+                self.session.query(TxLimiter)
+                .filter(TxLimiter.system == platform.code, TxLimiter.version == bucket.version)
+                .update(changes, synchronize_session=False)
+            )
+            if won:
+                return granted
+        return 0
+
+    def next_token_at(self, platform: PlatformDefinition, now: datetime) -> Optional[datetime]:
+        """When the bucket of ``platform`` holds a token again; None without a rate limit."""
+        tokens = self._tokens(self._read(platform.code), platform, now)
+        return next_token_at(tokens, platform.max_rate_per_minute, now) if tokens is not None else None
+
+    def _read(self, system: str):
+        return self.session.execute(
+            select(TxLimiter.tokens, TxLimiter.refilled_at, TxLimiter.version)
+            .where(TxLimiter.system == system)
+        ).first()
+
+    def _create(self, platform: PlatformDefinition, now: datetime) -> None:
+        rate = platform.max_rate_per_minute
+        tokens = capacity(rate) if rate is not None else 0.0
+        insert_ignore(self.session, TxLimiter, [{"system": platform.code, "tokens": tokens, "refilled_at": now,
+                                                 "version": 0}])
+
+    @staticmethod
+    def _tokens(bucket, platform: PlatformDefinition, now: datetime) -> Optional[float]:
+        rate = platform.max_rate_per_minute
+        if rate is None:
+            return None
+        if bucket is None:
+            return capacity(rate)
+        return refill(bucket.tokens, bucket.refilled_at, rate, now)
+
+    def _in_flight(self,
+                   platform: PlatformDefinition,
+                   now: datetime,
+                   lease: Optional[Tuple[str, datetime]] = None) -> int:
+        """Stages of ``platform`` under an unexpired lease other than ``lease``; 0 without a concurrency cap."""
+        if platform.max_concurrency is None:
+            return 0
+        statement = (
+            select(func.count())
+            .select_from(TxStage)
+            .where(
+                TxStage.system == platform.code,
+                TxStage.state.in_(FINISHABLE_STAGE_STATES),
+                TxStage.claimed_until > now,
+            )
+        )
+        if lease is not None:
+            claimed_by, claimed_until = lease
+            statement = statement.where(
+                or_(TxStage.claimed_by != claimed_by, TxStage.claimed_until != claimed_until)
+            )
+        return self.session.execute(statement).scalar_one()
@@ -0,0 +1,103 @@
+"""Dialect-aware statement helpers for the SQL tracker."""
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Keeps IN lists below the 1000 items limit of Oracle
+IN_CHUNK_SIZE = 500
+
+# Dialects that accept SELECT ... LIMIT ... FOR UPDATE SKIP LOCKED
+SKIP_LOCKED_DIALECTS = ("postgresql", "mysql", "mariadb")
+
+# Dialects that accept INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def dialect_name(session: Session) -> str:
+    """Return the name of the dialect the session is bound to."""
+    return session.get_bind().dialect.name
+
+
+def supports_skip_locked(session: Session) -> bool:
+    """Whether the session's dialect can claim rows with SKIP LOCKED."""
+    return dialect_name(session) in SKIP_LOCKED_DIALECTS
+
+
+def chunked(items: Sequence[Any], size: int = IN_CHUNK_SIZE):
+    """Yield consecutive slices of ``items`` with at most ``size`` elements."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def insert_ignore(session: Session, model, rows: List[Dict[str, Any]]) -> None:
+    """Insert ``rows`` skipping the ones whose primary key already exists.
+
+    Uses ``INSERT ... ON CONFLICT DO NOTHING`` on SQLite and PostgreSQL. Other
+    dialects look the existing keys up first and only insert the missing
+    rows, which is not race-free but keeps the statement portable.
+    """
+    if not rows:
+        return
+
+    name = dialect_name(session)
+    if name == "sqlite":
+        session.execute(sqlite.insert(model).on_conflict_do_nothing(), rows)
+        return
+    if name == "postgresql":
+        session.execute(postgresql.insert(model).on_conflict_do_nothing(), rows)
+        return
+
+    key_columns = inspect(model).primary_key
+    lead = key_columns[0]
+    existing = set()
+    for chunk in chunked(list({row[lead.key] for row in rows})):
+        existing.update(
+            tuple(found)
+            for found in session.execute(select(*key_columns).where(lead.in_(chunk)))
+        )
+
+    missing = [
+        row for row in rows
+        if tuple(row[column.key] for column in key_columns) not in existing
+    ]
+    if missing:
+        session.execute(insert(model), missing)
+
+
+def insert_or_get(session: Session, model, row: Dict[str, Any], unique_columns: Sequence[str], column: str) -> Any:
+    """Insert ``row`` unless its unique key exists; return ``column`` of the stored row.
+
+    On SQLite and PostgreSQL this is one ``INSERT ... ON CONFLICT DO UPDATE
+    ... RETURNING`` statement. The update is a no-op that returns the
+    existing row. Other dialects insert inside a savepoint and, on
+    ``IntegrityError``, roll back only that savepoint and select the winner.
+    Either way the caller's session is not rolled back.
+
+    Args:
+        session: Session to run the statement in.
+        model: Mapped class of the table.
+        row: Values of the new row.
+        unique_columns: Columns of the unique index the conflict is detected on.
+        column: Column to return, e.g. the uuid of the winning row.
+    """
+    upsert = UPSERT_DIALECTS.get(dialect_name(session))
+    if upsert is not None:
+        target = getattr(model, column)
+        statement = (
+            upsert(model)
+            .values(**row)
+            .on_conflict_do_update(index_elements=list(unique_columns), set_={column: target})
+            .returning(target)
+        )
+        return session.execute(statement).scalar_one()
+
+    try:
+        with session.begin_nested():
+            session.execute(insert(model).values(**row))
+        return row[column]
+    except IntegrityError:
+        key = [getattr(model, name) == row[name] for name in unique_columns]
+        return session.execute(select(getattr(model, column)).where(*key)).scalar_one()
@@ -1,55 +1,357 @@
 """SQL-based implementation of the TransactionTracker."""
 import uuid
-from typing import Any, List, Optional, Tuple
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from contextlib import contextmanager
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.orm import Session, aliased
+from rpa_tracker.catalog.platform import PlatformDefinition
 from rpa_tracker.catalog.registry import PlatformRegistry
-from rpa_tracker.domain.execution_result import ExecutionResult
-from rpa_tracker.enums import TransactionState, ErrorType
+from rpa_tracker.domain.execution_result import AnyExecutionResult
+from rpa_tracker.enums import FINISHABLE_STAGE_STATES, TransactionState, ErrorType
+from rpa_tracker.instrumentation import Instrumentation
+from rpa_tracker.models.schema import stage_counters_update
 from rpa_tracker.models.tx_event import TxEvent
 from rpa_tracker.models.tx_process import TxProcess
 from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.retry.circuit_breaker import CircuitBreakerPolicy
+from rpa_tracker.tracking.circuit_breaker import SqlCircuitBreaker
+from rpa_tracker.tracking.deduplication.base import (
+    DeduplicationStrategy,
+    invalidate_fingerprints,
+    persist_all,
+    resolve_existing_uuids,
+)
 from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.intake import IntakeBatch
+from rpa_tracker.tracking.rate_limiter import SqlRateLimiter
+from rpa_tracker.tracking.sql_dialect import chunked, insert_ignore, supports_skip_locked
+from rpa_tracker.tracking.state_machine import (
+    CANCELLED_DESCRIPTION,
+    all_stages_closed,
+    cancels_pending_stages,
+    counter_deltas,
+    process_transition,
+)
 from rpa_tracker.tracking.transaction_tracker import TransactionTracker
-from datetime import datetime
-from sqlalchemy.exc import IntegrityError
+from rpa_tracker.tracking.unit_of_work import UnitOfWork
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError, NoResultFound
+from sqlalchemy.orm.exc import StaleDataError
 from rpa_tracker.constants import DEFAULT_STAGE
 from rpa_tracker.retry.registry import RetryPolicyRegistry
 
 
 class SqlTransactionTracker(TransactionTracker):
 
-    def __init__(self, session: Session):
+    # Methods measured when an Instrumentation is given
+    INSTRUMENTED_METHODS = (
+        "start_or_resume",
+        "start_or_resume_many",
+        "start_stage",
+        "materialize_plan",
+        "repair_stage_counters",
+        "log_event",
+        "finish_stage",
+        "complete_stage",
+        "complete_stages",
+        "get_executable_stages",
+        "get_pending_stages",
+        "next_due_at",
+        "claim_pending_stages",
+    )
+
+    # Conditional process updates lost to other workers before giving up
+    OPTIMISTIC_ATTEMPTS = 5
+
+    def __init__(self,
+                 session: Session,
+                 materialize_on_start: bool = False,
+                 autocommit: bool = True,
+                 instrumentation: Optional[Instrumentation] = None,
+                 optimistic_locking: bool = False,
+                 deduplication: Optional[Mapping[str, DeduplicationStrategy]] = None):
+        """Create a tracker bound to ``session``.
+
+        Args:
+            session: SQLAlchemy session used for every statement.
+            materialize_on_start: If True, new transactions created by
+                ``start_or_resume`` / ``start_or_resume_many`` get their whole
+                stage plan inserted in the same commit.
+            autocommit: If True (default), every write method commits. If
+                False, write methods only flush and the caller commits.
+            instrumentation: Records calls, wall time and SQL statements of
+                this tracker's methods; nothing is recorded when None.
+            optimistic_locking: If True, ``finish_stage`` updates the process
+                with a conditional UPDATE on ``TxProcess.version`` instead of
+                locking the row with ``SELECT ... FOR UPDATE``, and retries
+                the update when another worker changed the process first.
+            deduplication: Strategies per process code used instead of the
+                ones in ``DeduplicationRegistry``, e.g. strategies bound to
+                this tracker's session.
+        """
         self.session = session
+        self.deduplication = dict(deduplication or {})
+        self.materialize_on_start = materialize_on_start
+        self.autocommit = autocommit
+        self.instrumentation = instrumentation
+        self.optimistic_locking = optimistic_locking
+        self._unit_of_work: Optional[UnitOfWork] = None
+        self._composite_depth = 0
+        self._circuits = SqlCircuitBreaker(session)
+        self._limiter = SqlRateLimiter(session)
+        if instrumentation is not None:
+            instrumentation.instrument(self, self.INSTRUMENTED_METHODS, session.get_bind())
+
+    @contextmanager
+    def batch(self,
+              commit_every: Optional[int] = 500,
+              commit_interval: Optional[float] = None) -> Iterator[UnitOfWork]:
+        """Defer commits for the write methods called inside the block.
+
+        Write methods flush instead of committing, and the session is
+        committed every ``commit_every`` operations, every
+        ``commit_interval`` seconds and when the block exits. If the block
+        raises, the session is rolled back to the last commit and the
+        exception is propagated.
+
+        Guarantees given up compared to the default mode:
+        - operations since the last commit are lost on error or crash;
+        - other workers do not see claimed/finished stages until the commit,
+          so they may pick the same stages and lose the optimistic update;
+        - row locks taken while finishing stages are held until the commit.
+
+        Example:
+            with tracker.batch(commit_every=500):
+                for case in cases:
+                    tracker.complete_stage(case.uuid, "A", result)
+        """
+        if self._unit_of_work is not None:
+            # Nested batches join the outer one
+            yield self._unit_of_work
+            return
+
+        self._unit_of_work = UnitOfWork(commit_every, commit_interval)
+        try:
+            yield self._unit_of_work
+            self.session.commit()
+            self._unit_of_work.committed()
+        except BaseException:
+            self.session.rollback()
+            raise
+        finally:
+            self._unit_of_work = None
+            if self.instrumentation is not None and self.instrumentation.log_batches:
+                self.instrumentation.log_snapshot("batch")
+
+    @property
+    def _defers_commit(self) -> bool:
+        """Whether write methods only flush instead of committing."""
+        return self._unit_of_work is not None or not self.autocommit
+
+    def _commit(self) -> None:
+        """Commit, or flush and count the operation when commits are deferred.
+
+        Inside ``_composite`` it only flushes: the composite operation
+        commits once when all its steps are written.
+        """
+        if self._composite_depth:
+            self.session.flush()
+            return
+
+        if not self._defers_commit:
+            self.session.commit()
+            return
+
+        self.session.flush()
+        if self._unit_of_work is not None and self._unit_of_work.record():
+            self.session.commit()
+            self._unit_of_work.committed()
+
+    @contextmanager
+    def _composite(self) -> Iterator[None]:
+        """Run several write methods as one operation; the caller commits after the block."""
+        self._composite_depth += 1
+        try:
+            yield
+        finally:
+            self._composite_depth -= 1
+
+    @contextmanager
+    def _atomic(self) -> Iterator[None]:
+        """Wrap a write in a savepoint when commits are deferred.
+
+        A failure then only discards that write instead of every operation
+        since the last commit.
+        """
+        if self._defers_commit:
+            with self.session.begin_nested():
+                yield
+        else:
+            yield
+
+    def _recover(self) -> None:
+        """Undo a failed write; the savepoint already did it when deferring."""
+        if not self._defers_commit:
+            self.session.rollback()
+
+    @contextmanager
+    def _admission(self) -> Iterator[Session]:
+        """Short transaction of its own on the tracker's bind, committed on exit.
+
+        Dispatch admissions (the circuit's probe lease and the rate limiter's
+        tokens) are written here, so other workers see them at once and the
+        caller's transaction neither commits them nor holds their locks.
+        """
+        with Session(bind=self.session.get_bind()) as session, session.begin():
+            yield session
 
     def start_or_resume(self,
                         process_code: str,
                         payload: Any) -> Tuple[str, bool]:
         """Returns (uuid, is_new_transaction)."""
-        dedup = DeduplicationRegistry.get(process_code)
+        dedup = self._deduplication(process_code)
         fingerprint = dedup.calculate_fingerprint(payload)
 
         existing = dedup.find_existing_uuid(fingerprint)
         if existing:
             return existing, False
 
+        reserve = getattr(dedup, "reserve_fingerprint", None)
+        if reserve is not None:
+            return self._start_reserved(reserve, process_code, fingerprint, payload)
+
+        uuid_tx = str(uuid.uuid4())
+
+        try:
+            with self._atomic():
+                self._add_process(process_code, uuid_tx)
+                dedup.persist_data(uuid_tx, payload)
+                self.session.flush()
+            self._commit()
+            return uuid_tx, True
+        except IntegrityError:
+            self._recover()
+            invalidate_fingerprints(dedup, [fingerprint])
+            return dedup.find_existing_uuid(fingerprint), False
+
+    def _deduplication(self, process_code: str) -> DeduplicationStrategy:
+        """Strategy of ``process_code``: the tracker's own, else the registered one."""
+        strategy = self.deduplication.get(process_code)
+        return strategy if strategy is not None else DeduplicationRegistry.get(process_code)
+
+    def _start_reserved(self,
+                        reserve: Callable[[str, str, Any], str],
+                        process_code: str,
+                        fingerprint: str,
+                        payload: Any) -> Tuple[str, bool]:
+        """``start_or_resume`` for strategies with the ``reserve_fingerprint`` hook.
+
+        The strategy stores the fingerprint and returns the uuid that owns it
+        in one step. When another worker won the race, nothing else is
+        written and nothing is rolled back.
+        """
         uuid_tx = str(uuid.uuid4())
+        with self._atomic():
+            winner = reserve(fingerprint, uuid_tx, payload)
+            if winner == uuid_tx:
+                self._add_process(process_code, uuid_tx)
+                self.session.flush()
+        self._commit()
+        return winner, winner == uuid_tx
+
+    def start_or_resume_many(self,
+                             process_code: str,
+                             payloads: Iterable[Any],
+                             chunk_size: int = 1000) -> List[Tuple[str, bool]]:
+        """Batch version of ``start_or_resume``.
+
+        Fingerprints are calculated up front and resolved with one lookup per
+        chunk. New ``TxProcess`` rows and their deduplication data are written
+        in bulk and committed once per chunk. Payloads repeated inside the
+        batch resolve to the uuid created for their first occurrence.
+
+        Deduplication strategies must not commit themselves: the tracker
+        commits (or, in deferred mode, flushes) once their data is added.
+
+        If a chunk hits an ``IntegrityError`` (another worker inserted the same
+        fingerprint concurrently), the chunk is rolled back and replayed one
+        payload at a time through ``start_or_resume``.
+
+        Returns:
+            One (uuid, is_new_transaction) tuple per payload, in input order.
+        """
+        dedup = self._deduplication(process_code)
+        payloads = list(payloads)
+        batch = IntakeBatch(payloads, [dedup.calculate_fingerprint(p) for p in payloads])
+
+        for indexes in batch.chunks(chunk_size):
+            lookup = batch.lookup(indexes)
+            existing = resolve_existing_uuids(dedup, lookup) if lookup else {}
+            new_items = batch.assign(indexes, existing, lambda: str(uuid.uuid4()))
+
+            if new_items:
+                try:
+                    with self._atomic():
+                        self._add_processes(process_code, [uuid_tx for uuid_tx, _ in new_items])
+                        persist_all(dedup, new_items)
+                        self.session.flush()
+                    self._commit()
+                except IntegrityError:
+                    self._recover()
+                    invalidate_fingerprints(dedup, [batch.fingerprints[i] for i in indexes])
+                    batch.discard(indexes)
+                    for i in indexes:
+                        batch.replayed(i, *self.start_or_resume(process_code, payloads[i]))
+                    continue
+
+            batch.accept()
+
+        return batch.results
+
+    def _add_process(self, process_code: str, uuid_tx: str) -> None:
+        """Add a new PENDING ``TxProcess`` (and its plan when configured)."""
         self.session.add(
             TxProcess(
                 uuid=uuid_tx,
                 process_code=process_code,
                 state=TransactionState.PENDING.value,
+                total_stages=self._plan_size(),
                 created_at=datetime.now()
             )
         )
+        if self.materialize_on_start:
+            self._insert_plan([uuid_tx])
 
-        try:
-            dedup.persist_data(uuid_tx, payload)
-            self.session.commit()
-            return uuid_tx, True
-        except IntegrityError:
-            self.session.rollback()
-            return dedup.find_existing_uuid(fingerprint), False
+    def _add_processes(self, process_code: str, uuids: List[str]) -> None:
+        """Bulk version of ``_add_process``."""
+        self._insert_processes(process_code, uuids)
+        if self.materialize_on_start:
+            self._insert_plan(uuids)
+
+    def _insert_processes(self, process_code: str, uuids: List[str]) -> None:
+        """Bulk insert new PENDING ``TxProcess`` rows."""
+        now = datetime.now()
+        total_stages = self._plan_size()
+        self.session.execute(
+            insert(TxProcess),
+            [
+                {
+                    "uuid": uuid_tx,
+                    "process_code": process_code,
+                    "state": TransactionState.PENDING.value,
+                    "total_stages": total_stages,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for uuid_tx in uuids
+            ],
+        )
+
+    def _plan_size(self) -> int:
+        """Number of stages a new transaction starts with."""
+        if not self.materialize_on_start:
+            return 0
+        return len(PlatformRegistry.snapshot().plan)
 
     def start_stage(self,
                     uuid: str,
@@ -77,7 +379,78 @@ class SqlTransactionTracker(TransactionTracker):
                 error_description=None,
             )
         )
-        self.session.commit()
+        (
+            self.session.query(TxProcess)
+            .filter(TxProcess.uuid == uuid)
+            .update(
+                {"total_stages": TxProcess.total_stages + 1, "version": TxProcess.version + 1},
+                synchronize_session=False,
+            )
+        )
+        self._commit()
+
+    def materialize_plan(self, uuids: Union[str, Iterable[str]]) -> None:
+        """Create every stage of the catalog for one or many transactions.
+
+        All ``TxStage`` rows (every platform in ``PlatformRegistry`` times its
+        stages) are written with a single bulk insert and one commit. Stages
+        that already exist are left untouched. The stage counters of the
+        transactions are then recomputed.
+        """
+        if isinstance(uuids, str):
+            uuids = [uuids]
+
+        uuids = list(uuids)
+        self._insert_plan(uuids)
+        self._recompute_counters(uuids)
+        self._commit()
+
+    def repair_stage_counters(self, uuids: Optional[Iterable[str]] = None) -> int:
+        """Recompute the stage counters of ``TxProcess`` from ``RPA_TX_STAGE``.
+
+        Run it after writing stages outside the tracker. ``ensure_columns``
+        already fills the counters when it adds them.
+
+        Args:
+            uuids: Transactions to repair; all of them when None.
+
+        Returns:
+            Number of processes updated.
+        """
+        repaired = self._recompute_counters(None if uuids is None else list(uuids))
+        self._commit()
+        return repaired
+
+    def _recompute_counters(self, uuids: Optional[List[str]]) -> int:
+        """Set the stage counters of ``uuids`` (or every process) with one UPDATE per chunk."""
+        statement = stage_counters_update().execution_options(synchronize_session=False)
+
+        if uuids is None:
+            return self.session.execute(statement).rowcount
+
+        return sum(
+            self.session.execute(statement.where(TxProcess.uuid.in_(chunk))).rowcount
+            for chunk in chunked(uuids)
+        )
+
+    def _insert_plan(self, uuids: List[str]) -> None:
+        """Bulk insert the PENDING stage plan for ``uuids`` ignoring existing rows."""
+        plan = PlatformRegistry.snapshot().plan
+        insert_ignore(
+            self.session,
+            TxStage,
+            [
+                {
+                    "uuid": uuid_tx,
+                    "system": system,
+                    "stage": stage_name,
+                    "state": TransactionState.PENDING.value,
+                    "attempt": 0,
+                }
+                for uuid_tx in uuids
+                for system, stage_name in plan
+            ],
+        )
 
     def log_event(
         self,
@@ -109,7 +482,7 @@ class SqlTransactionTracker(TransactionTracker):
             )
         )
 
-        self.session.commit()
+        self._commit()
 
     def finish_stage(
         self,
@@ -125,88 +498,172 @@ class SqlTransactionTracker(TransactionTracker):
         Logic:
         - COMPLETED stage -> Check if all stages completed -> Update process
         - REJECTED stage -> Update process to REJECTED (stop flow)
-        - TERMINATED stage -> Update process to TERMINATED (retry later)
+        - TERMINATED stage -> Update process to TERMINATED (retry later,
+          after the backoff of the platform's ``RetryPolicy``)
         """
-        # Optimistic update: only update if still PENDING
-        updated = (
-            self.session.query(TxStage)
-            .filter(
-                TxStage.uuid == uuid,
-                TxStage.system == system,
-                TxStage.stage == stage,
-                TxStage.state.in_([
-                    TransactionState.PENDING.value,
-                    TransactionState.TERMINATED.value
-                ])
-            )
-            .update(
-                {
-                    "state": state.value,
-                    "error_type": error_type.value if error_type else None,
-                    "error_description": description,
-                    "last_attempt_at": datetime.now(),
-                    "attempt": TxStage.attempt + 1  # Increment attempt
-                },
-                synchronize_session=False
+        now = datetime.now()
+        values = {
+            "state": state.value,
+            "error_type": error_type.value if error_type else None,
+            "error_description": description,
+            "last_attempt_at": now,
+            "attempt": TxStage.attempt + 1,  # Increment attempt
+            "next_attempt_at": None,
+            "claimed_by": None,
+            "claimed_until": None,
+        }
+
+        # Optimistic update: only update if still finishable. One state at a
+        # time, so the previous state is known for the process counters.
+        previous_state = None
+        for candidate in FINISHABLE_STAGE_STATES:
+            updated = (
+                self.session.query(TxStage)
+                .filter(
+                    TxStage.uuid == uuid,
+                    TxStage.system == system,
+                    TxStage.stage == stage,
+                    TxStage.state == candidate
+                )
+                .update(values, synchronize_session=False)
             )
-        )
+            if updated:
+                previous_state = candidate
+                break
 
-        if updated == 0:
+        if previous_state is None:
             # Another worker already processed this stage
             # This is normal in concurrent scenarios, just skip
             return
 
-        self._update_process_state(uuid, state, error_type, description)
+        if state == TransactionState.TERMINATED:
+            self._schedule_retry(uuid, system, stage, now)
 
-        self.session.commit()
+        self._update_process_state(uuid, state, error_type, description, previous_state)
+        self._record_attempt(system, state == TransactionState.TERMINATED, now)
+
+        self._commit()
 
         return (state.value, error_type.value if error_type else None, description)
 
+    def _schedule_retry(self, uuid: str, system: str, stage: str, now: datetime) -> None:
+        """Store when a TERMINATED stage is due again, per its retry policy."""
+        policy = RetryPolicyRegistry.get(system)
+        if not policy.backs_off:
+            return
+
+        stage_filter = (TxStage.uuid == uuid, TxStage.system == system, TxStage.stage == stage)
+        attempt = self.session.query(TxStage.attempt).filter(*stage_filter).scalar()
+        (
+            self.session.query(TxStage)
+            .filter(*stage_filter)
+            .update({"next_attempt_at": policy.next_attempt_at(attempt, now)}, synchronize_session=False)
+        )
+
     def _update_process_state(
         self,
         uuid: str,
         stage_state: TransactionState,
         error_type: Optional[ErrorType],
         description: Optional[str],
+        previous_stage_state: str,
     ) -> None:
-        """Update process state based on stage completion."""
+        """Update process state and stage counters based on stage completion."""
+        if self.optimistic_locking:
+            self._update_process_state_optimistic(uuid, stage_state, error_type, description, previous_stage_state)
+            return
+
         process = (
             self.session.query(TxProcess)
             .filter_by(uuid=uuid)
             .with_for_update()
+            .populate_existing()
             .one())
 
-        if stage_state == TransactionState.REJECTED:
-            # Business error -> Stop process
-            process.state = TransactionState.REJECTED.value
-            process.error_type = error_type.value if error_type else None
-            process.error_description = description
+        for attribute, delta in counter_deltas(previous_stage_state, stage_state.value).items():
+            setattr(process, attribute, getattr(process, attribute) + delta)
+
+        changes = process_transition(
+            process.state,
+            stage_state,
+            error_type,
+            description,
+            lambda: self._are_all_stages_completed(process),
+        )
+        for attribute, value in changes.items():
+            setattr(process, attribute, value)
 
+        if cancels_pending_stages(stage_state):
             # Cancel all pending stages
-            self._cancel_pending_stages(uuid)
-
-        elif stage_state == TransactionState.TERMINATED:
-            # System error -> Mark for retry (only if not already rejected)
-            if process.state != TransactionState.REJECTED.value:
-                process.state = TransactionState.TERMINATED.value
-                process.error_type = error_type.value if error_type else None
-                process.error_description = description
-
-        elif stage_state == TransactionState.COMPLETED:
-            # Check if all stages are completed
-            all_stages_completed = self._are_all_stages_completed(uuid)
-
-            if all_stages_completed:
-                # All stages completed -> Process completed
-                process.state = TransactionState.COMPLETED.value
-                process.error_type = None
-                process.error_description = None
-            else:
-                # Still has pending stages -> Keep as IN_PROGRESS
-                if process.state == TransactionState.PENDING.value:
-                    process.state = TransactionState.IN_PROGRESS.value
-
-    def _cancel_pending_stages(self, uuid: str) -> None:
+            process.failed_stages += self._cancel_pending_stages(uuid)
+        process.version += 1
+
+    def _update_process_state_optimistic(
+        self,
+        uuid: str,
+        stage_state: TransactionState,
+        error_type: Optional[ErrorType],
+        description: Optional[str],
+        previous_stage_state: str,
+    ) -> None:
+        """``_update_process_state`` without row locks.
+
+        Reads the process, applies the same rules and writes the result with
+        one UPDATE conditioned on the version that was read. When another
+        worker changed the process in between, nothing matches and the
+        process is read again.
+
+        Raises:
+            StaleDataError: If every one of ``OPTIMISTIC_ATTEMPTS`` updates
+                lost. The caller rolls back and finishes the stage again.
+        """
+        deltas = counter_deltas(previous_stage_state, stage_state.value)
+        for _ in range(self.OPTIMISTIC_ATTEMPTS):
+            process = self.session.execute(
+                select(
+                    TxProcess.state,
+                    TxProcess.total_stages,
+                    TxProcess.completed_stages,
+                    TxProcess.failed_stages,
+                    TxProcess.version,
+                )
+                .where(TxProcess.uuid == uuid)
+            ).one()
+
+            values = {attribute: getattr(process, attribute) + delta for attribute, delta in deltas.items()}
+            values.update(process_transition(
+                process.state,
+                stage_state,
+                error_type,
+                description,
+                lambda: all_stages_closed(process.total_stages, values["completed_stages"], values["failed_stages"]),
+            ))
+            values["version"] = process.version + 1
+
+            updated = self.session.execute(
+                update(TxProcess)
+                .where(TxProcess.uuid == uuid, TxProcess.version == process.version)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if updated:
+                break
+        else:
+            raise StaleDataError(f"Process {uuid} changed in each of {self.OPTIMISTIC_ATTEMPTS} update attempts")
+
+        if cancels_pending_stages(stage_state):
+            cancelled = self._cancel_pending_stages(uuid)
+            if cancelled:
+                (
+                    self.session.query(TxProcess)
+                    .filter(TxProcess.uuid == uuid)
+                    .update(
+                        {"failed_stages": TxProcess.failed_stages + cancelled, "version": TxProcess.version + 1},
+                        synchronize_session=False,
+                    )
+                )
+
+    def _cancel_pending_stages(self, uuid: str) -> int:
         """Cancel all PENDING stages for a transaction.
 
         Uses optimistic update to avoid locking all stages.
@@ -221,7 +678,7 @@ class SqlTransactionTracker(TransactionTracker):
             .update(
                 {
                     "state": TransactionState.CANCELLED.value,
-                    "error_description": "Cancelled due to previous platform rejection"
+                    "error_description": CANCELLED_DESCRIPTION
                 },
                 synchronize_session=False
             )
@@ -229,22 +686,10 @@ class SqlTransactionTracker(TransactionTracker):
 
         return updated_count
 
-    def _are_all_stages_completed(self, uuid: str) -> bool:
-        """Check if all stages for a transaction are completed."""
-        # Count pending stages
-        pending_count = (
-            self.session.query(func.count(TxStage.uuid))
-            .filter(
-                TxStage.uuid == uuid,
-                TxStage.state.in_([
-                    TransactionState.PENDING.value,
-                    TransactionState.IN_PROGRESS.value,
-                ])
-            )
-            .scalar()
-        )
-
-        return pending_count == 0
+    @staticmethod
+    def _are_all_stages_completed(process: TxProcess) -> bool:
+        """Check if all stages for a transaction are completed, from its counters."""
+        return all_stages_closed(process.total_stages, process.completed_stages, process.failed_stages)
 
     def get_executable_stages(self, uuid: str) -> List[TxStage]:
         """Returns stages that can be executed (PENDING or REJECTED).
@@ -276,12 +721,305 @@ class SqlTransactionTracker(TransactionTracker):
         1. Stage is PENDING
         2. Process is PENDING, IN_PROGRESS, or TERMINATED
         3. All previous platforms have completed successfully
+
+        Stages leased by ``claim_pending_stages`` are skipped until the lease
+        expires, and TERMINATED stages until their retry backoff
+        (``next_attempt_at``) has elapsed.
+
+        Eligibility is resolved in a single statement, so the number of
+        round trips does not grow with the size of the backlog.
+
+        While the platform's circuit breaker is open nothing is returned; when
+        it half-opens, one caller gets a single probe stage. The probe lease
+        is committed on its own as soon as it is handed out, so other callers
+        see it whatever happens to the caller's transaction.
+
+        A platform with ``max_rate_per_minute`` hands out at most that many
+        stages per minute to all callers together; each returned stage takes
+        a token. Like the probe lease, the tokens are committed on their own
+        and the caller's session is never committed.
+
+        ``max_concurrency`` is only enforced by ``claim_pending_stages``: the
+        stages returned here are not leased, so they do not occupy a slot.
+        At most the free slots are returned, but several callers may each
+        receive them. Workers that share a concurrency cap should claim.
         """
-        policy = RetryPolicyRegistry.get(system)
+        now = datetime.now()
+        limit = self._admit(system, now)
+        if limit == 0:
+            return []
+
+        query = self._eligible_stages_query(system, stage, now)
+        platform = self._limited_platform(system)
+        if platform is not None:
+            return self._dispatch(query, platform, limit, now)
+        if limit is not None:
+            query = query.order_by(TxStage.uuid).limit(limit)
+        return query.all()
+
+    def next_due_at(self,
+                    system: str,
+                    stage: str = DEFAULT_STAGE) -> Optional[datetime]:
+        """When the next stage of ``system`` becomes eligible.
+
+        Considers the stages ``get_pending_stages`` would return if there were
+        no retry backoff. Returns the current time if one of them is due
+        already, the earliest ``next_attempt_at`` if all of them are waiting
+        for their backoff, and None if there are none. Schedulers can sleep
+        until that time instead of polling.
+        """
+        now = datetime.now()
+        due = (
+            self._eligible_stages_query(system, stage, now, due=False)
+            .with_entities(func.min(func.coalesce(TxStage.next_attempt_at, now)))
+            .scalar()
+        )
+        if due is None:
+            return None
+
+        policy = self._circuit_policy(system)
+        blocked = self._circuits.blocked_until(system, policy) if policy is not None else None
+        platform = self._limited_platform(system)
+        token = self._limiter.next_token_at(platform, now) if platform is not None else None
+        return max(due, blocked or now, token or now, now)
+
+    def _circuit_policy(self, system: str) -> Optional[CircuitBreakerPolicy]:
+        platform = PlatformRegistry.snapshot().by_code.get(system)
+        return platform.circuit_breaker if platform is not None else None
+
+    @staticmethod
+    def _limited_platform(system: str) -> Optional[PlatformDefinition]:
+        """The platform of ``system`` if it has a concurrency cap or a rate limit."""
+        platform = PlatformRegistry.snapshot().by_code.get(system)
+        return platform if platform is not None and platform.limits_dispatch else None
+
+    def _admit(self, system: str, now: Optional[datetime] = None) -> Optional[int]:
+        """How many stages of ``system`` the circuit breaker and dispatch limits let through (None = all).
+
+        Dispatch limits are only peeked at here; ``_take`` takes the tokens.
+        """
+        now = now or datetime.now()
+        limit = None
+        policy = self._circuit_policy(system)
+        if policy is not None:
+            with self._admission() as session:
+                limit = SqlCircuitBreaker(session).admit(system, policy, now)
+            if limit == 0:
+                return 0
+
+        platform = self._limited_platform(system)
+        if platform is not None:
+            available = self._limiter.available(platform, now)
+            limit = available if limit is None else min(limit, available)
+        return limit
+
+    def _take(self,
+              platform: PlatformDefinition,
+              uuids: List[str],
+              now: datetime,
+              lease: Optional[Tuple[str, datetime]] = None) -> List[str]:
+        """Keep the candidates the platform's dispatch limits grant, taking their tokens in ``_admission``.
+
+        ``lease`` identifies the candidates' leases when the caller leased them already.
+        """
+        if not uuids:
+            return uuids
+        with self._admission() as session:
+            granted = SqlRateLimiter(session).acquire(platform, len(uuids), now, lease)
+        return uuids[:granted]
+
+    def _dispatch(self, query, platform: PlatformDefinition, limit: Optional[int], now: datetime) -> List[TxStage]:
+        """Return the eligible stages of ``query`` granted by the platform's dispatch limits."""
+        uuids = [row.uuid for row in query.with_entities(TxStage.uuid).order_by(TxStage.uuid).limit(limit)]
+        uuids = self._take(platform, uuids, now)
+        if not uuids:
+            return []
+        return query.filter(TxStage.uuid.in_(uuids)).order_by(TxStage.uuid).all()
+
+    def _record_attempt(self, system: str, failed: bool, now: datetime) -> None:
+        """Feed a finished stage of ``system`` to its circuit breaker, if any."""
+        policy = self._circuit_policy(system)
+        if policy is not None:
+            self._circuits.record(system, policy, failed, now)
+
+    def iter_pending_stages(self,
+                            system: str,
+                            stage: str = DEFAULT_STAGE,
+                            page_size: int = 1000) -> Iterator[TxStage]:
+        """Stream the stages returned by ``get_pending_stages``.
+
+        Pages are read with keyset pagination on ``uuid`` (unique within a
+        system/stage), so each page is an index range scan instead of an
+        OFFSET. Once the caller moves past a page, its objects are expunged
+        from the session, keeping memory flat regardless of the backlog size.
+
+        Stages finished while iterating do not affect the following pages,
+        since pagination does not depend on their state.
+
+        Honors the platform's circuit breaker like ``get_pending_stages``. A
+        platform with dispatch limits yields a single batch of the stages it
+        grants.
+        """
+        now = datetime.now()
+        limit = self._admit(system, now)
+        if limit == 0:
+            return
+
+        platform = self._limited_platform(system)
+        if platform is not None:
+            yield from self._dispatch(self._eligible_stages_query(system, stage, now), platform, limit, now)
+            return
+        if limit is not None:
+            # Half-open circuit: a single page holding the probe
+            page_size = limit
+
+        last_uuid = None
+        while True:
+            query = self._eligible_stages_query(system, stage)
+            if last_uuid is not None:
+                query = query.filter(TxStage.uuid > last_uuid)
+
+            page = (
+                query
+                .order_by(TxStage.uuid)
+                .limit(page_size)
+                .all()
+            )
+            if not page:
+                return
+
+            last_uuid = page[-1].uuid
+            yield from page
+
+            for stage_obj in page:
+                if stage_obj in self.session:
+                    self.session.expunge(stage_obj)
+
+            if len(page) < page_size or limit is not None:
+                return
+
+    def claim_pending_stages(self,
+                             system: str,
+                             stage: str,
+                             worker_id: str,
+                             limit: int = 100,
+                             lease_seconds: int = 300,
+                             exclude_uuids: Collection[str] = ()) -> List[TxStage]:
+        """Atomically lease up to ``limit`` eligible stages for ``worker_id``.
+
+        Claimed stages are hidden from ``get_pending_stages`` and from other
+        claims until they are finished or the lease expires, so several
+        workers can poll the same platform without racing for the same rows.
+
+        PostgreSQL and MySQL/MariaDB pick the rows with
+        ``SELECT ... FOR UPDATE SKIP LOCKED``. Other dialects (SQLite) use a
+        conditional UPDATE that only takes rows whose lease is free or expired,
+        then read back the rows this worker won.
+
+        Stages of the transactions in ``exclude_uuids`` are never claimed,
+        e.g. the ones that already failed in the current run.
+
+        The platform's ``max_concurrency`` bounds the stages leased at once
+        and ``max_rate_per_minute`` the stages claimed per minute, across
+        every worker sharing the database. Tokens are only taken for the
+        stages this call won. Won stages beyond the granted tokens or free
+        slots are released again before returning.
+
+        Returns:
+            The stages leased by this call; may be fewer than ``limit`` when
+            other workers won some of the candidates.
+        """
+        now = datetime.now()
+        # Whole seconds, so the lease can be matched back on every dialect
+        until = (now + timedelta(seconds=lease_seconds)).replace(microsecond=0)
+
+        admitted = self._admit(system, now)
+        if admitted == 0:
+            return []
+        if admitted is not None:
+            limit = min(limit, admitted)
+
+        candidates = self._eligible_stages_query(system, stage, now)
+        if exclude_uuids:
+            candidates = candidates.filter(TxStage.uuid.notin_(list(exclude_uuids)))
+        candidates = (
+            candidates
+            .with_entities(TxStage.uuid)
+            .order_by(TxStage.uuid)
+            .limit(limit)
+        )
+        if supports_skip_locked(self.session):
+            candidates = candidates.with_for_update(skip_locked=True, of=TxStage)
+
+        uuids = [row.uuid for row in candidates]
+        if not uuids:
+            return []
+
+        (
+            self.session.query(TxStage)
+            .filter(
+                TxStage.system == system,
+                TxStage.stage == stage,
+                TxStage.uuid.in_(uuids),
+                TxStage.state.in_(FINISHABLE_STAGE_STATES),
+                or_(TxStage.claimed_until.is_(None), TxStage.claimed_until <= now),
+            )
+            .update(
+                {"claimed_by": worker_id, "claimed_until": until},
+                synchronize_session=False,
+            )
+        )
+        self._commit()
+
+        won = (
+            self.session.query(TxStage)
+            .filter(
+                TxStage.system == system,
+                TxStage.stage == stage,
+                TxStage.uuid.in_(uuids),
+                TxStage.claimed_by == worker_id,
+                TxStage.claimed_until == until,
+            )
+            .order_by(TxStage.uuid)
+            .populate_existing()
+            .all()
+        )
+
+        platform = self._limited_platform(system)
+        if platform is None or not won:
+            return won
+
+        granted = self._take(platform, [s.uuid for s in won], now, (worker_id, until))
+        released = [s.uuid for s in won[len(granted):]]
+        if released:
+            (
+                self.session.query(TxStage)
+                .filter(
+                    TxStage.system == system,
+                    TxStage.stage == stage,
+                    TxStage.uuid.in_(released),
+                    TxStage.claimed_by == worker_id,
+                    TxStage.claimed_until == until,
+                )
+                .update({"claimed_by": None, "claimed_until": None}, synchronize_session=False)
+            )
+            self._commit()
+        return won[:len(granted)]
+
+    def _eligible_stages_query(self, system: str, stage: str, now: Optional[datetime] = None, due: bool = True):
+        """Build the query that selects the stages eligible for execution.
+
+        With ``due=False`` stages still waiting for their retry backoff are
+        included.
 
-        # Get platform order
-        platform = PlatformRegistry.get(system)
-        current_order = platform.order
+        Previous platforms (the predecessors in the compiled catalog) are
+        checked with one correlated subquery per platform: the number of
+        COMPLETED stages of that platform for the same transaction must reach
+        the number of stages declared in the catalog.
+        """
+        now = now or datetime.now()
+        policy = RetryPolicyRegistry.get(system)
+        catalog = PlatformRegistry.snapshot()
 
         query = (
             self.session.query(TxStage)
@@ -297,77 +1035,45 @@ class SqlTransactionTracker(TransactionTracker):
                     TransactionState.PENDING.value,
                     TransactionState.IN_PROGRESS.value,
                     TransactionState.TERMINATED.value,  # 👈 Include for retry
-                ])
+                ]),
+                or_(TxStage.claimed_until.is_(None), TxStage.claimed_until <= now),
             )
         )
 
         if policy.max_attempts is not None:
             query = query.filter(TxStage.attempt < policy.max_attempts)
 
-        pending_stages = query.all()
-
-        # 👇 NUEVA LÓGICA: Filter by previous platforms completion
-        eligible_stages = []
-
-        for stage_obj in pending_stages:
-            if self._are_previous_platforms_completed(stage_obj.uuid, current_order):
-                eligible_stages.append(stage_obj)
-
-        return eligible_stages
+        if due:
+            query = query.filter(or_(TxStage.next_attempt_at.is_(None), TxStage.next_attempt_at <= now))
 
-    def _are_previous_platforms_completed(self, uuid: str, current_order: int) -> bool:
-        """Check if all platforms with lower order are completed for this transaction.
-
-        A platform is considered "completed" if ALL its stages are COMPLETED.
-
-        Args:
-            uuid: Transaction UUID
-            current_order: Order of current platform
-
-        Returns:
-            True if all previous platforms completed, False otherwise
-        """
-        if current_order == 1:
-            # First platform, no previous platforms to check
-            return True
-
-        # First, check if process is REJECTED (should not continue)
-        process = self.session.query(TxProcess).filter_by(uuid=uuid).first()
-        if not process or process.state == TransactionState.REJECTED.value:
-            return False
-
-        # Get all platforms with lower order
-        previous_platforms = [
-            p for p in PlatformRegistry.all()
-            if p.order < current_order
-        ]
-
-        for prev_platform in previous_platforms:
-            # Count completed stages for this platform
+        for prev_platform in self._previous_platforms(system):
+            done = aliased(TxStage)
             completed_count = (
-                self.session.query(func.count(TxStage.uuid))
-                .filter(
-                    TxStage.uuid == uuid,
-                    TxStage.system == prev_platform.code,
-                    TxStage.state == TransactionState.COMPLETED.value
+                select(func.count())
+                .select_from(done)
+                .where(
+                    done.uuid == TxStage.uuid,
+                    done.system == prev_platform.code,
+                    done.state == TransactionState.COMPLETED.value,
                 )
-                .scalar()
+                .correlate(TxStage)
+                .scalar_subquery()
             )
-
             # All stages of the platform must be completed
-            expected_stages = len(prev_platform.stages)
+            query = query.filter(completed_count >= catalog.expected_stages[prev_platform.code])
 
-            if completed_count < expected_stages:
-                # Not all stages completed for this platform
-                return False
+        return query
 
-        return True
+    @staticmethod
+    def _previous_platforms(system: str) -> Tuple[PlatformDefinition, ...]:
+        """Return the platforms that must be completed before ``system``."""
+        return PlatformRegistry.snapshot().predecessors[system]
 
     def complete_stage(
         self,
         uuid: str,
         system: str,
-        result: ExecutionResult,
+        result: AnyExecutionResult,
         stage: str = DEFAULT_STAGE,
         auto_commit: bool = False
     ) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
@@ -378,7 +1084,7 @@ class SqlTransactionTracker(TransactionTracker):
         Args:
             uuid: Transaction UUID
             system: Platform code
-            result: ExecutionResult with state, error_type, etc.
+            result: ExecutionResult (or FastExecutionResult) with state, error_type, etc.
             stage: Stage name (default: "default")
             auto_commit: If True, commits automatically after finishing
 
@@ -390,27 +1096,206 @@ class SqlTransactionTracker(TransactionTracker):
             # Or with auto-commit:
             tracker.complete_stage(uuid, "A", result, auto_commit=True)
         """
-        # Log event
-        self.log_event(
-            uuid=uuid,
-            system=system,
-            error_code=result.error_code,
-            description=result.description,
-            stage=stage,
-        )
+        # The event and the stage finish are committed together, and count
+        # as one operation inside batch()
+        with self._composite():
+            # Log event
+            self.log_event(
+                uuid=uuid,
+                system=system,
+                error_code=result.error_code,
+                description=result.description,
+                stage=stage,
+            )
 
-        # Finish stage
-        ret = self.finish_stage(
-            uuid=uuid,
-            system=system,
-            state=result.state,
-            error_type=result.error_type,
-            description=result.description,
-            stage=stage,
-        )
+            # Finish stage
+            ret = self.finish_stage(
+                uuid=uuid,
+                system=system,
+                state=result.state,
+                error_type=result.error_type,
+                description=result.description,
+                stage=stage,
+            )
+        self._commit()
 
         # Optional auto-commit
         if auto_commit:
             self.session.commit()
 
         return ret
+
+    def complete_stages(
+        self,
+        items: Iterable[Tuple[str, str, str, AnyExecutionResult]],
+    ) -> List[Optional[Tuple[str, Optional[str], Optional[str]]]]:
+        """Complete many stages in one database transaction.
+
+        Batch version of ``complete_stage``. Each item is
+        ``(uuid, system, stage, result)`` and items are applied in order, with
+        the same rules as calling ``complete_stage`` once per item:
+
+        - the stages and processes involved are read once, with row locks;
+        - all ``TxEvent`` rows are written with a single executemany;
+        - stage and process updates are grouped by resulting state and
+          written with one executemany per group;
+        - the whole batch is committed once.
+
+        Returns:
+            One entry per item: what ``finish_stage`` would have returned,
+            i.e. ``(state, error_type, description)`` or None when the stage
+            had already been processed.
+
+        Raises:
+            NoResultFound: If a stage or its process does not exist. Nothing
+                is written in that case.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        uuids = list(dict.fromkeys(item[0] for item in items))
+        stages, processes = self._load_batch_rows(uuids)
+
+        stages_by_uuid: Dict[str, List[dict]] = {}
+        for stage_row in stages.values():
+            stages_by_uuid.setdefault(stage_row["uuid"], []).append(stage_row)
+
+        now = datetime.now()
+        events = []
+        dirty_stages = {}
+        dirty_processes = {}
+        attempts: List[Tuple[str, bool]] = []  # (system, failed with a system error) per finished stage
+        results: List[Optional[Tuple[str, Optional[str], Optional[str]]]] = []
+
+        for uuid_tx, system, stage, result in items:
+            stage_row = stages.get((uuid_tx, system, stage))
+            process = processes.get(uuid_tx)
+            if stage_row is None or process is None:
+                raise NoResultFound(
+                    f"No stage {system}/{stage} found for transaction {uuid_tx}"
+                )
+
+            events.append({
+                "uuid": uuid_tx,
+                "system": system,
+                "stage": stage,
+                "attempt": stage_row["attempt"] + 1,
+                "error_code": result.error_code,
+                "description": result.description,
+                "event_at": now,
+                "processed_at": now,
+            })
+
+            if stage_row["state"] not in FINISHABLE_STAGE_STATES:
+                # Already processed, same as finish_stage
+                results.append(None)
+                continue
+
+            error_value = result.error_type.value if result.error_type else None
+            for attribute, delta in counter_deltas(stage_row["state"], result.state.value).items():
+                process[attribute] += delta
+            stage_row.update(
+                state=result.state.value,
+                error_type=error_value,
+                error_description=result.description,
+                last_attempt_at=now,
+                attempt=stage_row["attempt"] + 1,
+                next_attempt_at=(
+                    RetryPolicyRegistry.get(system).next_attempt_at(stage_row["attempt"] + 1, now)
+                    if result.state == TransactionState.TERMINATED else None
+                ),
+                claimed_by=None,
+                claimed_until=None,
+            )
+            dirty_stages[(uuid_tx, system, stage)] = stage_row
+
+            siblings = stages_by_uuid[uuid_tx]
+            process.update(process_transition(
+                process["state"],
+                result.state,
+                result.error_type,
+                result.description,
+                lambda: all_stages_closed(
+                    process["total_stages"], process["completed_stages"], process["failed_stages"]
+                ),
+            ))
+            dirty_processes[uuid_tx] = process
+
+            if cancels_pending_stages(result.state):
+                for sibling in siblings:
+                    if sibling["state"] == TransactionState.PENDING.value:
+                        sibling.update(
+                            state=TransactionState.CANCELLED.value,
+                            error_description=CANCELLED_DESCRIPTION,
+                        )
+                        process["failed_stages"] += 1
+                        dirty_stages[(sibling["uuid"], sibling["system"], sibling["stage"])] = sibling
+
+            results.append((result.state.value, error_value, result.description))
+            attempts.append((system, result.state == TransactionState.TERMINATED))
+
+        self.session.execute(insert(TxEvent), events)
+        self._bulk_update_by_state(TxStage, dirty_stages.values())
+        for process in dirty_processes.values():
+            process["version"] += 1
+        self._bulk_update_by_state(TxProcess, dirty_processes.values())
+        for system, failed in attempts:
+            self._record_attempt(system, failed, now)
+        self._commit()
+
+        return results
+
+    def _load_batch_rows(self, uuids: List[str]) -> Tuple[Dict[tuple, dict], Dict[str, dict]]:
+        """Read and lock every stage and process of ``uuids`` as plain dicts."""
+        stages: Dict[tuple, dict] = {}
+        processes: Dict[str, dict] = {}
+
+        for chunk in chunked(uuids):
+            stage_rows = self.session.execute(
+                select(
+                    TxStage.uuid,
+                    TxStage.system,
+                    TxStage.stage,
+                    TxStage.state,
+                    TxStage.attempt,
+                    TxStage.error_type,
+                    TxStage.error_description,
+                    TxStage.last_attempt_at,
+                    TxStage.next_attempt_at,
+                    TxStage.claimed_by,
+                    TxStage.claimed_until,
+                )
+                .where(TxStage.uuid.in_(chunk))
+                .with_for_update()
+            )
+            for row in stage_rows.mappings():
+                stages[(row["uuid"], row["system"], row["stage"])] = dict(row)
+
+            process_rows = self.session.execute(
+                select(
+                    TxProcess.uuid,
+                    TxProcess.state,
+                    TxProcess.error_type,
+                    TxProcess.error_description,
+                    TxProcess.total_stages,
+                    TxProcess.completed_stages,
+                    TxProcess.failed_stages,
+                    TxProcess.version,
+                )
+                .where(TxProcess.uuid.in_(chunk))
+                .with_for_update()
+            )
+            for row in process_rows.mappings():
+                processes[row["uuid"]] = dict(row)
+
+        return stages, processes
+
+    def _bulk_update_by_state(self, model, rows: Iterable[dict]) -> None:
+        """Write ``rows`` by primary key, one executemany per resulting state."""
+        groups: Dict[str, List[dict]] = {}
+        for row in rows:
+            groups.setdefault(row["state"], []).append(row)
+
+        for group in groups.values():
+            self.session.execute(update(model), group)
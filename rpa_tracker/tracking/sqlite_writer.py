@@ -0,0 +1,304 @@
+"""Single-writer deployment of the SQL tracker for file-backed SQLite.
+
+SQLite lets one connection write at a time. When several robot threads write
+through their own sessions, they wait on each other's locks and fail with
+"database is locked" once the busy timeout runs out.
+
+``SqliteWriter`` sends every write of a ``SqlTransactionTracker`` to one
+dedicated thread. That thread owns its own session. Each call returns a
+``concurrent.futures.Future`` right away. The thread runs the queued
+operations in one transaction and commits once for all of them (group
+commit). Futures are resolved only after that commit.
+
+Reads such as ``get_pending_stages`` and reports keep using the callers' own
+sessions. ``create_sqlite_engine`` turns on WAL, so those reads run while the
+writer commits.
+
+Intake (``start_or_resume*``) writes deduplication data too. A registered
+strategy is bound to a caller's session, so the writer builds its own
+strategies on its session from the ``deduplication`` factories, and refuses
+intake for process codes without one.
+
+Example:
+    engine = create_sqlite_engine("tracker.db")
+    Session = sessionmaker(engine)
+    strategies = {"P": lambda session: HashedFingerprintDeduplication(session, "P", fields=["id"])}
+    with SqliteWriter(Session, deduplication=strategies) as writer:
+        uuid, is_new = writer.start_or_resume("P", payload).result()
+        writer.log_event(uuid, "A", 0, "ok")
+        state, error_type, description = writer.finish_stage(uuid, "A", TransactionState.COMPLETED).result()
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from rpa_tracker.constants import DEFAULT_STAGE
+from rpa_tracker.domain.execution_result import AnyExecutionResult
+from rpa_tracker.enums import ErrorType, TransactionState
+from rpa_tracker.tracking.deduplication.base import DeduplicationStrategy
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+log = logging.getLogger(__name__)
+
+# Tracker methods the writer thread runs
+WRITE_METHODS = (
+    "start_or_resume",
+    "start_or_resume_many",
+    "start_stage",
+    "materialize_plan",
+    "log_event",
+    "finish_stage",
+    "complete_stage",
+    "complete_stages",
+)
+
+# Write methods that also write deduplication data
+INTAKE_METHODS = ("start_or_resume", "start_or_resume_many")
+
+# Builds a deduplication strategy on the writer thread's session
+StrategyFactory = Callable[[Session], DeduplicationStrategy]
+
+_STOP = object()
+
+
+def create_sqlite_engine(path: str, busy_timeout: float = 30.0, **kwargs: Any) -> Engine:
+    """Create an engine on the SQLite file ``path`` set up for concurrent use.
+
+    Every connection gets ``journal_mode=WAL`` (readers do not block the
+    writer and the writer does not block readers), ``synchronous=NORMAL``
+    (WAL stays consistent after a crash, and commits do not wait for an
+    fsync) and a busy timeout.
+
+    Args:
+        path: Database file.
+        busy_timeout: Seconds a connection waits for a lock before failing.
+        **kwargs: Passed to ``create_engine``.
+    """
+    connect_args = {"timeout": busy_timeout, **kwargs.pop("connect_args", {})}
+    engine = create_engine(f"sqlite:///{path}", connect_args=connect_args, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def _configure(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        cursor.close()
+
+    return engine
+
+
+class _Operation(NamedTuple):
+    future: Future
+    method: str
+    args: Tuple[Any, ...]
+    kwargs: dict
+
+
+class SqliteWriter:
+    """Runs the write methods of a ``SqlTransactionTracker`` on one thread.
+
+    Operations submitted from any thread are queued. The writer thread takes
+    the first one, then everything that arrives within ``max_delay``
+    seconds, up to ``max_batch`` operations. It runs them with a deferred
+    commit tracker and commits once. When an operation raises, the
+    transaction is rolled back. That operation's future gets the exception,
+    and the rest of the group is run again without it.
+
+    Attributes:
+        operations: Operations committed so far.
+        commits: Group commits so far.
+    """
+
+    def __init__(self,
+                 session_factory: Callable[[], Session],
+                 max_batch: int = 500,
+                 max_delay: float = 0.005,
+                 deduplication: Optional[Mapping[str, StrategyFactory]] = None,
+                 **tracker_options: Any):
+        """Start the writer thread.
+
+        Args:
+            session_factory: Creates the writer thread's session, e.g. a
+                ``sessionmaker`` bound to ``create_sqlite_engine``.
+            max_batch: Maximum operations per commit.
+            max_delay: Seconds the thread waits for more operations after the
+                first one of a group.
+            deduplication: Per process code, builds its deduplication
+                strategy on the writer's session. Intake is only accepted for
+                these process codes.
+            **tracker_options: Passed to ``SqlTransactionTracker``, e.g.
+                ``materialize_on_start``.
+
+        Raises:
+            ValueError: If ``max_batch`` is not positive.
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.deduplication = dict(deduplication or {})
+        self.operations = 0
+        self.commits = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(session_factory, tracker_options),
+            name="rpa-tracker-sqlite-writer",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "SqliteWriter":
+        """Return the writer."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Commit what is queued and stop the thread."""
+        self.close()
+
+    def submit(self, method: str, *args: Any, **kwargs: Any) -> Future:
+        """Queue a call of the tracker method ``method``.
+
+        Raises:
+            ValueError: If ``method`` is not one of ``WRITE_METHODS``, or is
+                an intake method for a process code without a strategy
+                factory.
+            RuntimeError: If the writer is closed.
+        """
+        if method not in WRITE_METHODS:
+            raise ValueError(f"{method} is not a write method of the tracker")
+        if method in INTAKE_METHODS:
+            process_code = args[0] if args else kwargs.get("process_code")
+            if process_code not in self.deduplication:
+                raise ValueError(f"No deduplication factory for {process_code}; pass it in 'deduplication'")
+        if self._closed:
+            raise RuntimeError("SqliteWriter is closed")
+
+        future: Future = Future()
+        self._queue.put(_Operation(future, method, args, kwargs))
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Commit the queued operations and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def start_or_resume(self, process_code: str, payload: Any) -> Future:
+        """Queue ``start_or_resume``; the future gives (uuid, is_new_transaction)."""
+        return self.submit("start_or_resume", process_code, payload)
+
+    def start_or_resume_many(self, process_code: str, payloads: Iterable[Any], chunk_size: int = 1000) -> Future:
+        """Queue ``start_or_resume_many``."""
+        return self.submit("start_or_resume_many", process_code, list(payloads), chunk_size)
+
+    def start_stage(self, uuid: str, system: str, stage: str = DEFAULT_STAGE) -> Future:
+        """Queue ``start_stage``."""
+        return self.submit("start_stage", uuid, system, stage)
+
+    def materialize_plan(self, uuids: Union[str, Iterable[str]]) -> Future:
+        """Queue ``materialize_plan``."""
+        return self.submit("materialize_plan", uuids if isinstance(uuids, str) else list(uuids))
+
+    def log_event(self,
+                  uuid: str,
+                  system: str,
+                  error_code: int,
+                  description: Optional[str],
+                  stage: str = DEFAULT_STAGE) -> Future:
+        """Queue ``log_event``."""
+        return self.submit("log_event", uuid, system, error_code, description, stage)
+
+    def finish_stage(self,
+                     uuid: str,
+                     system: str,
+                     state: TransactionState,
+                     error_type: Optional[ErrorType] = None,
+                     description: Optional[str] = None,
+                     stage: str = DEFAULT_STAGE) -> Future:
+        """Queue ``finish_stage``."""
+        return self.submit("finish_stage", uuid, system, state, error_type, description, stage)
+
+    def complete_stage(self, uuid: str, system: str, result: AnyExecutionResult, stage: str = DEFAULT_STAGE) -> Future:
+        """Queue ``complete_stage``."""
+        return self.submit("complete_stage", uuid, system, result, stage)
+
+    def complete_stages(self, items: Iterable[Tuple[str, str, str, AnyExecutionResult]]) -> Future:
+        """Queue ``complete_stages``."""
+        return self.submit("complete_stages", list(items))
+
+    def _run(self, session_factory: Callable[[], Session], tracker_options: dict) -> None:
+        session = session_factory()
+        strategies = {code: build(session) for code, build in self.deduplication.items()}
+        tracker = SqlTransactionTracker(session, deduplication=strategies, **{**tracker_options, "autocommit": False})
+        try:
+            stop = False
+            while not stop:
+                group, stop = self._next_group()
+                if group:
+                    self._commit_group(session, tracker, group)
+        finally:
+            session.close()
+
+    def _next_group(self) -> Tuple[List[_Operation], bool]:
+        """Block for one operation, then gather what arrives within ``max_delay``."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        group = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return group, True
+            group.append(item)
+        return group, False
+
+    def _commit_group(self, session: Session, tracker: SqlTransactionTracker, group: List[_Operation]) -> None:
+        pending = [operation for operation in group if operation.future.set_running_or_notify_cancel()]
+        while pending:
+            results = []
+            failed = None
+            for index, operation in enumerate(pending):
+                try:
+                    results.append(getattr(tracker, operation.method)(*operation.args, **operation.kwargs))
+                except Exception as error:
+                    failed = index, error
+                    break
+
+            if failed is not None:
+                # Undo the group and run it again without the failing operation
+                session.rollback()
+                index, error = failed
+                pending.pop(index).future.set_exception(error)
+                continue
+
+            try:
+                session.commit()
+            except Exception as error:
+                log.exception("Group commit of %d operations failed", len(pending))
+                session.rollback()
+                for operation in pending:
+                    operation.future.set_exception(error)
+                return
+
+            self.operations += len(pending)
+            self.commits += 1
+            for operation, result in zip(pending, results):
+                operation.future.set_result(result)
+            return
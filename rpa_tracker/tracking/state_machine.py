@@ -0,0 +1,101 @@
+"""State-transition rules shared by the tracker implementations.
+
+The functions in this module are pure: they receive the current states and
+return what has to change, so the SQL tracker, its batch APIs and any other
+backend apply exactly the same rules.
+"""
+from typing import Any, Callable, Dict, Optional
+
+from rpa_tracker.enums import FAILED_STAGE_STATES, ErrorType, TransactionState
+
+CANCELLED_DESCRIPTION = "Cancelled due to previous platform rejection"
+
+
+def process_transition(
+    process_state: str,
+    stage_state: TransactionState,
+    error_type: Optional[ErrorType],
+    description: Optional[str],
+    all_stages_completed: Callable[[], bool],
+) -> Dict[str, Any]:
+    """Return the process attributes to change after a stage finished.
+
+    Logic:
+    - COMPLETED stage -> COMPLETED if all stages completed, else IN_PROGRESS
+    - REJECTED stage -> REJECTED (stop flow)
+    - TERMINATED stage -> TERMINATED (retry later), unless already REJECTED
+
+    Args:
+        process_state: Current state of the process.
+        stage_state: State the stage has just been finished with.
+        error_type: Error type of the stage result.
+        description: Description of the stage result.
+        all_stages_completed: Called only for COMPLETED stages, once the stage
+            itself has been updated.
+
+    Returns:
+        Mapping of attribute name to new value; empty if nothing changes.
+    """
+    error_value = error_type.value if error_type else None
+
+    if stage_state == TransactionState.REJECTED:
+        # Business error -> Stop process
+        return {
+            "state": TransactionState.REJECTED.value,
+            "error_type": error_value,
+            "error_description": description,
+        }
+
+    if stage_state == TransactionState.TERMINATED:
+        # System error -> Mark for retry (only if not already rejected)
+        if process_state != TransactionState.REJECTED.value:
+            return {
+                "state": TransactionState.TERMINATED.value,
+                "error_type": error_value,
+                "error_description": description,
+            }
+        return {}
+
+    if stage_state == TransactionState.COMPLETED:
+        if all_stages_completed():
+            # All stages completed -> Process completed
+            return {
+                "state": TransactionState.COMPLETED.value,
+                "error_type": None,
+                "error_description": None,
+            }
+        if process_state == TransactionState.PENDING.value:
+            # Still has pending stages -> Keep as IN_PROGRESS
+            return {"state": TransactionState.IN_PROGRESS.value}
+
+    return {}
+
+
+def counter_deltas(previous_state: Optional[str], new_state: str) -> Dict[str, int]:
+    """Return the ``TxProcess`` counter increments for a stage changing state.
+
+    Args:
+        previous_state: State the stage had, or None for a new stage.
+        new_state: State the stage has now.
+    """
+    deltas = {"completed_stages": 0, "failed_stages": 0}
+    for state, sign in ((previous_state, -1), (new_state, 1)):
+        if state == TransactionState.COMPLETED.value:
+            deltas["completed_stages"] += sign
+        elif state in FAILED_STAGE_STATES:
+            deltas["failed_stages"] += sign
+    return deltas
+
+
+def all_stages_closed(total_stages: int, completed_stages: int, failed_stages: int) -> bool:
+    """Whether no stage of a process is still open, from its counters.
+
+    Same rule as counting the stages in ``rpa_tracker.enums.OPEN_STAGE_STATES``: a transaction
+    is complete once every stage is COMPLETED or closed without completing.
+    """
+    return completed_stages + failed_stages >= total_stages
+
+
+def cancels_pending_stages(stage_state: TransactionState) -> bool:
+    """Whether finishing a stage with ``stage_state`` cancels the PENDING ones."""
+    return stage_state == TransactionState.REJECTED
@@ -0,0 +1,36 @@
+"""Commit thresholds for the deferred-commit mode of the SQL tracker."""
+import time
+from typing import Optional
+
+
+class UnitOfWork:
+    """Counts the operations flushed since the last commit.
+
+    A commit is due when ``commit_every`` operations have been flushed or
+    ``commit_interval`` seconds have passed since the last commit, whichever
+    comes first.
+    """
+
+    def __init__(self, commit_every: Optional[int] = 500, commit_interval: Optional[float] = None):
+        if commit_every is not None and commit_every < 1:
+            raise ValueError("commit_every must be >= 1")
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.pending = 0
+        self.commits = 0
+        self._last_commit = time.monotonic()
+
+    def record(self) -> bool:
+        """Register one flushed operation and return whether a commit is due."""
+        self.pending += 1
+        if self.commit_every is not None and self.pending >= self.commit_every:
+            return True
+        if self.commit_interval is not None:
+            return time.monotonic() - self._last_commit >= self.commit_interval
+        return False
+
+    def committed(self) -> None:
+        """Reset the counters after a commit."""
+        self.pending = 0
+        self.commits += 1
+        self._last_commit = time.monotonic()
@@ -0,0 +1,16 @@
+"""Smoke test for the result construction benchmark."""
+import json
+
+from benchmarks import result_bench
+
+
+def test_result_benchmark_writes_results(tmp_path):
+    """A tiny run covers every variant and writes machine-readable results."""
+    output = tmp_path / "results.json"
+
+    result_bench.main(["--count", "50", "--output", str(output)])
+
+    report = json.loads(output.read_text())
+    assert [result["variant"] for result in report["results"]] == list(result_bench.VARIANTS)
+    assert all(result["count"] == 50 and result["ops_per_sec"] > 0 for result in report["results"])
+    assert report["results"][0]["speedup"] == 1.0
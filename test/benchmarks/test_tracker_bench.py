@@ -0,0 +1,20 @@
+"""Smoke test for the tracker benchmark suite."""
+import json
+
+from benchmarks import tracker_bench
+
+
+def test_benchmark_suite_writes_results(tmp_path, registries):
+    """A tiny run covers every operation and writes machine-readable results."""
+    output = tmp_path / "bench.json"
+
+    tracker_bench.main(["--sizes", "20", "--ops", "5", "--scans", "2", "--output", str(output)])
+
+    report = json.loads(output.read_text())
+    operations = {result["operation"] for result in report["results"]}
+    assert operations == {
+        "start_or_resume", "start_stage", "log_event", "finish_stage", "complete_stage", "get_pending_stages",
+        "transactions_between", "summary_by_state", "stage_summary_by_system", "stage_summary_by_system_and_stage",
+    }
+    assert all(result["size"] == 20 and result["ops_per_sec"] > 0 for result in report["results"])
+    assert report["meta"]["ops"] == 5
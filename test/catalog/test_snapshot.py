@@ -0,0 +1,59 @@
+"""Tests for the compiled platform catalog."""
+import pytest
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.catalog.snapshot import CatalogSnapshot
+
+
+def _codes(platforms):
+    return [platform.code for platform in platforms]
+
+
+def test_linear_order_is_the_default():
+    """Without depends_on every platform waits for the lower orders."""
+    snapshot = CatalogSnapshot.compile([
+        PlatformDefinition(code="C", order=3),
+        PlatformDefinition(code="A", stages=("validar",), order=1),
+        PlatformDefinition(code="B", stages=("procesar", "confirmar"), order=2),
+    ])
+
+    assert _codes(snapshot.platforms) == ["A", "B", "C"]
+    assert _codes(snapshot.predecessors["A"]) == []
+    assert _codes(snapshot.predecessors["C"]) == ["A", "B"]
+    assert snapshot.expected_stages["B"] == 2
+    assert snapshot.plan == (("A", "validar"), ("B", "procesar"), ("B", "confirmar"), ("C", "__DEFAULT__"))
+
+
+def test_depends_on_builds_transitive_predecessors():
+    """Explicit edges replace the linear chain, transitively."""
+    snapshot = CatalogSnapshot.compile([
+        PlatformDefinition(code="A", order=1),
+        PlatformDefinition(code="B", order=2, depends_on=("A",)),
+        PlatformDefinition(code="C", order=3, depends_on=("A",)),
+        PlatformDefinition(code="D", order=4, depends_on=("B",)),
+    ])
+
+    assert _codes(snapshot.predecessors["C"]) == ["A"]
+    assert _codes(snapshot.predecessors["D"]) == ["A", "B"]
+
+
+@pytest.mark.parametrize("platforms, message", [
+    ([PlatformDefinition(code="A", depends_on=("Z",))], "unknown"),
+    ([PlatformDefinition(code="A", depends_on=("B",)), PlatformDefinition(code="B", depends_on=("A",))], "cycle"),
+])
+def test_invalid_graphs_are_rejected(platforms, message):
+    """Unknown platforms and cycles fail when compiling."""
+    with pytest.raises(ValueError, match=message):
+        CatalogSnapshot.compile(platforms)
+
+
+def test_registry_caches_the_snapshot(registries):
+    """The snapshot is compiled once and rebuilt after a registration."""
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1))
+    first = PlatformRegistry.snapshot()
+
+    assert PlatformRegistry.snapshot() is first
+
+    PlatformRegistry.register(PlatformDefinition(code="B", order=2))
+    assert _codes(PlatformRegistry.snapshot().predecessors["B"]) == ["A"]
@@ -1,6 +1,6 @@
 """Fixtures for setting up the database session for tests."""
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from rpa_tracker.catalog.registry import PlatformRegistry
@@ -8,28 +8,70 @@ from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
 from rpa_tracker.retry.registry import RetryPolicyRegistry
 from rpa_tracker.models.tx_process import Base as ProcessBase
 from rpa_tracker.models.tx_stage import Base as StageBase
+from rpa_tracker.models.tx_circuit import Base as CircuitBase
 from rpa_tracker.models.tx_event import Base as EventBase
+from rpa_tracker.models.tx_fingerprint import Base as FingerprintBase
+from rpa_tracker.models.tx_limiter import Base as LimiterBase
+from rpa_tracker.models.schema import create_schema
+from rpa_tracker.tracking.sqlite_writer import create_sqlite_engine
+from test.infra.backends import BACKENDS
 from test.infra.models.tx_data import Base as DataBase
 
 
 @pytest.fixture(scope="function")
-def session():
-    """Provides a SQLAlchemy session connected to an in-memory SQLite database."""
+def registries():
+    """Clears the global registries before and after the test."""
     PlatformRegistry.clear()
     DeduplicationRegistry.clear()
     RetryPolicyRegistry.clear()
+    yield
+    PlatformRegistry.clear()
+    DeduplicationRegistry.clear()
+    RetryPolicyRegistry.clear()
+
 
+@pytest.fixture(scope="function")
+def session(registries):
+    """Provides a SQLAlchemy session connected to an in-memory SQLite database."""
     engine = create_engine("sqlite:///:memory:")
     DataBase.metadata.create_all(engine)
     ProcessBase.metadata.create_all(engine)
     StageBase.metadata.create_all(engine)
     EventBase.metadata.create_all(engine)
+    FingerprintBase.metadata.create_all(engine)
+    CircuitBase.metadata.create_all(engine)
+    LimiterBase.metadata.create_all(engine)
 
     Session = sessionmaker(bind=engine)
     session = Session()
     yield session
     session.close()
 
-    PlatformRegistry.clear()
-    DeduplicationRegistry.clear()
-    RetryPolicyRegistry.clear()
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request, session):
+    """Runs the test once with the SQL tracker and once with the in-memory one."""
+    return BACKENDS[request.param](session)
+
+
+@pytest.fixture(scope="function")
+def sqlite_file_engine(tmp_path, registries):
+    """Tracker schema on a SQLite file, where every session has its own connection.
+
+    pysqlite's implicit transactions are replaced by real BEGIN/SAVEPOINT
+    ones, so a test can tell what one session committed from what another
+    one left pending.
+    """
+    engine = create_sqlite_engine(str(tmp_path / "tracker.db"))
+
+    @event.listens_for(engine, "connect")
+    def _no_implicit_transactions(dbapi_connection, _):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    create_schema(engine)
+    yield engine
+    engine.dispose()
@@ -1,5 +1,7 @@
 """Unit tests for ExecutionResult in RPA tracker."""
-from rpa_tracker.domain.execution_result import ExecutionResult
+import pytest
+
+from rpa_tracker.domain.execution_result import ExecutionResult, FastExecutionResult
 from rpa_tracker.enums import TransactionState, ErrorType
 import logging
 
@@ -32,6 +34,25 @@ def test_execution_result_system_error():
     assert r.retryable is True
 
 
+@pytest.mark.parametrize("error_code", [0, 100, -5])
+def test_fast_result_matches_execution_result(error_code):
+    """The fast result derives the same fields as the pydantic model."""
+    validated = ExecutionResult(error_code=error_code, description="x")
+    fast = FastExecutionResult.of(error_code, "x")
+    assert (fast.state, fast.error_type, fast.retryable) == (
+        validated.state, validated.error_type, validated.retryable
+    )
+    assert FastExecutionResult.from_result(validated) == fast
+
+
+def test_fast_result_is_interned_and_immutable():
+    """Results without a description are shared instances that cannot change."""
+    assert FastExecutionResult.of(-1) is FastExecutionResult.of(-1)
+    assert FastExecutionResult.of(-1, "timeout") is not FastExecutionResult.of(-1, "timeout")
+    with pytest.raises(AttributeError):
+        FastExecutionResult.of(0).state = TransactionState.REJECTED
+
+
 if __name__ == "__main__":
     test_execution_result_ok()
     # test_execution_result_business_error()
@@ -0,0 +1,102 @@
+"""Tracker backends the integration scenarios run against."""
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.tx_circuit import TxCircuit
+from rpa_tracker.models.tx_event import TxEvent
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.reporting.memory_report_repository import InMemoryTransactionReportRepository
+from rpa_tracker.reporting.transaction_report_repository import TransactionReportRepository
+from rpa_tracker.tracking.memory_tracker import InMemoryTransactionTracker
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+
+class SqlBackend:
+    """SqlTransactionTracker over the test session."""
+    name = "sql"
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.tracker = SqlTransactionTracker(session)
+        self.reports = TransactionReportRepository(session)
+
+    def worker(self) -> SqlTransactionTracker:
+        """Another tracker on the same database, as a second worker would use."""
+        return SqlTransactionTracker(self.session)
+
+    def add_processes(self, uuids: Iterable[str]) -> None:
+        """Create PENDING transactions without going through deduplication."""
+        self.session.add_all(_new_process(uuid) for uuid in uuids)
+        self.session.commit()
+
+    def processes(self) -> List[TxProcess]:
+        """Every transaction."""
+        return self.session.query(TxProcess).all()
+
+    def stages(self, uuid: str) -> List[TxStage]:
+        """Stages of a transaction."""
+        return self.session.query(TxStage).filter_by(uuid=uuid).all()
+
+    def events(self, uuid: str) -> List[TxEvent]:
+        """Events of a transaction, oldest first."""
+        return self.session.query(TxEvent).filter_by(uuid=uuid).order_by(TxEvent.event_at).all()
+
+    def circuit(self, system: str) -> Optional[TxCircuit]:
+        """Circuit breaker row of a platform, freshly read."""
+        return self.session.get(TxCircuit, system, populate_existing=True)
+
+
+class MemoryBackend:
+    """InMemoryTransactionTracker; the session only holds deduplication data."""
+    name = "memory"
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.tracker = InMemoryTransactionTracker()
+        self.reports = InMemoryTransactionReportRepository(self.tracker.store)
+
+    def worker(self) -> InMemoryTransactionTracker:
+        """Another tracker on the same store, as a second worker would use."""
+        return InMemoryTransactionTracker(self.tracker.store)
+
+    def add_processes(self, uuids: Iterable[str]) -> None:
+        """Create PENDING transactions without going through deduplication."""
+        for uuid in uuids:
+            self.tracker.store.processes[uuid] = _new_process(uuid)
+
+    def processes(self) -> List[TxProcess]:
+        """Every transaction."""
+        return list(self.tracker.store.processes.values())
+
+    def stages(self, uuid: str) -> List[TxStage]:
+        """Stages of a transaction."""
+        return list(self.tracker.store.stages.get(uuid, {}).values())
+
+    def events(self, uuid: str) -> List[TxEvent]:
+        """Events of a transaction, oldest first."""
+        return [e for e in self.tracker.store.events if e.uuid == uuid]
+
+    def circuit(self, system: str) -> Optional[TxCircuit]:
+        """Circuit breaker of a platform."""
+        return self.tracker.store.circuits.get(system)
+
+
+def _new_process(uuid: str) -> TxProcess:
+    now = datetime.now()
+    return TxProcess(
+        uuid=uuid,
+        process_code="P",
+        state=TransactionState.PENDING.value,
+        total_stages=0,
+        completed_stages=0,
+        failed_stages=0,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+BACKENDS = {backend.name: backend for backend in (SqlBackend, MemoryBackend)}
@@ -19,7 +19,8 @@ class DataRepository:
                 nombre=payload.nombre,
             )
         )
-        self.session.commit()
+        # The tracker commits (or flushes in deferred mode) after persisting
+        self.session.flush()
 
     def get_by_uuid(self, uuid: str) -> TxData:
         """Retrieve transaction data by UUID."""
@@ -11,15 +11,9 @@ import logging
 
 from rpa_tracker.catalog.platform import PlatformDefinition
 from rpa_tracker.catalog.registry import PlatformRegistry
-from rpa_tracker.models.tx_event import TxEvent
-from rpa_tracker.models.tx_stage import TxStage  # 👈 Agregar
-from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
 from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
 from rpa_tracker.domain.execution_result import ExecutionResult
 from rpa_tracker.enums import TransactionState
-from rpa_tracker.reporting.transaction_report_repository import (
-    TransactionReportRepository,
-)
 
 from test.domain.cancel_payload import CancelacionPayload
 from test.tracking.fake_deduplication import CancelacionDeduplication
@@ -31,7 +25,7 @@ log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-def test_complex_transaction_flow_with_platform_retry_and_report(session):
+def test_complex_transaction_flow_with_platform_retry_and_report(session, backend):
     """Complex end-to-end flow with retries and final report."""
     # =========================================================
     # BOOTSTRAP - Define platforms with stages
@@ -72,7 +66,7 @@ def test_complex_transaction_flow_with_platform_retry_and_report(session):
         )
     )
 
-    tracker = SqlTransactionTracker(session)
+    tracker = backend.tracker
 
     # =========================================================
     # TRANSACTIONS - Create and register all stages
@@ -139,7 +133,7 @@ def test_complex_transaction_flow_with_platform_retry_and_report(session):
 
     # 👇 NUEVO: Verificar que FE-0001 canceló stages posteriores
     log.info("\n--- Verifying automatic cancellation for FE-0001 ---")
-    stages_fe0001 = session.query(TxStage).filter_by(uuid=uuids[0]).all()
+    stages_fe0001 = backend.stages(uuids[0])
 
     for stage_obj in stages_fe0001:
         log.info("  %s.%s -> %s", stage_obj.system, stage_obj.stage, stage_obj.state)
@@ -214,7 +208,7 @@ def test_complex_transaction_flow_with_platform_retry_and_report(session):
 
     # 👇 NUEVO: Verificar que FE-0002 canceló sus stages posteriores
     log.info("\n--- Verifying automatic cancellation for FE-0002 ---")
-    stages_fe0002 = session.query(TxStage).filter_by(uuid=uuids[1]).all()
+    stages_fe0002 = backend.stages(uuids[1])
 
     # B.procesar debe estar REJECTED
     stage_b_proc = next(s for s in stages_fe0002 if s.system == "B" and s.stage == "procesar")
@@ -287,7 +281,7 @@ def test_complex_transaction_flow_with_platform_retry_and_report(session):
     # =========================================================
     # REPORT
     # =========================================================
-    repo = TransactionReportRepository(session)
+    repo = backend.reports
 
     end = datetime.now()
     start = end - timedelta(days=1)
@@ -347,12 +341,7 @@ def test_complex_transaction_flow_with_platform_retry_and_report(session):
     log.info("\n✓ Verified: %s stages automatically cancelled", cancelled_count)
 
     # Verify intermediate states were tracked
-    events_tx3 = (
-        session.query(TxEvent)
-        .filter_by(uuid=uuids[2])
-        .order_by(TxEvent.event_at)
-        .all()
-    )
+    events_tx3 = backend.events(uuids[2])
 
     # Should have events from A, B.procesar, B.confirmar, C
     assert len(events_tx3) >= 4
@@ -1,6 +1,4 @@
 """Integration test for full transaction flow in RPA tracker."""
-from rpa_tracker.models.tx_process import TxProcess
-from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
 from rpa_tracker.domain.execution_result import ExecutionResult
 from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
 from rpa_tracker.catalog.registry import PlatformRegistry  # 👈 Agregar
@@ -19,7 +17,7 @@ log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-def test_full_transaction_flow(session: Session):
+def test_full_transaction_flow(session: Session, backend):
     """Full end-to-end flow.
 
     - two transactions
@@ -59,7 +57,7 @@ def test_full_transaction_flow(session: Session):
         )
     )
 
-    tracker = SqlTransactionTracker(session)
+    tracker = backend.tracker
 
     # =========================================================
     # TRANSACTIONS - Create two transactions
@@ -209,7 +207,7 @@ def test_full_transaction_flow(session: Session):
     log.info("=" * 70)
     log.info("FINAL STATE VERIFICATION")
 
-    txs = session.query(TxProcess).all()
+    txs = backend.processes()
     states = {tx.uuid: tx.state for tx in txs}
 
     # 👇 uuid_1 rechazado en A
@@ -0,0 +1,88 @@
+"""Tests for the tracker indexes and the schema helpers."""
+from datetime import datetime
+from typing import List
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.models.schema import create_schema, ensure_indexes, missing_indexes
+from rpa_tracker.models.tx_event import TxEvent
+from rpa_tracker.reporting.transaction_report_repository import TransactionReportRepository
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+from test.infra.query_counter import count_queries
+
+
+def query_plans(session, run) -> List[str]:
+    """Return the SQLite query plans of the statements executed by ``run()``."""
+    with count_queries(session.bind) as counter:
+        run()
+
+    plans = []
+    for statement, params in zip(counter.statements, counter.parameters):
+        rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params)
+        plans.append("\n".join(row[-1] for row in rows))
+    return plans
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite engine without tables."""
+    engine = create_engine("sqlite:///:memory:")
+    yield engine
+    engine.dispose()
+
+
+def test_pending_stages_use_pending_index(session):
+    """The eligibility query seeks the stage index, not a table scan."""
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1))
+    PlatformRegistry.register(PlatformDefinition(code="B", order=2))
+
+    tracker = SqlTransactionTracker(session)
+
+    for run in (lambda: tracker.get_pending_stages("B"), lambda: tracker.next_due_at("B")):
+        [plan] = query_plans(session, run)
+        # Both stage indexes lead with (system, stage, state); the due one
+        # also serves the next_attempt_at filter
+        assert "INDEX IX_RPA_TX_STAGE_PENDING (" in plan or "INDEX IX_RPA_TX_STAGE_DUE (" in plan
+        assert "COVERING INDEX IX_RPA_TX_STAGE_PROGRESS (uuid=? AND system=? AND state=?)" in plan
+        assert "SCAN RPA_TX_STAGE" not in plan
+
+
+def test_reports_use_created_index(session):
+    """Reports filtered by creation window use the created_at index."""
+    repo = TransactionReportRepository(session)
+    start, end = datetime(2024, 1, 1), datetime(2024, 2, 1)
+
+    def reports():
+        repo.transactions_between(start, end)
+        repo.summary_by_state(start, end)
+        repo.stage_summary_by_system(start, end)
+
+    for plan in query_plans(session, reports):
+        assert "IX_RPA_TX_PROCESS_CREATED" in plan
+        assert "SCAN RPA_TX_PROCESS" not in plan
+
+
+def test_event_lookup_uses_stage_index(session):
+    """Audit lookups of a stage use the event index."""
+    query = session.query(TxEvent).filter_by(uuid="u1", system="A", stage="__DEFAULT__").order_by(TxEvent.attempt)
+
+    [plan] = query_plans(session, query.all)
+
+    assert "IX_RPA_TX_EVENT_STAGE" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_ensure_indexes_on_existing_database(engine):
+    """Indexes missing on an older database are created once."""
+    create_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX "IX_RPA_TX_STAGE_PENDING"'))
+        conn.execute(text('DROP INDEX "IX_RPA_TX_EVENT_STAGE"'))
+
+    assert missing_indexes(engine) == ["IX_RPA_TX_STAGE_PENDING", "IX_RPA_TX_EVENT_STAGE"]
+    assert ensure_indexes(engine) == ["IX_RPA_TX_EVENT_STAGE", "IX_RPA_TX_STAGE_PENDING"]
+    assert missing_indexes(engine) == []
+    assert ensure_indexes(engine) == []
@@ -0,0 +1,111 @@
+"""Tests for the parallel platform runner."""
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.tx_event import Base as EventBase
+from rpa_tracker.models.tx_process import Base as ProcessBase, TxProcess
+from rpa_tracker.models.tx_stage import Base as StageBase, TxStage
+from rpa_tracker.runner.platform_runner import PlatformRunner, PoolConfig, WorkerSessionFactory
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+
+@pytest.fixture
+def session_factory(tmp_path, registries):
+    """File-backed SQLite shared by the coordinator and the workers."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'runner.db'}")
+    for base in (ProcessBase, StageBase, EventBase):
+        base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _seed(session_factory, count):
+    PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+    PlatformRegistry.register(PlatformDefinition(code="B", stages=("procesar", "confirmar"), order=2))
+    PlatformRegistry.register(PlatformDefinition(code="C", order=3))
+
+    uuids = [f"u{i:02d}" for i in range(count)]
+    with session_factory() as session:
+        session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in uuids)
+        session.commit()
+        SqlTransactionTracker(session).materialize_plan(uuids)
+    return uuids
+
+
+def ok(job, session):
+    """Handler that always succeeds."""
+    return ExecutionResult(error_code=0)
+
+
+def mark_seen(job, session):
+    """Handler that reads its transaction through the worker session."""
+    process = session.query(TxProcess).filter_by(uuid=job.uuid).one()
+    return ExecutionResult(error_code=0, description=f"seen {process.uuid}")
+
+
+def test_runner_pipelines_all_platforms(session_factory):
+    """One run drives every transaction through A, B and C."""
+    _seed(session_factory, 12)
+    threads = set()
+
+    runner = PlatformRunner(session_factory, pools={"A": PoolConfig(max_workers=4)},
+                            default_pool=PoolConfig(max_workers=2))
+
+    @runner.handler("A", "validar")
+    def validar(job, session):
+        threads.add(threading.current_thread().name)
+        assert session is not None
+        if job.uuid == "u00":
+            return ExecutionResult(error_code=7)     # business error
+        if job.uuid == "u01":
+            raise RuntimeError("screen not found")   # system error
+        return ExecutionResult(error_code=0)
+
+    runner.register("B", "procesar", ok)
+    runner.register("B", "confirmar", ok)
+    runner.register("C", "__DEFAULT__", ok)
+
+    summary = runner.run()
+
+    assert summary.by_state[TransactionState.COMPLETED.value] == 10 * 4
+    assert summary.by_state[TransactionState.REJECTED.value] == 1
+    assert summary.by_state[TransactionState.TERMINATED.value] == 1
+    assert all(name.startswith("rpa-A") for name in threads)
+
+    with session_factory() as session:
+        states = {p.uuid: p.state for p in session.query(TxProcess)}
+        assert states.pop("u00") == TransactionState.REJECTED.value
+        assert states.pop("u01") == TransactionState.TERMINATED.value
+        assert set(states.values()) == {TransactionState.COMPLETED.value}
+        failed = session.query(TxStage).filter_by(uuid="u01", system="A").one()
+        assert "screen not found" in failed.error_description
+        assert failed.claimed_by is None
+
+
+def test_runner_with_process_pool(session_factory):
+    """Handlers in a process pool get their own working session."""
+    _seed(session_factory, 3)
+    runner = PlatformRunner(session_factory,
+                            default_pool=PoolConfig(max_workers=2, kind="process"),
+                            worker_session_factory=WorkerSessionFactory(str(session_factory.kw["bind"].url)))
+    runner.register("A", "validar", mark_seen)
+
+    summary = runner.run()
+
+    assert summary.by_state[TransactionState.COMPLETED.value] == 3
+    with session_factory() as session:
+        descriptions = {s.uuid: s.error_description for s in session.query(TxStage).filter_by(system="A")}
+        assert descriptions == {u: f"seen {u}" for u in ("u00", "u01", "u02")}
+
+
+def test_process_pool_requires_picklable_session_factory(session_factory):
+    """An engine-bound sessionmaker is rejected up front for process pools."""
+    with pytest.raises(ValueError, match="picklable"):
+        PlatformRunner(session_factory, pools={"A": PoolConfig(kind="process")})
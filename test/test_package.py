@@ -0,0 +1,47 @@
+"""Tests for the lazy top-level API of rpa_tracker."""
+import subprocess
+import sys
+from importlib import import_module
+
+import pytest
+
+import rpa_tracker
+
+# Cumulative microseconds ``import rpa_tracker`` may take; importing the
+# tracker modules eagerly (SQLAlchemy, pydantic, the ORM models) costs far more
+IMPORT_BUDGET_US = 100_000
+
+
+def _import_in_subprocess(code):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True,
+    )
+
+
+def test_import_is_lazy_and_within_budget():
+    """The package imports none of its heavy dependencies until a name is used."""
+    run = _import_in_subprocess(
+        "import sys, rpa_tracker; "
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in ('sqlalchemy', 'pydantic', 'rpa_tracker')))"
+    )
+
+    assert run.stdout.strip() == "['rpa_tracker']"
+    [line] = [line for line in run.stderr.splitlines() if line.endswith("| rpa_tracker")]
+    cumulative = int(line.split("|")[1])
+    assert cumulative < IMPORT_BUDGET_US
+
+
+def test_names_resolve_to_their_modules():
+    """Every exported name is the object defined in its module."""
+    for name, module in rpa_tracker._EXPORTS.items():
+        assert getattr(rpa_tracker, name) is getattr(import_module(module), name)
+    assert set(rpa_tracker.__all__) == {"__version__", *rpa_tracker._EXPORTS}
+    assert set(rpa_tracker.__all__) <= set(dir(rpa_tracker))
+    assert rpa_tracker.__version__
+
+
+def test_unknown_name_raises_attribute_error():
+    """Names outside the API fail like a regular missing attribute."""
+    with pytest.raises(AttributeError):
+        rpa_tracker.NotAThing
@@ -1,5 +1,5 @@
 """Fake deduplication strategy for testing purposes."""
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from rpa_tracker.tracking.deduplication.base import DeduplicationStrategy
 from test.domain.cancel_payload import CancelacionPayload
@@ -51,3 +51,32 @@ class CancelacionDeduplication(DeduplicationStrategy):
     def persist_data(self, uuid: str, payload: CancelacionPayload) -> None:
         """Persist the UUID associated with the data's key."""
         self.data_repo.save(uuid, payload)
+
+    def find_existing_uuids(self, fingerprints: Sequence[str]) -> Dict[str, str]:
+        """Resolve many fingerprints with a single IN query.
+
+        Only supported for single-field fingerprints; otherwise falls back to
+        one lookup per fingerprint.
+        """
+        if len(self.FINGERPRINT_FIELDS) != 1:
+            return super().find_existing_uuids(fingerprints)
+
+        column = getattr(TxData, self.FINGERPRINT_FIELDS[0])
+        rows = (
+            self.data_repo.session.query(column, TxData.uuid)
+            .filter(column.in_(fingerprints))
+            .all()
+        )
+        return {value: uuid for value, uuid in rows}
+
+    def persist_many(self, items: Sequence[Tuple[str, CancelacionPayload]]) -> None:
+        """Add all rows to the session; the tracker commits them."""
+        self.data_repo.session.add_all(
+            TxData(
+                uuid=uuid,
+                requerimiento=payload.requerimiento,
+                tipo_operacion=payload.tipo_operacion,
+                nombre=payload.nombre,
+            )
+            for uuid, payload in items
+        )
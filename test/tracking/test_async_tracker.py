@@ -0,0 +1,191 @@
+"""Tests for AsyncSqlTransactionTracker on sqlite+aiosqlite."""
+import asyncio
+import inspect
+from typing import Dict, Optional
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.schema import create_schema
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.tracking.async_sql_tracker import AsyncSqlTransactionTracker
+from rpa_tracker.tracking.deduplication.hashed import HashedFingerprintDeduplication
+from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.domain.cancel_payload import CancelacionPayload
+
+pytest.importorskip("aiosqlite")
+
+
+class InMemoryAsyncDeduplication:
+    """Async strategy keeping fingerprints in a dict."""
+    version = 1
+
+    def __init__(self):
+        self.known: Dict[str, str] = {}
+
+    def calculate_fingerprint(self, payload: CancelacionPayload) -> str:
+        """Use the requerimiento as fingerprint."""
+        return payload.requerimiento
+
+    async def find_existing_uuid(self, fingerprint: str) -> Optional[str]:
+        """Look the fingerprint up."""
+        await asyncio.sleep(0)
+        return self.known.get(fingerprint)
+
+    async def persist_data(self, uuid: str, payload: CancelacionPayload) -> None:
+        """Remember the fingerprint."""
+        self.known[payload.requerimiento] = uuid
+
+
+class LateHashedDeduplication(HashedFingerprintDeduplication):
+    """Misses its first lookup and counts the reservations."""
+    looked_up = False
+    reservations = 0
+
+    def find_existing_uuid(self, fingerprint):
+        """Return None once, then look up for real."""
+        if not self.looked_up:
+            self.looked_up = True
+            return None
+        return super().find_existing_uuid(fingerprint)
+
+    def reserve_fingerprint(self, fingerprint, uuid, payload):
+        """Count the call and reserve for real."""
+        self.reservations += 1
+        return super().reserve_fingerprint(fingerprint, uuid, payload)
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(create_schema)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+def _public_methods(cls) -> set:
+    return {name for name, member in inspect.getmembers(cls) if callable(member) and not name.startswith("_")}
+
+
+def _payload(req: str) -> CancelacionPayload:
+    return CancelacionPayload(requerimiento=req, tipo_operacion="ALTA", nombre=req)
+
+
+def test_async_full_flow(registries):
+    """Same flow and outcome as the synchronous tracker."""
+    DeduplicationRegistry.register("ASYNC", InMemoryAsyncDeduplication())
+    for order, code in enumerate(("A", "B", "C"), start=1):
+        PlatformRegistry.register(PlatformDefinition(code=code, order=order))
+
+    async def scenario():
+        engine, Session = await _session_factory()
+        async with Session() as session:
+            tracker = AsyncSqlTransactionTracker(session, materialize_on_start=True)
+
+            uuid_1, is_new_1 = await tracker.start_or_resume("ASYNC", _payload("FE-1"))
+            uuid_2, is_new_2 = await tracker.start_or_resume("ASYNC", _payload("FE-2"))
+            again, is_new_again = await tracker.start_or_resume("ASYNC", _payload("FE-1"))
+            assert is_new_1 and is_new_2 and not is_new_again
+            assert again == uuid_1
+
+            pending_a = await tracker.get_pending_stages("A")
+            assert {s.uuid for s in pending_a} == {uuid_1, uuid_2}
+
+            await tracker.complete_stage(uuid_1, "A", ExecutionResult(error_code=100))
+            await tracker.complete_stage(uuid_2, "A", ExecutionResult(error_code=0))
+
+            for system in ("B", "C"):
+                pending = [s async for s in tracker.iter_pending_stages(system, page_size=1)]
+                assert [s.uuid for s in pending] == [uuid_2]
+                await tracker.complete_stages([(uuid_2, system, pending[0].stage, ExecutionResult(error_code=0))])
+
+            states = dict((await session.execute(select(TxProcess.uuid, TxProcess.state))).all())
+            assert states[uuid_1] == TransactionState.REJECTED.value
+            assert states[uuid_2] == TransactionState.COMPLETED.value
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_async_bulk_intake_and_batch(registries):
+    """Bulk intake and the async unit-of-work context share the sync logic."""
+    DeduplicationRegistry.register("ASYNC", InMemoryAsyncDeduplication())
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1))
+
+    async def scenario():
+        engine, Session = await _session_factory()
+        async with Session() as session:
+            tracker = AsyncSqlTransactionTracker(session)
+
+            results = await tracker.start_or_resume_many(
+                "ASYNC", [_payload("FE-1"), _payload("FE-2"), _payload("FE-1")], chunk_size=2
+            )
+            assert [is_new for _, is_new in results] == [True, True, False]
+            assert results[2][0] == results[0][0]
+
+            with pytest.raises(RuntimeError):
+                async with tracker.batch(commit_every=10):
+                    await tracker.start_stage(results[0][0], "A")
+                    raise RuntimeError("boom")
+
+            async with tracker.batch(commit_every=10):
+                await tracker.start_stage(results[1][0], "A")
+
+            count = (await session.execute(select(func.count()).select_from(TxStage))).scalar()
+            assert count == 1
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_async_tracker_mirrors_sync_api():
+    """Every public method of the sync tracker has an async counterpart."""
+    assert _public_methods(AsyncSqlTransactionTracker) == _public_methods(SqlTransactionTracker)
+
+
+def test_async_repair_stage_counters(registries):
+    """The counter repair runs on the full schema through the sync tracker."""
+    DeduplicationRegistry.register("ASYNC", InMemoryAsyncDeduplication())
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1))
+
+    async def scenario():
+        engine, Session = await _session_factory()
+        async with Session() as session:
+            tracker = AsyncSqlTransactionTracker(session, materialize_on_start=True)
+            uuid_tx, _ = await tracker.start_or_resume("ASYNC", _payload("FE-1"))
+
+            assert await tracker.repair_stage_counters([uuid_tx]) == 1
+            assert await tracker.repair_stage_counters() == 1
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_sync_strategy_reserves_the_fingerprint(registries):
+    """A lost intake race resolves through reserve_fingerprint, as in the sync tracker."""
+
+    async def scenario():
+        engine, Session = await _session_factory()
+        async with Session() as session:
+            hashed = HashedFingerprintDeduplication(session.sync_session, "CANC_PROC", fields=["requerimiento"])
+            winner = AsyncSqlTransactionTracker(session, deduplication={"CANC_PROC": hashed})
+            uuid_tx, is_new = await winner.start_or_resume("CANC_PROC", _payload("FE-1"))
+            assert is_new
+
+            late = LateHashedDeduplication(session.sync_session, "CANC_PROC", fields=["requerimiento"])
+            tracker = AsyncSqlTransactionTracker(session, deduplication={"CANC_PROC": late})
+            assert await tracker.start_or_resume("CANC_PROC", _payload("FE-1")) == (uuid_tx, False)
+            assert late.reservations == 1
+
+            count = (await session.execute(select(func.count()).select_from(TxProcess))).scalar()
+            assert count == 1
+        await engine.dispose()
+
+    asyncio.run(scenario())
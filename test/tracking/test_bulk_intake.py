@@ -0,0 +1,93 @@
+"""Tests for the bulk intake API start_or_resume_many."""
+from typing import Optional
+
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.domain.cancel_payload import CancelacionPayload
+from test.infra.models.data_repository import DataRepository
+from test.infra.models.tx_data import TxData
+from test.infra.query_counter import count_queries
+from test.tracking.fake_deduplication import CancelacionDeduplication
+
+
+def _payload(req: str) -> CancelacionPayload:
+    return CancelacionPayload(requerimiento=req, tipo_operacion="ALTA", nombre=f"Name {req}")
+
+
+class PerItemDeduplication:
+    """Structural strategy without the batch hooks."""
+    version = 1
+
+    def __init__(self, data_repo: DataRepository):
+        self.data_repo = data_repo
+
+    def calculate_fingerprint(self, payload: CancelacionPayload) -> str:
+        """Use the requerimiento as fingerprint."""
+        return payload.requerimiento
+
+    def find_existing_uuid(self, fingerprint: str) -> Optional[str]:
+        """Look the fingerprint up in the data table."""
+        found = self.data_repo.find_by_requerimiento(fingerprint)
+        return found.uuid if found else None
+
+    def persist_data(self, uuid: str, payload: CancelacionPayload) -> None:
+        """Persist the payload."""
+        self.data_repo.save(uuid, payload)
+
+
+def test_start_or_resume_many_creates_and_resumes(session):
+    """Existing payloads are resumed, new ones are created in bulk."""
+    DeduplicationRegistry.register("BULK", CancelacionDeduplication(DataRepository(session)))
+    tracker = SqlTransactionTracker(session)
+
+    existing_uuid, _ = tracker.start_or_resume("BULK", _payload("FE-1"))
+
+    results = tracker.start_or_resume_many(
+        "BULK",
+        [_payload("FE-1"), _payload("FE-2"), _payload("FE-3"), _payload("FE-2")],
+    )
+
+    assert results[0] == (existing_uuid, False)
+    assert results[1][1] is True
+    assert results[2][1] is True
+    # Duplicate inside the batch resolves to the first occurrence
+    assert results[3] == (results[1][0], False)
+
+    assert session.query(TxProcess).count() == 3
+    assert session.query(TxData).count() == 3
+    assert {p.state for p in session.query(TxProcess)} == {"PENDING"}
+
+
+def test_start_or_resume_many_statements_per_chunk(session):
+    """Each chunk costs a lookup, two bulk inserts and a commit."""
+    DeduplicationRegistry.register("BULK", CancelacionDeduplication(DataRepository(session)))
+    tracker = SqlTransactionTracker(session)
+
+    payloads = [_payload(f"FE-{i}") for i in range(250)]
+    with count_queries(session.get_bind()) as counter:
+        results = tracker.start_or_resume_many("BULK", payloads, chunk_size=100)
+
+    assert len(results) == 250
+    assert all(is_new for _, is_new in results)
+    assert len({uuid for uuid, _ in results}) == 250
+    # 3 chunks x (1 lookup + 1 process insert + 1 data insert)
+    assert counter.count == 9
+
+    again = tracker.start_or_resume_many("BULK", payloads, chunk_size=100)
+    assert again == [(uuid, False) for uuid, _ in results]
+
+
+def test_start_or_resume_many_falls_back_to_per_item_hooks(session):
+    """Strategies without batch hooks keep working."""
+    data_repo = DataRepository(session)
+    DeduplicationRegistry.register("BULK", PerItemDeduplication(data_repo))
+    tracker = SqlTransactionTracker(session)
+
+    results = tracker.start_or_resume_many("BULK", [_payload("FE-1"), _payload("FE-1"), _payload("FE-2")])
+
+    assert results[0][1] is True
+    assert results[1] == (results[0][0], False)
+    assert results[2][1] is True
+    assert data_repo.find_by_requerimiento("FE-2").uuid == results[2][0]
@@ -0,0 +1,129 @@
+"""Tests for the per-platform circuit breaker."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.constants import DEFAULT_STAGE
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import CircuitState, TransactionState
+from rpa_tracker.models.tx_circuit import TxCircuit
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.retry.circuit_breaker import CircuitBreakerPolicy
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+BREAKER = CircuitBreakerPolicy(window=4, min_attempts=4, failure_ratio=0.5, open_seconds=60)
+UUIDS = [f"u{i}" for i in range(8)]
+OK = ExecutionResult(error_code=0)
+DOWN = ExecutionResult(error_code=-1)
+
+
+@pytest.fixture
+def tracker(backend):
+    """Platform A with a circuit breaker and eight transactions waiting on it."""
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1, circuit_breaker=BREAKER))
+    backend.add_processes(UUIDS)
+    for uuid in UUIDS:
+        backend.tracker.start_stage(uuid, "A")
+    return backend.tracker
+
+
+def _trip(tracker):
+    for uuid, result in zip(UUIDS, (OK, OK, DOWN, DOWN)):
+        tracker.complete_stage(uuid, "A", result)
+
+
+def _expire(backend):
+    circuit = backend.circuit("A")
+    circuit.opened_at = datetime.now() - timedelta(seconds=61)
+    circuit.updated_at = datetime.now()
+    backend.session.commit()
+
+
+def test_policy_needs_enough_attempts():
+    """The ratio only counts once the window holds ``min_attempts``."""
+    assert not BREAKER.trips([True, True, True])
+    assert BREAKER.trips([True, True, False, False, True])
+    assert not BREAKER.trips([True, False, False, False])
+
+
+def test_failure_ratio_opens_the_circuit(backend, tracker):
+    """An open circuit hides the platform from pending and claim APIs."""
+    _trip(tracker)
+
+    assert backend.circuit("A").state == CircuitState.OPEN.value
+    assert tracker.get_pending_stages("A") == []
+    assert list(tracker.iter_pending_stages("A")) == []
+    assert tracker.claim_pending_stages("A", DEFAULT_STAGE, "w1") == []
+    assert tracker.next_due_at("A") >= backend.circuit("A").opened_at + timedelta(seconds=60)
+
+
+def test_half_open_probe_closes_the_circuit(backend, tracker):
+    """After the cool-down one caller gets one probe; its success closes the circuit."""
+    _trip(tracker)
+    _expire(backend)
+
+    [probe] = tracker.get_pending_stages("A")
+    assert backend.circuit("A").state == CircuitState.HALF_OPEN.value
+    assert tracker.get_pending_stages("A") == []
+
+    tracker.complete_stage(probe.uuid, "A", OK)
+
+    assert backend.circuit("A").state == CircuitState.CLOSED.value
+    assert len(tracker.get_pending_stages("A")) == 5
+
+
+def test_failed_probe_reopens_the_circuit(backend, tracker):
+    """A probe failing with a system error opens the circuit again."""
+    _trip(tracker)
+    _expire(backend)
+
+    [probe] = tracker.get_pending_stages("A")
+    tracker.complete_stages([(probe.uuid, "A", DEFAULT_STAGE, DOWN)])
+
+    circuit = backend.circuit("A")
+    assert circuit.state == CircuitState.OPEN.value
+    assert circuit.opened_at > datetime.now() - timedelta(seconds=5)
+    assert tracker.get_pending_stages("A") == []
+
+
+def test_batch_counts_every_finished_stage(backend, tracker):
+    """complete_stages feeds one attempt per stage: a later failure does not hide the probe's success."""
+    _trip(tracker)
+    _expire(backend)
+
+    [probe] = tracker.get_pending_stages("A")
+    others = [uuid for uuid in UUIDS[4:] if uuid != probe.uuid]
+    tracker.complete_stages(
+        [(probe.uuid, "A", DEFAULT_STAGE, OK)]
+        + [(uuid, "A", DEFAULT_STAGE, OK) for uuid in others[:2]]
+        + [(others[2], "A", DEFAULT_STAGE, DOWN)]
+    )
+
+    # One failure in the last four attempts stays under the ratio
+    assert backend.circuit("A").state == CircuitState.CLOSED.value
+
+
+def test_probe_is_committed_on_its_own(sqlite_file_engine):
+    """The probe lease survives a caller that never commits, and the caller's transaction stays its own."""
+    Session = sessionmaker(bind=sqlite_file_engine)
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1, circuit_breaker=BREAKER))
+    with Session() as session:
+        tracker = SqlTransactionTracker(session)
+        session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in UUIDS)
+        session.commit()
+        for uuid in UUIDS:
+            tracker.start_stage(uuid, "A")
+        _trip(tracker)
+        circuit = session.get(TxCircuit, "A")
+        circuit.opened_at = datetime.now() - timedelta(seconds=61)
+        session.commit()
+
+    with Session() as caller, Session() as other:
+        [_] = SqlTransactionTracker(caller, autocommit=False).get_pending_stages("A")
+        caller.rollback()
+
+        assert other.get(TxCircuit, "A").state == CircuitState.HALF_OPEN.value
+        assert SqlTransactionTracker(other).get_pending_stages("A") == []
@@ -0,0 +1,81 @@
+"""Tests for lease-based work claiming."""
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+
+
+def _seed(backend, count):
+    PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+    uuids = [f"u{i}" for i in range(count)]
+    backend.add_processes(uuids)
+    backend.tracker.materialize_plan(uuids)
+    return uuids
+
+
+def test_workers_claim_disjoint_stages(backend):
+    """Each worker only gets the stages it won."""
+    worker_1 = backend.tracker
+    worker_2 = backend.worker()
+    uuids = _seed(backend, 5)
+
+    first = worker_1.claim_pending_stages("A", "validar", "vm-1", limit=3)
+    second = worker_2.claim_pending_stages("A", "validar", "vm-2", limit=3)
+    third = worker_2.claim_pending_stages("A", "validar", "vm-2", limit=3)
+
+    assert len(first) == 3
+    assert len(second) == 2
+    assert third == []
+    assert {s.uuid for s in first} | {s.uuid for s in second} == set(uuids)
+    assert {s.claimed_by for s in first} == {"vm-1"}
+    assert {s.claimed_by for s in second} == {"vm-2"}
+
+
+def test_claimed_stages_are_hidden_from_pending(backend):
+    """Leased stages are not handed out by get_pending_stages."""
+    tracker = backend.tracker
+    _seed(backend, 3)
+
+    claimed = tracker.claim_pending_stages("A", "validar", "vm-1", limit=2)
+
+    pending = tracker.get_pending_stages("A", stage="validar")
+    assert len(pending) == 1
+    assert pending[0].uuid not in {s.uuid for s in claimed}
+
+
+def test_excluded_transactions_are_not_claimed(backend):
+    """Stages of ``exclude_uuids`` stay available to other claims."""
+    tracker = backend.tracker
+    _seed(backend, 3)
+
+    claimed = tracker.claim_pending_stages("A", "validar", "vm-1", exclude_uuids=["u0", "u2"])
+
+    assert [s.uuid for s in claimed] == ["u1"]
+
+
+def test_expired_leases_can_be_claimed_again(backend):
+    """A worker that dies releases its stages when the lease expires."""
+    tracker = backend.tracker
+    _seed(backend, 2)
+
+    tracker.claim_pending_stages("A", "validar", "vm-dead", limit=2, lease_seconds=-1)
+    reclaimed = tracker.claim_pending_stages("A", "validar", "vm-2", limit=2)
+
+    assert {s.claimed_by for s in reclaimed} == {"vm-2"}
+    assert len(reclaimed) == 2
+
+
+def test_finishing_a_stage_releases_the_lease(backend):
+    """Finished stages keep no lease, retries can be claimed by anyone."""
+    tracker = backend.tracker
+    _seed(backend, 1)
+
+    [stage] = tracker.claim_pending_stages("A", "validar", "vm-1", limit=1)
+    tracker.complete_stage(stage.uuid, "A", ExecutionResult(error_code=-1), stage="validar")
+
+    [row] = backend.stages(stage.uuid)
+    assert row.state == TransactionState.TERMINATED.value
+    assert row.claimed_by is None and row.claimed_until is None
+
+    retry = tracker.claim_pending_stages("A", "validar", "vm-2", limit=1)
+    assert [s.uuid for s in retry] == [stage.uuid]
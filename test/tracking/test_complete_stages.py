@@ -0,0 +1,137 @@
+"""Tests for the batched complete_stages API."""
+import pytest
+from sqlalchemy.exc import NoResultFound
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult, FastExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.tx_event import TxEvent
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.infra.query_counter import count_queries
+
+# (transaction, system, stage, error_code)
+SCENARIO = [
+    ("ok", "A", "validar", 0),
+    ("rejected", "A", "validar", 5),
+    ("retry", "A", "validar", -1),
+    ("retry", "A", "validar", 0),
+    ("ok", "B", "procesar", 0),
+    ("ok", "B", "procesar", 0),          # already processed
+    ("rejected", "B", "procesar", 0),    # cancelled by the rejection
+    ("ok", "B", "confirmar", 0),
+    ("ok", "C", "__DEFAULT__", 0),
+    ("retry", "B", "procesar", 3),
+]
+
+
+def _register_platforms():
+    PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+    PlatformRegistry.register(PlatformDefinition(code="B", stages=("procesar", "confirmar"), order=2))
+    PlatformRegistry.register(PlatformDefinition(code="C", order=3))
+
+
+def _start(session, tracker, prefix):
+    for name in ("ok", "rejected", "retry"):
+        session.add(TxProcess(uuid=f"{prefix}-{name}", process_code="P", state=TransactionState.PENDING.value))
+    session.commit()
+    tracker.materialize_plan([f"{prefix}-{name}" for name in ("ok", "rejected", "retry")])
+
+
+def _snapshot(session, prefix):
+    processes = {
+        p.uuid.split("-", 1)[1]: (
+            p.state, p.error_type, p.error_description, p.total_stages, p.completed_stages, p.failed_stages
+        )
+        for p in session.query(TxProcess).filter(TxProcess.uuid.like(f"{prefix}-%"))
+    }
+    stages = {
+        (s.uuid.split("-", 1)[1], s.system, s.stage): (s.state, s.attempt, s.error_type, s.error_description)
+        for s in session.query(TxStage).filter(TxStage.uuid.like(f"{prefix}-%"))
+    }
+    events = sorted(
+        (e.uuid.split("-", 1)[1], e.system, e.stage, e.attempt, e.error_code)
+        for e in session.query(TxEvent).filter(TxEvent.uuid.like(f"{prefix}-%"))
+    )
+    return processes, stages, events
+
+
+def test_complete_stages_matches_sequential_complete_stage(session):
+    """The batch produces the same rows and return values as one call per item."""
+    _register_platforms()
+    tracker = SqlTransactionTracker(session)
+    _start(session, tracker, "seq")
+    _start(session, tracker, "bat")
+
+    sequential = [
+        tracker.complete_stage(f"seq-{name}", system, ExecutionResult(error_code=code), stage=stage)
+        for name, system, stage, code in SCENARIO
+    ]
+    batched = tracker.complete_stages(
+        (f"bat-{name}", system, stage, ExecutionResult(error_code=code))
+        for name, system, stage, code in SCENARIO
+    )
+
+    assert batched == sequential
+    assert _snapshot(session, "bat") == _snapshot(session, "seq")
+
+    processes, _, _ = _snapshot(session, "bat")
+    assert processes["ok"][0] == TransactionState.COMPLETED.value
+    assert processes["rejected"][0] == TransactionState.REJECTED.value
+    assert processes["retry"][0] == TransactionState.REJECTED.value
+
+
+def test_fast_results_match_validated_results(session):
+    """Fast results produce the same rows as validated ones."""
+    _register_platforms()
+    tracker = SqlTransactionTracker(session)
+    _start(session, tracker, "val")
+    _start(session, tracker, "fst")
+
+    validated = tracker.complete_stages(
+        (f"val-{name}", system, stage, ExecutionResult(error_code=code))
+        for name, system, stage, code in SCENARIO
+    )
+    fast = [
+        tracker.complete_stage(f"fst-{name}", system, FastExecutionResult.of(code), stage=stage)
+        for name, system, stage, code in SCENARIO
+    ]
+
+    assert fast == validated
+    assert _snapshot(session, "fst") == _snapshot(session, "val")
+
+
+def test_complete_stages_statement_count_is_constant(session):
+    """Statements depend on the number of resulting states, not on the batch size."""
+    _register_platforms()
+    tracker = SqlTransactionTracker(session)
+
+    def run(count):
+        uuids = [f"tx{count}-{i}" for i in range(count)]
+        session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in uuids)
+        session.commit()
+        tracker.materialize_plan(uuids)
+        with count_queries(session.get_bind()) as counter:
+            tracker.complete_stages((u, "A", "validar", ExecutionResult(error_code=0)) for u in uuids)
+        return counter.count
+
+    assert run(5) == run(200)
+
+
+def test_complete_stages_unknown_stage_writes_nothing(session):
+    """A missing stage aborts the batch before any write."""
+    _register_platforms()
+    tracker = SqlTransactionTracker(session)
+    _start(session, tracker, "bat")
+
+    with pytest.raises(NoResultFound):
+        tracker.complete_stages([
+            ("bat-ok", "A", "validar", ExecutionResult(error_code=0)),
+            ("bat-ok", "Z", "nope", ExecutionResult(error_code=0)),
+        ])
+
+    session.rollback()
+    assert session.query(TxEvent).count() == 0
@@ -0,0 +1,201 @@
+"""Tests for the deduplication lookup cache."""
+from typing import Iterator, Optional
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from rpa_tracker.models.schema import create_schema
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.tracking.deduplication.cache import BloomFilter, CachedDeduplication
+from rpa_tracker.tracking.deduplication.hashed import HashedFingerprintDeduplication
+from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.domain.cancel_payload import CancelacionPayload
+from test.infra.models.data_repository import DataRepository
+from test.infra.models.tx_data import Base as DataBase, TxData
+from test.infra.query_counter import count_queries
+from test.tracking.fake_deduplication import CancelacionDeduplication
+
+
+class KeyedDeduplication:
+    """Stores one RPA_TX_DATA row per fingerprint, so a second insert collides."""
+    version = 1
+    enforces_uniqueness = True
+
+    def __init__(self, session):
+        self.session = session
+
+    def calculate_fingerprint(self, payload: str) -> str:
+        """Payloads are their own fingerprint."""
+        return payload
+
+    def find_existing_uuid(self, fingerprint: str) -> Optional[str]:
+        """The transaction uuid is kept in ``nombre``."""
+        row = self.session.get(TxData, fingerprint)
+        return row.nombre if row else None
+
+    def persist_data(self, uuid: str, payload: str) -> None:
+        """Add the row; the tracker flushes it."""
+        self.session.add(_data(payload, uuid))
+
+    def iter_fingerprints(self) -> Iterator[str]:
+        """Every stored fingerprint, for warming the cache."""
+        return (uuid for uuid, in self.session.query(TxData.uuid))
+
+
+def _data(fingerprint: str, uuid: str) -> TxData:
+    return TxData(uuid=fingerprint, requerimiento=fingerprint, tipo_operacion="ALTA", nombre=uuid)
+
+
+def _data_lookups(counter) -> int:
+    return sum(1 for s in counter.statements if s.startswith("SELECT") and "RPA_TX_DATA" in s)
+
+
+@pytest.fixture
+def two_sessions(tmp_path, registries):
+    """Two sessions on the same file database, like two workers."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'dedup.db'}")
+    create_schema(engine)
+    DataBase.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as first, factory() as second:
+        yield first, second
+    engine.dispose()
+
+
+def _start_in(session, cache, payload):
+    """start_or_resume on ``session`` with ``cache`` as the strategy of ``P``."""
+    DeduplicationRegistry.register("P", cache)
+    return SqlTransactionTracker(session).start_or_resume("P", payload)
+
+
+@pytest.fixture
+def cached(session):
+    """Cached ``KeyedDeduplication`` registered for process ``P``."""
+    DeduplicationRegistry.register("P", KeyedDeduplication(session))
+    return DeduplicationRegistry.enable_cache("P", max_entries=2, expected_fingerprints=1000)
+
+
+def test_warm_filter_answers_new_fingerprints(session, cached):
+    """After warming, unseen fingerprints never reach the strategy."""
+    session.add(_data("FE-1", "tx-1"))
+    session.commit()
+    assert cached.warm() == 1
+    tracker = SqlTransactionTracker(session)
+
+    with count_queries(session.get_bind()) as counter:
+        results = [tracker.start_or_resume("P", p) for p in ("FE-2", "FE-3")]
+        existing = tracker.start_or_resume("P", "FE-1")
+
+    assert all(is_new for _, is_new in results)
+    assert existing == ("tx-1", False)
+    assert _data_lookups(counter) == 1
+    stats = cached.stats()
+    assert (stats.negative_hits, stats.misses, stats.hits) == (2, 1, 0)
+
+
+def test_confirmed_uuids_are_served_from_the_lru(session, cached):
+    """A fingerprint seen in the same run costs one strategy lookup."""
+    cached.warm([])
+    tracker = SqlTransactionTracker(session)
+    uuid_tx, _ = tracker.start_or_resume("P", "FE-1")
+
+    with count_queries(session.get_bind()) as counter:
+        repeats = [tracker.start_or_resume("P", "FE-1") for _ in range(3)]
+
+    assert repeats == [(uuid_tx, False)] * 3
+    assert _data_lookups(counter) == 1
+    assert cached.stats().hits == 2
+
+
+def test_lost_race_invalidates_the_fingerprint(session, cached):
+    """Another worker inserted the fingerprint after warm-up: the retry asks the strategy."""
+    cached.warm([])
+    session.add(_data("FE-9", "winner"))
+    session.commit()
+    tracker = SqlTransactionTracker(session)
+
+    assert tracker.start_or_resume("P", "FE-9") == ("winner", False)
+    assert tracker.start_or_resume("P", "FE-9") == ("winner", False)
+
+    stats = cached.stats()
+    assert (stats.negative_hits, stats.invalidations, stats.misses, stats.hits) == (1, 1, 1, 1)
+    assert session.query(TxProcess).count() == 0
+
+
+def test_lost_race_in_bulk_intake(session, cached):
+    """A failed chunk invalidates its fingerprints before being replayed."""
+    cached.warm([])
+    session.add(_data("FE-2", "winner"))
+    session.commit()
+
+    results = SqlTransactionTracker(session).start_or_resume_many("P", ["FE-1", "FE-2", "FE-3"])
+
+    assert results[1] == ("winner", False)
+    assert [is_new for _, is_new in results] == [True, False, True]
+    assert session.query(TxProcess).count() == 2
+
+
+def test_stale_filter_without_unique_constraint_asks_the_strategy(two_sessions):
+    """Without a uniqueness guarantee a Bloom miss is confirmed, so workers do not duplicate."""
+    first, second = two_sessions
+    caches = [CachedDeduplication(CancelacionDeduplication(DataRepository(s))) for s in two_sessions]
+    for cache in caches:
+        cache.warm([])
+    payload = CancelacionPayload(requerimiento="FE-1", tipo_operacion="ALTA", nombre="Ana")
+
+    uuid_tx, is_new = _start_in(first, caches[0], payload)
+
+    assert is_new
+    assert _start_in(second, caches[1], payload) == (uuid_tx, False)
+    assert second.query(TxProcess).count() == 1
+    assert caches[1].stats().negative_hits == 0
+
+
+def test_stale_filter_on_unique_strategy_reserves_the_fingerprint(two_sessions):
+    """Two warmed caches over the hashed strategy converge on one transaction without a rollback."""
+    first, second = two_sessions
+    caches = [
+        CachedDeduplication(HashedFingerprintDeduplication(s, "P", fields=["requerimiento"]))
+        for s in two_sessions
+    ]
+    for cache in caches:
+        cache.warm()
+    payload = {"requerimiento": "FE-1"}
+
+    uuid_tx, is_new = _start_in(first, caches[0], payload)
+
+    assert is_new
+    assert _start_in(second, caches[1], payload) == (uuid_tx, False)
+    assert _start_in(second, caches[1], payload) == (uuid_tx, False)
+    assert second.query(TxProcess).count() == 1
+    stats = caches[1].stats()
+    assert (stats.negative_hits, stats.invalidations, stats.hits) == (1, 0, 1)
+
+
+def test_lru_is_bounded(cached):
+    """The least recently used fingerprint is evicted first."""
+    cached._remember({"a": "1", "b": "2"})
+    cached.find_existing_uuid("a")
+    cached._remember({"c": "3"})
+
+    assert set(cached._entries) == {"a", "c"}
+    assert cached.stats().evictions == 1
+
+
+def test_enable_cache_is_idempotent(cached):
+    """Enabling the cache twice keeps the first wrapper."""
+    assert DeduplicationRegistry.enable_cache("P") is cached
+    assert isinstance(DeduplicationRegistry.get("P"), CachedDeduplication)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Every added item is reported present; most others are not."""
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"in-{i}")
+
+    assert all(f"in-{i}" in bloom for i in range(1000))
+    assert sum(f"out-{i}" in bloom for i in range(1000)) < 50
@@ -0,0 +1,135 @@
+"""Tests for the built-in hashed fingerprint deduplication."""
+import pytest
+from sqlalchemy import event
+
+from rpa_tracker.models.tx_fingerprint import TxFingerprint
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.tracking import sql_dialect
+from rpa_tracker.tracking.deduplication.hashed import HashedFingerprintDeduplication
+from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.domain.cancel_payload import CancelacionPayload
+from test.infra.query_counter import count_queries
+from test.models.test_schema import query_plans
+
+
+class LateDeduplication(HashedFingerprintDeduplication):
+    """Misses its first lookup, as if the winner committed right after it."""
+
+    def find_existing_uuid(self, fingerprint):
+        """Return None once, then look up for real."""
+        if not getattr(self, "looked_up", False):
+            self.looked_up = True
+            return None
+        return super().find_existing_uuid(fingerprint)
+
+
+def _payload(requerimiento: str, nombre: str = "X") -> CancelacionPayload:
+    return CancelacionPayload(requerimiento=requerimiento, tipo_operacion="ALTA", nombre=nombre)
+
+
+@pytest.fixture
+def tracker(session):
+    """SQL tracker with the hashed strategy registered for ``CANC_PROC``."""
+    DeduplicationRegistry.register(
+        "CANC_PROC", HashedFingerprintDeduplication(session, "CANC_PROC", fields=["requerimiento"])
+    )
+    return SqlTransactionTracker(session)
+
+
+def test_same_fields_resolve_to_the_same_transaction(session, tracker):
+    """Only the configured fields make up the fingerprint."""
+    uuid_tx, is_new = tracker.start_or_resume("CANC_PROC", _payload("FE-1", "Ana"))
+
+    assert is_new
+    assert tracker.start_or_resume("CANC_PROC", _payload("FE-1", "Bea")) == (uuid_tx, False)
+    assert tracker.start_or_resume("CANC_PROC", {"requerimiento": "FE-1"}) == (uuid_tx, False)
+    [row] = session.query(TxFingerprint).all()
+    assert (row.process_code, row.version, len(row.digest), row.uuid) == ("CANC_PROC", 1, 32, uuid_tx)
+
+
+def test_bulk_intake_and_versions(session, tracker):
+    """Batch hooks resolve in one query; a new version is a new fingerprint space."""
+    results = tracker.start_or_resume_many("CANC_PROC", [_payload("FE-1"), _payload("FE-2"), _payload("FE-1")])
+
+    assert [is_new for _, is_new in results] == [True, True, False]
+    assert results[0][0] == results[2][0]
+
+    DeduplicationRegistry.register(
+        "CANC_PROC", HashedFingerprintDeduplication(session, "CANC_PROC", fields=["requerimiento"], version=2)
+    )
+    assert tracker.start_or_resume("CANC_PROC", _payload("FE-1"))[1]
+    assert session.query(TxProcess).count() == 3
+
+
+def test_lookup_is_a_unique_index_probe(session, tracker):
+    """Existence checks seek the unique index."""
+    dedup = DeduplicationRegistry.get("CANC_PROC")
+    fingerprint = dedup.calculate_fingerprint(_payload("FE-1"))
+
+    [plan] = query_plans(session, lambda: dedup.find_existing_uuid(fingerprint))
+
+    assert "UX_RPA_TX_FINGERPRINT (process_code=? AND version=? AND digest=?)" in plan
+
+
+def test_concurrent_insert_resolves_to_the_winner(session):
+    """A duplicate insert hits the unique index and returns the stored uuid."""
+    dedup = LateDeduplication(session, "CANC_PROC", fields=["requerimiento"])
+    DeduplicationRegistry.register("CANC_PROC", dedup)
+    session.add(TxFingerprint(**dedup._row("winner", dedup.calculate_fingerprint(_payload("FE-1")))))
+    session.commit()
+
+    assert SqlTransactionTracker(session).start_or_resume("CANC_PROC", _payload("FE-1")) == ("winner", False)
+    assert session.query(TxProcess).count() == 0
+
+
+def test_requires_fields_or_key(session):
+    """Exactly one way of building the fingerprint."""
+    with pytest.raises(ValueError):
+        HashedFingerprintDeduplication(session, "P")
+    with pytest.raises(ValueError):
+        HashedFingerprintDeduplication(session, "P", fields=["a"], key=str)
+
+
+def _late_tracker(session, **options):
+    dedup = LateDeduplication(session, "CANC_PROC", fields=["requerimiento"])
+    DeduplicationRegistry.register("CANC_PROC", dedup)
+    session.add(TxFingerprint(**dedup._row("winner", dedup.calculate_fingerprint(_payload("FE-1")))))
+    session.add(TxProcess(uuid="loaded", process_code="CANC_PROC", state="PENDING"))
+    session.commit()
+    return SqlTransactionTracker(session, **options)
+
+
+def test_lost_race_is_one_upsert_without_rollback(session):
+    """The loser gets the winner's uuid from a single statement; the session keeps its state."""
+    tracker = _late_tracker(session, autocommit=False)
+    loaded = session.get(TxProcess, "loaded")
+    rollbacks = []
+    event.listen(session, "after_soft_rollback", lambda *_: rollbacks.append(1))
+
+    with count_queries(session.get_bind()) as counter:
+        result = tracker.start_or_resume("CANC_PROC", _payload("FE-1"))
+
+    assert result == ("winner", False)
+    assert rollbacks == []
+    [upsert] = [s for s in counter.statements if not s.startswith(("SAVEPOINT", "RELEASE"))]
+    assert "ON CONFLICT" in upsert and "RETURNING" in upsert
+    assert "state" in vars(loaded)
+    assert session.query(TxProcess).count() == 1
+
+
+def test_upsert_fallback_uses_a_savepoint(session, monkeypatch):
+    """Dialects without ON CONFLICT lose the race inside a savepoint only."""
+    monkeypatch.setattr(sql_dialect, "UPSERT_DIALECTS", {})
+    tracker = _late_tracker(session)
+
+    with tracker.batch():
+        tracker.start_stage("loaded", "A")
+        assert tracker.start_or_resume("CANC_PROC", _payload("FE-1")) == ("winner", False)
+        uuid_tx, is_new = tracker.start_or_resume("CANC_PROC", _payload("FE-2"))
+
+    assert is_new
+    assert session.query(TxStage).count() == 1
+    assert {p.uuid for p in session.query(TxProcess)} == {"loaded", uuid_tx}
@@ -0,0 +1,119 @@
+"""Tests for the opt-in tracker instrumentation."""
+import json
+import logging
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.instrumentation import Instrumentation
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.reporting.transaction_report_repository import TransactionReportRepository
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.infra.query_counter import count_queries
+
+
+def _seed(session, *uuids):
+    PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+    PlatformRegistry.register(PlatformDefinition(code="B", order=2))
+    session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in uuids)
+    session.commit()
+    SqlTransactionTracker(session).materialize_plan(list(uuids))
+
+
+def test_disabled_instrumentation_wraps_nothing(session):
+    """Without an instrumentation the methods are the plain class methods."""
+    tracker = SqlTransactionTracker(session)
+
+    assert not set(SqlTransactionTracker.INSTRUMENTED_METHODS) & set(vars(tracker))
+
+
+def test_records_calls_statements_and_rows(session):
+    """Per-method calls, histogram, statements and rows; nested calls are inclusive."""
+    _seed(session, "u1", "u2")
+    instrumentation = Instrumentation()
+    tracker = SqlTransactionTracker(session, instrumentation=instrumentation)
+
+    with count_queries(session.get_bind()) as counter:
+        tracker.finish_stage("u1", "A", TransactionState.COMPLETED, stage="validar")
+    tracker.complete_stage("u2", "A", ExecutionResult(error_code=0), stage="validar")
+    tracker.get_pending_stages("B")
+
+    methods = instrumentation.snapshot().methods
+    finish = methods["SqlTransactionTracker.finish_stage"]
+    assert finish.calls == 2
+    assert sum(finish.histogram) == 2
+    assert finish.errors == 0
+    assert finish.rows >= 2
+
+    complete = methods["SqlTransactionTracker.complete_stage"]
+    log_event = methods["SqlTransactionTracker.log_event"]
+    assert complete.calls == 1
+    assert complete.statements == log_event.statements + finish.statements - counter.count
+    assert methods["SqlTransactionTracker.get_pending_stages"].statements == 1
+
+
+def test_report_repository_is_instrumented(session):
+    """Report methods share the same instrumentation surface."""
+    from datetime import datetime, timedelta
+
+    instrumentation = Instrumentation()
+    repo = TransactionReportRepository(session, instrumentation=instrumentation)
+    repo.summary_by_state(datetime.now() - timedelta(days=1), datetime.now())
+
+    stats = instrumentation.snapshot().methods["TransactionReportRepository.summary_by_state"]
+    assert (stats.calls, stats.statements) == (1, 1)
+
+
+def test_one_log_line_per_batch(session, caplog):
+    """Each batch logs its own activity as JSON and starts a new count."""
+    _seed(session, "u1", "u2")
+    instrumentation = Instrumentation(log_batches=True)
+    tracker = SqlTransactionTracker(session, instrumentation=instrumentation)
+
+    with caplog.at_level(logging.INFO, logger="rpa_tracker.instrumentation"):
+        for uuid in ("u1", "u2"):
+            with tracker.batch():
+                tracker.complete_stage(uuid, "A", ExecutionResult(error_code=0), stage="validar")
+
+    lines = [r for r in caplog.records if r.name == "rpa_tracker.instrumentation"]
+    assert len(lines) == 2
+    for record in lines:
+        payload = json.loads(record.getMessage().split(" ", 2)[2])
+        assert payload["label"] == "batch"
+        assert payload["methods"]["SqlTransactionTracker.complete_stage"]["calls"] == 1
+        assert record.instrumentation == payload
+
+
+def test_failed_statement_leaves_no_timing_state(session):
+    """A statement that raises does not leak its start time into later timings."""
+    class Probe:
+        def fail(self):
+            session.execute(text("SELECT * FROM missing_table"))
+
+        def ok(self):
+            session.execute(text("SELECT 1"))
+
+    probe = Probe()
+    instrumentation = Instrumentation()
+    instrumentation.instrument(probe, ("fail", "ok"), session.get_bind())
+
+    for _ in range(3):
+        with pytest.raises(OperationalError):
+            probe.fail()
+        session.rollback()
+    time.sleep(0.05)
+    probe.ok()
+
+    methods = instrumentation.snapshot().methods
+    assert methods["Probe.fail"].errors == 3
+    ok = methods["Probe.ok"]
+    assert ok.statements == 1
+    assert ok.sql_ms < 50
+    assert not any(str(key).startswith("rpa_tracker") for key in session.connection().info)
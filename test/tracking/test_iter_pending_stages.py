@@ -0,0 +1,58 @@
+"""Tests for the streaming pending stage iterator."""
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.infra.query_counter import count_queries
+
+
+def _seed(session, tracker, count):
+    PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+    uuids = [f"u{i:03d}" for i in range(count)]
+    session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in uuids)
+    session.commit()
+    tracker.materialize_plan(uuids)
+    session.expunge_all()
+    return uuids
+
+
+def test_iter_pending_stages_streams_all_pages(session):
+    """Every eligible stage is yielded once, in uuid order, one query per page."""
+    tracker = SqlTransactionTracker(session)
+    uuids = _seed(session, tracker, 25)
+
+    with count_queries(session.get_bind()) as counter:
+        streamed = [s.uuid for s in tracker.iter_pending_stages("A", stage="validar", page_size=10)]
+
+    assert streamed == uuids
+    assert counter.count == 3
+
+
+def test_iter_pending_stages_keeps_identity_map_bounded(session):
+    """Consumed pages are expunged from the session."""
+    tracker = SqlTransactionTracker(session)
+    _seed(session, tracker, 30)
+
+    peak = 0
+    for _ in tracker.iter_pending_stages("A", stage="validar", page_size=10):
+        peak = max(peak, len(session.identity_map))
+
+    assert peak <= 10
+    assert len(session.identity_map) == 0
+
+
+def test_iter_pending_stages_while_completing(session):
+    """Finishing stages during the iteration does not skip or repeat any."""
+    tracker = SqlTransactionTracker(session)
+    uuids = _seed(session, tracker, 12)
+
+    seen = []
+    for stage in tracker.iter_pending_stages("A", stage="validar", page_size=5):
+        seen.append(stage.uuid)
+        tracker.complete_stage(stage.uuid, "A", ExecutionResult(error_code=0), stage="validar")
+
+    assert seen == uuids
+    assert tracker.get_pending_stages("A", stage="validar") == []
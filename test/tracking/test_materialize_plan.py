@@ -0,0 +1,83 @@
+"""Tests for the one-shot stage plan materialization."""
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.tracking import sql_dialect
+from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.domain.cancel_payload import CancelacionPayload
+from test.infra.models.data_repository import DataRepository
+from test.infra.query_counter import count_queries
+from test.tracking.fake_deduplication import CancelacionDeduplication
+
+
+def _register_platforms():
+    PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+    PlatformRegistry.register(PlatformDefinition(code="B", stages=("procesar", "confirmar"), order=2))
+    PlatformRegistry.register(PlatformDefinition(code="C", order=3))
+
+
+def _keys(session):
+    return sorted((s.uuid, s.system, s.stage) for s in session.query(TxStage))
+
+
+def test_materialize_plan_single_insert(session):
+    """The whole plan for many transactions is one insert, plus one counter update."""
+    _register_platforms()
+    tracker = SqlTransactionTracker(session)
+
+    with count_queries(session.get_bind()) as counter:
+        tracker.materialize_plan(["u1", "u2"])
+
+    assert counter.count == 2
+    assert len(_keys(session)) == 8
+    assert {s.state for s in session.query(TxStage)} == {TransactionState.PENDING.value}
+
+
+def test_materialize_plan_skips_existing_stages(session):
+    """Existing stages keep their state and are not duplicated."""
+    _register_platforms()
+    tracker = SqlTransactionTracker(session)
+    tracker.start_stage("u1", "A", stage="validar")
+    session.query(TxStage).update({"state": TransactionState.COMPLETED.value})
+    session.commit()
+
+    tracker.materialize_plan("u1")
+    tracker.materialize_plan(["u1"])
+
+    assert len(_keys(session)) == 4
+    stage_a = session.query(TxStage).filter_by(uuid="u1", system="A").one()
+    assert stage_a.state == TransactionState.COMPLETED.value
+
+
+def test_materialize_plan_portable_fallback(session, monkeypatch):
+    """Dialects without ON CONFLICT filter the existing keys first."""
+    _register_platforms()
+    monkeypatch.setattr(sql_dialect, "dialect_name", lambda _: "oracle")
+    tracker = SqlTransactionTracker(session)
+    tracker.start_stage("u1", "B", stage="procesar")
+
+    tracker.materialize_plan(["u1", "u2"])
+
+    assert len(_keys(session)) == 8
+
+
+def test_materialize_on_start(session):
+    """New transactions get their plan inside the intake commit."""
+    _register_platforms()
+    DeduplicationRegistry.register("PLAN", CancelacionDeduplication(DataRepository(session)))
+    tracker = SqlTransactionTracker(session, materialize_on_start=True)
+
+    uuid, _ = tracker.start_or_resume(
+        "PLAN", CancelacionPayload(requerimiento="FE-1", tipo_operacion="ALTA", nombre="X")
+    )
+    results = tracker.start_or_resume_many(
+        "PLAN",
+        [CancelacionPayload(requerimiento=f"FE-{i}", tipo_operacion="ALTA", nombre="X") for i in (1, 2, 3)],
+    )
+
+    assert results[0] == (uuid, False)
+    assert len(_keys(session)) == 3 * 4
+    assert len(tracker.get_pending_stages("A", stage="validar")) == 3
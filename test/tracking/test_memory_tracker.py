@@ -0,0 +1,64 @@
+"""Tests for the in-memory tracker backend."""
+import pytest
+from sqlalchemy.exc import NoResultFound
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.retry.policy import RetryPolicy
+from rpa_tracker.retry.registry import RetryPolicyRegistry
+from rpa_tracker.tracking.memory_tracker import InMemoryTransactionTracker
+
+from test.infra.backends import MemoryBackend, SqlBackend
+from test.tracking.test_complete_stages import SCENARIO, _register_platforms
+
+UUIDS = ("ok", "rejected", "retry")
+
+
+def _state(backend):
+    processes = sorted(
+        (p.uuid, p.state, p.error_type, p.error_description, p.total_stages, p.completed_stages, p.failed_stages)
+        for p in backend.processes()
+    )
+    stages = sorted(
+        (s.uuid, s.system, s.stage, s.state, s.attempt, s.error_type, s.error_description)
+        for u in UUIDS for s in backend.stages(u)
+    )
+    events = sorted((e.uuid, e.system, e.stage, e.attempt, e.error_code) for u in UUIDS for e in backend.events(u))
+    return processes, stages, events
+
+
+def _run(backend):
+    tracker = backend.tracker
+    backend.add_processes(UUIDS)
+    tracker.materialize_plan(list(UUIDS))
+
+    pending = [
+        sorted(s.uuid for s in tracker.get_pending_stages(system, stage))
+        for system, stage in (("A", "validar"), ("B", "procesar"))
+    ]
+    results = [tracker.complete_stage(u, system, ExecutionResult(error_code=code), stage=stage)
+               for u, system, stage, code in SCENARIO]
+    pending.append(sorted(s.uuid for s in tracker.get_pending_stages("C")))
+    return results, pending, _state(backend)
+
+
+def test_memory_backend_matches_sql_backend(session):
+    """Both backends give the same results, eligibility and rows."""
+    _register_platforms()
+    RetryPolicyRegistry.register("B", RetryPolicy(max_attempts=2))
+
+    sql = _run(SqlBackend(session))
+    memory = _run(MemoryBackend(session))
+
+    assert memory == sql
+
+
+def test_unknown_stage_raises(registries):
+    """Missing stages fail like Query.one on the SQL backend."""
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1))
+    tracker = InMemoryTransactionTracker()
+
+    with pytest.raises(NoResultFound):
+        tracker.log_event("nope", "A", 0, None)
+    assert tracker.finish_stage("nope", "A", ExecutionResult(error_code=0).state) is None
@@ -0,0 +1,99 @@
+"""Tests for the optimistic process updates of SqlTransactionTracker."""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm.exc import StaleDataError
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.infra.query_counter import count_queries
+
+
+def _setup(session, *uuids):
+    PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+    PlatformRegistry.register(PlatformDefinition(code="B", stages=("procesar", "confirmar"), order=2))
+    session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in uuids)
+    session.commit()
+    tracker = SqlTransactionTracker(session, optimistic_locking=True)
+    tracker.materialize_plan(list(uuids))
+    return tracker
+
+
+def _process(session, uuid):
+    process = session.query(TxProcess).filter_by(uuid=uuid).populate_existing().one()
+    return process.state, process.completed_stages, process.failed_stages, process.version
+
+
+@contextmanager
+def _concurrent_writer(session, times):
+    """Bump the process version right before the next ``times`` conditional updates."""
+    remaining = [times]
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if remaining[0] and statement.startswith('UPDATE "RPA_TX_PROCESS"') and "version =" in statement:
+            remaining[0] -= 1
+            cursor.execute('UPDATE "RPA_TX_PROCESS" SET version = version + 1')
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_flow_matches_locking_mode(session):
+    """Counters, transitions and cancellations are the same as with row locks."""
+    tracker = _setup(session, "u1", "u2")
+
+    tracker.complete_stage("u1", "A", ExecutionResult(error_code=-1), stage="validar")
+    assert _process(session, "u1")[:3] == (TransactionState.TERMINATED.value, 0, 1)
+
+    for system, stage in (("A", "validar"), ("B", "procesar"), ("B", "confirmar")):
+        tracker.complete_stage("u1", system, ExecutionResult(error_code=0), stage=stage)
+    assert _process(session, "u1")[:3] == (TransactionState.COMPLETED.value, 3, 0)
+
+    tracker.complete_stage("u2", "A", ExecutionResult(error_code=4), stage="validar")
+    assert _process(session, "u2")[:3] == (TransactionState.REJECTED.value, 0, 3)
+
+
+def test_process_update_is_conditional_and_unlocked(session):
+    """One conditional UPDATE on the version replaces SELECT ... FOR UPDATE."""
+    tracker = _setup(session, "u1")
+    version = _process(session, "u1")[3]
+
+    with count_queries(session.get_bind()) as counter:
+        tracker.complete_stage("u1", "A", ExecutionResult(error_code=0), stage="validar")
+
+    process_updates = [s for s in counter.statements if s.startswith('UPDATE "RPA_TX_PROCESS"')]
+    assert len(process_updates) == 1
+    assert '"RPA_TX_PROCESS".version = ?' in process_updates[0]
+    assert not any("FOR UPDATE" in s for s in counter.statements)
+    assert _process(session, "u1")[3] == version + 1
+
+
+def test_lost_update_is_retried(session):
+    """A process changed by another worker is read again and updated on top of it."""
+    tracker = _setup(session, "u1")
+    version = _process(session, "u1")[3]
+
+    with _concurrent_writer(session, times=2):
+        tracker.complete_stage("u1", "A", ExecutionResult(error_code=0), stage="validar")
+
+    assert _process(session, "u1") == (TransactionState.IN_PROGRESS.value, 1, 0, version + 3)
+
+
+def test_retries_are_bounded(session):
+    """A process that keeps changing raises StaleDataError."""
+    tracker = _setup(session, "u1")
+
+    with _concurrent_writer(session, times=SqlTransactionTracker.OPTIMISTIC_ATTEMPTS):
+        with pytest.raises(StaleDataError):
+            tracker.complete_stage("u1", "A", ExecutionResult(error_code=0), stage="validar")
+    session.rollback()
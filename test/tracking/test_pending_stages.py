@@ -0,0 +1,106 @@
+"""Tests for the set-based eligibility query of get_pending_stages."""
+import uuid as uuid_lib
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.infra.query_counter import count_queries
+
+
+def _register_platforms():
+    PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+    PlatformRegistry.register(PlatformDefinition(code="B", stages=("procesar", "confirmar"), order=2))
+    PlatformRegistry.register(PlatformDefinition(code="C", order=3))
+
+
+def _seed(session, count, completed_upto):
+    """Create ``count`` transactions with platforms completed up to ``completed_upto``."""
+    uuids = []
+    for _ in range(count):
+        uuid = str(uuid_lib.uuid4())
+        uuids.append(uuid)
+        session.add(TxProcess(uuid=uuid, process_code="P", state=TransactionState.IN_PROGRESS.value))
+
+        for platform in PlatformRegistry.all():
+            for stage_name in platform.stages:
+                done = platform.order <= completed_upto
+                session.add(
+                    TxStage(
+                        uuid=uuid,
+                        system=platform.code,
+                        stage=stage_name,
+                        state=(TransactionState.COMPLETED if done else TransactionState.PENDING).value,
+                        attempt=1 if done else 0,
+                    )
+                )
+    session.commit()
+    return uuids
+
+
+def test_pending_stages_respect_previous_platforms(session):
+    """Only transactions whose previous platforms are completed are returned."""
+    _register_platforms()
+    ready = _seed(session, 3, completed_upto=2)
+    _seed(session, 2, completed_upto=1)
+    _seed(session, 2, completed_upto=0)
+
+    # Half-completed B: only one of the two stages done
+    partial = _seed(session, 1, completed_upto=1)[0]
+    session.query(TxStage).filter_by(uuid=partial, system="B", stage="procesar").update(
+        {"state": TransactionState.COMPLETED.value}
+    )
+    session.commit()
+
+    tracker = SqlTransactionTracker(session)
+
+    assert len(tracker.get_pending_stages("A", stage="validar")) == 2
+    assert len(tracker.get_pending_stages("B", stage="procesar")) == 2
+    assert len(tracker.get_pending_stages("B", stage="confirmar")) == 3
+    assert {s.uuid for s in tracker.get_pending_stages("C")} == set(ready)
+
+
+def test_pending_stages_skip_rejected_processes(session):
+    """Stages of rejected transactions are never eligible."""
+    _register_platforms()
+    uuid = _seed(session, 1, completed_upto=2)[0]
+    session.query(TxProcess).filter_by(uuid=uuid).update({"state": TransactionState.REJECTED.value})
+    session.commit()
+
+    tracker = SqlTransactionTracker(session)
+    assert tracker.get_pending_stages("C") == []
+
+
+def test_pending_stages_query_count_is_constant(session):
+    """The number of statements does not depend on the size of the backlog."""
+    _register_platforms()
+    tracker = SqlTransactionTracker(session)
+    engine = session.get_bind()
+
+    _seed(session, 5, completed_upto=2)
+    with count_queries(engine) as small:
+        assert len(tracker.get_pending_stages("C")) == 5
+
+    _seed(session, 100, completed_upto=2)
+    with count_queries(engine) as large:
+        assert len(tracker.get_pending_stages("C")) == 105
+
+    assert small.count == large.count == 1
+
+
+def test_independent_platforms_are_eligible_in_parallel(session):
+    """With depends_on, D only waits for A, not for B and C."""
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1))
+    PlatformRegistry.register(PlatformDefinition(code="B", order=2, depends_on=("A",)))
+    PlatformRegistry.register(PlatformDefinition(code="C", order=3, depends_on=("B",)))
+    PlatformRegistry.register(PlatformDefinition(code="D", order=4, depends_on=("A",)))
+    uuid = _seed(session, 1, completed_upto=1)[0]
+
+    tracker = SqlTransactionTracker(session)
+
+    assert [s.uuid for s in tracker.get_pending_stages("B")] == [uuid]
+    assert [s.uuid for s in tracker.get_pending_stages("D")] == [uuid]
+    assert tracker.get_pending_stages("C") == []
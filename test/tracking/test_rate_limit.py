@@ -0,0 +1,180 @@
+"""Tests for per-platform rate limits and concurrency caps."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.constants import DEFAULT_STAGE
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.tx_limiter import TxLimiter
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.retry.rate_limit import allowance, refill
+from rpa_tracker.tracking.rate_limiter import SqlRateLimiter
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+UUIDS = [f"u{i}" for i in range(6)]
+
+
+def _seed(backend, **limits):
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1, **limits))
+    backend.add_processes(UUIDS)
+    for uuid in UUIDS:
+        backend.tracker.start_stage(uuid, "A")
+
+
+def test_bucket_refills_up_to_one_minute():
+    """Tokens come back at the configured rate and never exceed one minute of burst."""
+    start = datetime(2024, 1, 1)
+
+    assert refill(0, start, 60, start + timedelta(seconds=2.5)) == 2.5
+    assert refill(10, start, 30, start + timedelta(hours=1)) == 30
+    assert allowance(2.5, None, 0) == 2
+    assert allowance(None, 3, 5) == 0
+    assert allowance(None, None, 0) is None
+
+
+def test_limits_are_validated():
+    """Non-positive limits are rejected when the platform is defined."""
+    with pytest.raises(ValueError):
+        PlatformDefinition(code="A", max_concurrency=0)
+    with pytest.raises(ValueError):
+        PlatformDefinition(code="A", max_rate_per_minute=0)
+
+
+def test_rate_limit_bounds_pending_stages(backend):
+    """Each returned stage takes a token; an empty bucket returns nothing until it refills."""
+    _seed(backend, max_rate_per_minute=4)
+
+    assert len(backend.tracker.get_pending_stages("A")) == 4
+    assert backend.tracker.get_pending_stages("A") == []
+    assert list(backend.tracker.iter_pending_stages("A")) == []
+    assert backend.tracker.next_due_at("A") > datetime.now() + timedelta(seconds=10)
+
+
+def test_unused_tokens_are_kept(backend):
+    """Only the stages actually returned take tokens."""
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1, max_rate_per_minute=4))
+    backend.add_processes(["u0"])
+    backend.tracker.start_stage("u0", "A")
+
+    assert len(backend.tracker.get_pending_stages("A")) == 1
+    backend.tracker.complete_stage("u0", "A", ExecutionResult(error_code=0))
+    backend.add_processes(UUIDS[1:])
+    for uuid in UUIDS[1:]:
+        backend.tracker.start_stage(uuid, "A")
+
+    assert len(backend.tracker.get_pending_stages("A")) == 3
+
+
+def test_taken_tokens_are_committed_on_their_own(sqlite_file_engine):
+    """Tokens count for every worker even when the caller never commits, which keeps its transaction."""
+    Session = sessionmaker(bind=sqlite_file_engine)
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1, max_rate_per_minute=4))
+    with Session() as session:
+        session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in UUIDS)
+        session.commit()
+        SqlTransactionTracker(session).materialize_plan(UUIDS)
+
+    with Session() as caller, Session() as other:
+        assert len(SqlTransactionTracker(caller, autocommit=False).get_pending_stages("A")) == 4
+        caller.rollback()
+
+        assert SqlTransactionTracker(other).get_pending_stages("A") == []
+
+
+def test_concurrency_cap_is_enforced_by_claims_only(backend):
+    """Pending reads return the free slots without leasing them; claims hold the cap."""
+    _seed(backend, max_concurrency=2)
+
+    assert len(backend.tracker.get_pending_stages("A")) == 2
+    assert len(backend.worker().get_pending_stages("A")) == 2
+
+    assert len(backend.tracker.claim_pending_stages("A", DEFAULT_STAGE, "vm-1", limit=5)) == 2
+    assert backend.tracker.get_pending_stages("A") == []
+    assert backend.worker().claim_pending_stages("A", DEFAULT_STAGE, "vm-2", limit=5) == []
+
+
+def _race_for_candidates(session, take_tokens: int = 0):
+    """Before the next lease UPDATE, another worker leases u0/u1 and takes ``take_tokens`` tokens."""
+    raced = []
+
+    @event.listens_for(session, "do_orm_execute")
+    def _race(state):
+        if not state.is_update or raced:
+            return
+        raced.append(True)
+        until = datetime.now() + timedelta(minutes=5)
+        session.query(TxStage).filter(TxStage.uuid.in_(["u0", "u1"])).update(
+            {"claimed_by": "vm-2", "claimed_until": until}, synchronize_session=False
+        )
+        if take_tokens:
+            SqlRateLimiter(session).acquire(PlatformRegistry.snapshot().by_code["A"], take_tokens, datetime.now())
+
+
+def test_claim_takes_tokens_only_for_won_stages(session):
+    """Candidates another worker leased first do not cost tokens."""
+    tracker = SqlTransactionTracker(session)
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1, max_rate_per_minute=4))
+    session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in UUIDS)
+    session.commit()
+    tracker.materialize_plan(UUIDS)
+    _race_for_candidates(session)
+
+    assert [s.uuid for s in tracker.claim_pending_stages("A", DEFAULT_STAGE, "vm-1", limit=4)] == ["u2", "u3"]
+    assert [s.uuid for s in tracker.claim_pending_stages("A", DEFAULT_STAGE, "vm-1", limit=4)] == ["u4", "u5"]
+
+
+def test_claim_releases_stages_beyond_the_granted_tokens(session):
+    """Won stages the bucket can no longer pay for are released at once."""
+    tracker = SqlTransactionTracker(session)
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1, max_rate_per_minute=4))
+    session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in UUIDS)
+    session.commit()
+    tracker.materialize_plan(UUIDS)
+    _race_for_candidates(session, take_tokens=3)
+
+    assert [s.uuid for s in tracker.claim_pending_stages("A", DEFAULT_STAGE, "vm-1", limit=4)] == ["u2"]
+    released = session.query(TxStage).filter_by(uuid="u3").populate_existing().one()
+    assert released.claimed_by is None and released.claimed_until is None
+
+
+def test_concurrency_cap_is_shared_by_workers(backend):
+    """Leases count against ``max_concurrency`` for every worker; finishing frees a slot."""
+    first = backend.tracker
+    second = backend.worker()
+    _seed(backend, max_concurrency=2)
+
+    claimed = first.claim_pending_stages("A", DEFAULT_STAGE, "vm-1", limit=5)
+    assert len(claimed) == 2
+    assert second.claim_pending_stages("A", DEFAULT_STAGE, "vm-2", limit=5) == []
+
+    second.complete_stage(claimed[0].uuid, "A", ExecutionResult(error_code=0))
+    assert len(second.claim_pending_stages("A", DEFAULT_STAGE, "vm-2", limit=5)) == 1
+
+
+def test_lost_compare_and_set_rereads_the_bucket(session):
+    """A worker whose admission raced another one retries against the new bucket."""
+    platform = PlatformDefinition(code="A", max_rate_per_minute=3)
+    limiter = SqlRateLimiter(session)
+    now = datetime.now()
+    assert limiter.acquire(platform, 1, now) == 1
+
+    class RacingLimiter(SqlRateLimiter):
+        raced = False
+
+        def _read(self, system):
+            bucket = super()._read(system)
+            if not self.raced:
+                # Another worker takes a token between our read and our update
+                self.raced = True
+                SqlRateLimiter(session).acquire(platform, 1, now)
+            return bucket
+
+    assert RacingLimiter(session).acquire(platform, 5, now) == 1
+    session.commit()
+    assert session.get(TxLimiter, "A").version == 3
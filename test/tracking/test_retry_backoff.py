@@ -0,0 +1,98 @@
+"""Tests for retry backoff of TERMINATED stages."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.constants import DEFAULT_STAGE
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import ErrorType, TransactionState
+from rpa_tracker.retry.policy import RetryPolicy
+from rpa_tracker.retry.registry import RetryPolicyRegistry
+
+BACKOFF = RetryPolicy(max_attempts=5, base_delay_seconds=60, multiplier=2, max_delay_seconds=300)
+
+
+def _register(policy=BACKOFF):
+    PlatformRegistry.register(PlatformDefinition(code="A", retry_policy=policy, order=1))
+    RetryPolicyRegistry.register("A", policy)
+
+
+def _stage(backend, uuid):
+    [stage] = backend.stages(uuid)
+    return stage
+
+
+def test_delay_grows_exponentially_up_to_the_cap():
+    """Delay is base * multiplier ** (attempt - 1), capped."""
+    assert [BACKOFF.delay(attempt) for attempt in (1, 2, 3, 4)] == [60, 120, 240, 300]
+    assert RetryPolicy().next_attempt_at(3) is None
+
+
+def test_jitter_stays_within_bounds():
+    """Jitter spreads the delay by at most the given fraction."""
+    policy = RetryPolicy(base_delay_seconds=100, jitter=0.2)
+
+    assert all(80 <= policy.delay(1) <= 120 for _ in range(200))
+
+
+def test_invalid_policy_is_rejected():
+    """Negative delays and out-of-range jitter are configuration errors."""
+    with pytest.raises(ValueError):
+        RetryPolicy(base_delay_seconds=-1)
+    with pytest.raises(ValueError):
+        RetryPolicy(jitter=2)
+
+
+def test_terminated_stage_waits_for_its_backoff(backend):
+    """A failed stage is hidden from pending queries until it is due."""
+    _register()
+    backend.add_processes(["u1"])
+    tracker = backend.tracker
+    tracker.start_stage("u1", "A")
+    before = datetime.now()
+
+    tracker.finish_stage("u1", "A", TransactionState.TERMINATED, ErrorType.SYSTEM, "down")
+
+    stage = _stage(backend, "u1")
+    assert before + timedelta(seconds=60) <= stage.next_attempt_at <= datetime.now() + timedelta(seconds=60)
+    assert tracker.get_pending_stages("A") == []
+    assert tracker.next_due_at("A") == stage.next_attempt_at
+
+    stage.next_attempt_at = datetime.now() - timedelta(seconds=1)
+    backend.session.commit()
+    assert [s.uuid for s in tracker.get_pending_stages("A")] == ["u1"]
+    assert tracker.next_due_at("A") <= datetime.now()
+
+
+def test_backoff_grows_with_attempts_and_clears_on_success(backend):
+    """complete_stages schedules like finish_stage; a success clears the schedule."""
+    _register()
+    backend.add_processes(["u1"])
+    tracker = backend.tracker
+    tracker.start_stage("u1", "A")
+
+    delays = []
+    for _ in range(2):
+        tracker.complete_stages([("u1", "A", DEFAULT_STAGE, ExecutionResult(error_code=-1))])
+        stage = _stage(backend, "u1")
+        delays.append(stage.next_attempt_at - stage.last_attempt_at)
+        stage.next_attempt_at = None
+        backend.session.commit()
+
+    assert delays == [timedelta(seconds=60), timedelta(seconds=120)]
+
+    tracker.complete_stage("u1", "A", ExecutionResult(error_code=0))
+    assert _stage(backend, "u1").next_attempt_at is None
+
+
+def test_next_due_at_without_work(backend):
+    """No waiting stage: nothing to wait for."""
+    _register(RetryPolicy())
+    backend.add_processes(["u1"])
+
+    assert backend.tracker.next_due_at("A") is None
+
+    backend.tracker.start_stage("u1", "A")
+    assert backend.tracker.next_due_at("A") <= datetime.now()
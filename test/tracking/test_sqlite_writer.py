@@ -0,0 +1,130 @@
+"""Tests for the single-writer SQLite deployment."""
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import sessionmaker
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.schema import create_schema
+from rpa_tracker.models.tx_event import TxEvent
+from rpa_tracker.models.tx_fingerprint import TxFingerprint
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.tracking.deduplication.hashed import HashedFingerprintDeduplication
+from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+from rpa_tracker.tracking.sqlite_writer import SqliteWriter, create_sqlite_engine
+
+UUIDS = [f"u{i}" for i in range(40)]
+
+
+@pytest.fixture
+def factory(registries, tmp_path):
+    """Session factory on a WAL SQLite file holding forty PENDING transactions on platform A."""
+    engine = create_sqlite_engine(str(tmp_path / "tracker.db"), busy_timeout=5)
+    create_schema(engine)
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1))
+
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in UUIDS)
+        session.commit()
+        SqlTransactionTracker(session).materialize_plan(UUIDS)
+    yield Session
+    engine.dispose()
+
+
+def test_engine_enables_wal(factory):
+    """Connections use WAL, synchronous=NORMAL and the busy timeout."""
+    with factory() as session:
+        assert session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert session.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_threads_share_group_commits(factory):
+    """Writes from many threads are committed together; reads run beside the writer."""
+    with SqliteWriter(factory, max_delay=0.05) as writer:
+        def work(uuids):
+            futures = [writer.complete_stage(u, "A", ExecutionResult(error_code=0)) for u in uuids]
+            assert [f.result(timeout=10)[0] for f in futures] == [TransactionState.COMPLETED.value] * len(uuids)
+
+        threads = [threading.Thread(target=work, args=(UUIDS[i::4],)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        with factory() as reader:
+            SqlTransactionTracker(reader).get_pending_stages("A")
+        for thread in threads:
+            thread.join()
+
+    assert writer.operations == len(UUIDS)
+    assert writer.commits < len(UUIDS)
+    with factory() as session:
+        assert session.query(TxEvent).count() == len(UUIDS)
+        assert {p.state for p in session.query(TxProcess)} == {TransactionState.COMPLETED.value}
+
+
+def test_failed_operation_spares_its_group(factory):
+    """An operation that raises gets the exception; the rest of its group is committed."""
+    with SqliteWriter(factory, max_delay=0.2) as writer:
+        ok = writer.log_event("u0", "A", 0, "ok")
+        bad = writer.complete_stages([("u1", "Z", "nope", ExecutionResult(error_code=0))])
+        done = writer.complete_stage("u2", "A", ExecutionResult(error_code=0))
+
+        assert ok.result(timeout=10) is None
+        with pytest.raises(NoResultFound):
+            bad.result(timeout=10)
+        assert done.result(timeout=10)[0] == TransactionState.COMPLETED.value
+
+    assert (writer.operations, writer.commits) == (2, 1)
+    with factory() as session:
+        assert session.query(TxEvent).filter_by(uuid="u0").count() == 1
+
+
+def test_intake_uses_strategies_on_the_writer_session(factory):
+    """Intake through the writer deduplicates on its own session, beside a caller-bound registration."""
+    def hashed(session):
+        return HashedFingerprintDeduplication(session, "Q", fields=["id"])
+
+    with factory() as caller:
+        # A strategy bound to a caller's session, as registered for direct use
+        DeduplicationRegistry.register("Q", hashed(caller))
+
+        with SqliteWriter(factory, max_delay=0.05, deduplication={"Q": hashed}) as writer:
+            first = writer.start_or_resume("Q", {"id": 1})
+            second = writer.start_or_resume("Q", {"id": 2})
+            bulk = writer.start_or_resume_many("Q", [{"id": 1}, {"id": 3}])
+
+            uuid_1, is_new = first.result(timeout=10)
+            assert is_new
+            assert second.result(timeout=10)[1]
+            repeated, new = bulk.result(timeout=10)
+            assert repeated == (uuid_1, False)
+            assert new[1]
+
+            with pytest.raises(ValueError):
+                writer.start_or_resume("OTHER", {"id": 1})
+
+        # Nothing was written through the caller's session
+        assert not caller.in_transaction()
+
+    with factory() as session:
+        assert session.query(TxProcess).filter_by(process_code="Q").count() == 3
+        assert session.query(TxFingerprint).count() == 3
+
+
+def test_closed_writer_rejects_operations(factory):
+    """Queued operations are committed on close; later ones are refused."""
+    writer = SqliteWriter(factory)
+    pending = writer.log_event("u0", "A", 0, "ok")
+    writer.close()
+
+    assert pending.done()
+    with pytest.raises(RuntimeError):
+        writer.log_event("u0", "A", 0, "late")
+    with pytest.raises(ValueError):
+        SqliteWriter(factory, max_batch=0)
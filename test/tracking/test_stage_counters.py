@@ -0,0 +1,120 @@
+"""Tests for the stage counters kept on TxProcess."""
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from rpa_tracker.catalog.platform import PlatformDefinition
+from rpa_tracker.catalog.registry import PlatformRegistry
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.schema import create_schema, ensure_columns
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.infra.query_counter import count_queries
+
+
+def _setup(session, *uuids):
+    PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+    PlatformRegistry.register(PlatformDefinition(code="B", stages=("procesar", "confirmar"), order=2))
+    session.add_all(TxProcess(uuid=u, process_code="P", state=TransactionState.PENDING.value) for u in uuids)
+    session.commit()
+    tracker = SqlTransactionTracker(session)
+    tracker.materialize_plan(list(uuids))
+    return tracker
+
+
+def _counters(session, uuid):
+    process = session.query(TxProcess).filter_by(uuid=uuid).populate_existing().one()
+    return process.state, process.total_stages, process.completed_stages, process.failed_stages
+
+
+def test_counters_follow_the_flow(session):
+    """Retries move a stage from failed to completed; completion needs no COUNT."""
+    tracker = _setup(session, "u1")
+    assert _counters(session, "u1") == (TransactionState.PENDING.value, 3, 0, 0)
+
+    tracker.complete_stage("u1", "A", ExecutionResult(error_code=-1), stage="validar")
+    assert _counters(session, "u1") == (TransactionState.TERMINATED.value, 3, 0, 1)
+
+    tracker.complete_stage("u1", "A", ExecutionResult(error_code=0), stage="validar")
+    tracker.complete_stage("u1", "B", ExecutionResult(error_code=0), stage="procesar")
+    assert _counters(session, "u1")[1:] == (3, 2, 0)
+
+    with count_queries(session.get_bind()) as counter:
+        tracker.complete_stage("u1", "B", ExecutionResult(error_code=0), stage="confirmar")
+
+    assert not any("count(" in statement.lower() for statement in counter.statements)
+    assert _counters(session, "u1") == (TransactionState.COMPLETED.value, 3, 3, 0)
+
+
+def test_rejection_counts_cancelled_stages(session):
+    """Stages cancelled by a rejection are counted as failed."""
+    tracker = _setup(session, "u1")
+
+    tracker.complete_stage("u1", "A", ExecutionResult(error_code=4), stage="validar")
+
+    assert _counters(session, "u1") == (TransactionState.REJECTED.value, 3, 0, 3)
+
+
+def test_start_stage_counts_new_stages(session):
+    """Stages created one by one are added to the total once."""
+    PlatformRegistry.register(PlatformDefinition(code="A", order=1))
+    session.add(TxProcess(uuid="u1", process_code="P", state=TransactionState.PENDING.value))
+    session.commit()
+    tracker = SqlTransactionTracker(session)
+
+    tracker.start_stage("u1", "A")
+    tracker.start_stage("u1", "A")
+    tracker.start_stage("u1", "A", stage="extra")
+
+    assert _counters(session, "u1")[1:] == (2, 0, 0)
+
+
+def test_repair_stage_counters(session):
+    """Counters are rebuilt from RPA_TX_STAGE."""
+    tracker = _setup(session, "u1", "u2")
+    tracker.complete_stage("u1", "A", ExecutionResult(error_code=0), stage="validar")
+    tracker.complete_stage("u2", "A", ExecutionResult(error_code=2), stage="validar")
+    expected = {u: _counters(session, u) for u in ("u1", "u2")}
+    session.query(TxProcess).update({"total_stages": 0, "completed_stages": 0, "failed_stages": 0})
+    session.commit()
+
+    assert tracker.repair_stage_counters(["u1"]) == 1
+    assert tracker.repair_stage_counters() == 2
+    assert {u: _counters(session, u) for u in ("u1", "u2")} == expected
+
+
+def test_ensure_columns_upgrades_old_tables(registries):
+    """The counter columns are added to an older table and filled from its stages."""
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE "RPA_TX_PROCESS" (uuid VARCHAR(36) PRIMARY KEY, process_code VARCHAR(50) NOT NULL, '
+            'state VARCHAR(20) NOT NULL, error_type VARCHAR(20), error_description VARCHAR(255), '
+            'created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)'
+        ))
+        conn.execute(text(
+            "INSERT INTO \"RPA_TX_PROCESS\" VALUES ('u1', 'P', 'PENDING', NULL, NULL, '2024-01-01', '2024-01-01')"
+        ))
+    create_schema(engine)
+    with Session(engine) as session:
+        session.add_all([
+            TxStage(uuid="u1", system="A", stage="validar", state=TransactionState.PENDING.value),
+            TxStage(uuid="u1", system="B", stage="procesar", state=TransactionState.PENDING.value),
+        ])
+        session.commit()
+
+    assert ensure_columns(engine) == [
+        "RPA_TX_PROCESS.total_stages", "RPA_TX_PROCESS.completed_stages", "RPA_TX_PROCESS.failed_stages",
+        "RPA_TX_PROCESS.version",
+    ]
+    assert ensure_columns(engine) == []
+    with Session(engine) as session:
+        assert _counters(session, "u1") == (TransactionState.PENDING.value, 2, 0, 0)
+
+        # The first finished stage of the legacy transaction must not complete it
+        PlatformRegistry.register(PlatformDefinition(code="A", stages=("validar",), order=1))
+        PlatformRegistry.register(PlatformDefinition(code="B", stages=("procesar",), order=2))
+        SqlTransactionTracker(session).complete_stage("u1", "A", ExecutionResult(error_code=0), stage="validar")
+        assert _counters(session, "u1") == (TransactionState.IN_PROGRESS.value, 2, 1, 0)
@@ -0,0 +1,135 @@
+"""Tests for the deferred-commit unit-of-work mode of the tracker."""
+from typing import Optional
+
+import pytest
+from sqlalchemy import event
+
+from rpa_tracker.domain.execution_result import ExecutionResult
+from rpa_tracker.enums import TransactionState
+from rpa_tracker.models.tx_event import TxEvent
+from rpa_tracker.models.tx_process import TxProcess
+from rpa_tracker.models.tx_stage import TxStage
+from rpa_tracker.tracking.deduplication.registry import DeduplicationRegistry
+from rpa_tracker.tracking.sql_tracker import SqlTransactionTracker
+
+from test.domain.cancel_payload import CancelacionPayload
+from test.infra.models.tx_data import TxData
+
+
+class RacingDeduplication:
+    """Loses the insert race: the first lookup misses, the data already exists."""
+    version = 1
+
+    def __init__(self, session):
+        self.session = session
+        self.lookups = 0
+
+    def calculate_fingerprint(self, payload: CancelacionPayload) -> str:
+        """Use the requerimiento as fingerprint."""
+        return payload.requerimiento
+
+    def find_existing_uuid(self, fingerprint: str) -> Optional[str]:
+        """Miss on the first lookup, then return the winner."""
+        self.lookups += 1
+        return None if self.lookups == 1 else "winner"
+
+    def persist_data(self, uuid: str, payload: CancelacionPayload) -> None:
+        """Collide with the row written by the winner."""
+        self.session.add(TxData(uuid="winner", requerimiento=payload.requerimiento,
+                                tipo_operacion=payload.tipo_operacion, nombre=payload.nombre))
+
+
+def _commits(session):
+    counter = {"commits": 0}
+
+    @event.listens_for(session, "after_commit")
+    def after_commit(_):
+        counter["commits"] += 1
+
+    return counter
+
+
+def _seed(session, count):
+    for i in range(count):
+        session.add(TxProcess(uuid=f"u{i}", process_code="P", state=TransactionState.PENDING.value))
+    session.commit()
+
+
+def test_batch_commits_on_threshold(session):
+    """Writes inside the block commit every N operations and at the end."""
+    _seed(session, 1)
+    tracker = SqlTransactionTracker(session)
+    counter = _commits(session)
+
+    with tracker.batch(commit_every=3) as unit:
+        for i in range(7):
+            tracker.start_stage("u0", "A", stage=f"s{i}")
+
+    assert counter["commits"] == 3  # after 3, after 6, on exit
+    assert unit.commits == 3
+    assert session.query(TxStage).count() == 7
+
+
+def test_batch_rolls_back_to_last_commit_on_error(session):
+    """An error discards only the operations since the last commit."""
+    _seed(session, 1)
+    tracker = SqlTransactionTracker(session)
+
+    with pytest.raises(RuntimeError):
+        with tracker.batch(commit_every=3):
+            for i in range(5):
+                tracker.start_stage("u0", "A", stage=f"s{i}")
+            raise RuntimeError("robot crashed")
+
+    assert sorted(s.stage for s in session.query(TxStage)) == ["s0", "s1", "s2"]
+
+
+def test_batch_commits_event_and_stage_finish_together(session):
+    """complete_stage is one operation: a commit never splits its event from its stage."""
+    _seed(session, 5)
+    tracker = SqlTransactionTracker(session)
+    for i in range(5):
+        tracker.start_stage(f"u{i}", "A")
+
+    with pytest.raises(RuntimeError):
+        with tracker.batch(commit_every=3):
+            for i in range(5):
+                tracker.complete_stage(f"u{i}", "A", ExecutionResult(error_code=0))
+            raise RuntimeError("robot crashed")
+
+    finished = session.query(TxStage).filter(TxStage.state != TransactionState.PENDING.value).count()
+    assert session.query(TxEvent).count() == finished == 3
+
+
+def test_autocommit_disabled_leaves_commit_to_caller(session):
+    """With autocommit=False nothing is committed by the tracker."""
+    _seed(session, 1)
+    tracker = SqlTransactionTracker(session, autocommit=False)
+    counter = _commits(session)
+
+    tracker.start_stage("u0", "A")
+    tracker.complete_stage("u0", "A", ExecutionResult(error_code=0))
+
+    assert counter["commits"] == 0
+    session.rollback()
+    assert session.query(TxStage).count() == 0
+    assert session.query(TxEvent).count() == 0
+
+
+def test_batch_keeps_previous_work_when_intake_race_is_lost(session):
+    """The IntegrityError path only rolls back its own savepoint."""
+    session.add(TxData(uuid="winner", requerimiento="FE-1", tipo_operacion="ALTA", nombre="X"))
+    _seed(session, 1)
+    DeduplicationRegistry.register("RACE", RacingDeduplication(session))
+    tracker = SqlTransactionTracker(session)
+
+    with tracker.batch(commit_every=100):
+        tracker.start_stage("u0", "A")
+        result = tracker.start_or_resume(
+            "RACE", CancelacionPayload(requerimiento="FE-1", tipo_operacion="ALTA", nombre="X")
+        )
+        tracker.start_stage("u0", "B")
+
+    assert result == ("winner", False)
+    assert session.query(TxProcess).count() == 1
+    assert session.query(TxStage).count() == 2